@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This package provides a micro-benchmark suite for the Repository CRUD, bulk and streaming paths.
+
+It is a development tool and is not part of the distributed package; run it with
+`python -m benchmarks --help` from the project root.
+"""
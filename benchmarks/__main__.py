@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run the Repository benchmark suite.
+
+    python -m benchmarks --backend sqlite --output results.json
+    python -m benchmarks --baseline results.json --fail-on-regression
+
+Results are printed as a table and optionally saved as JSON; with --baseline, each
+case is compared with the same case of a saved run.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import List, Optional
+
+import sqlalchemy
+
+from benchmarks.backends import BACKENDS, open_database
+from benchmarks.cases import build_cases, cleanup
+from benchmarks.harness import BenchmarkResult, Comparison, compare, run_case
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=BACKENDS + ("all",),
+        help="backend to run against, repeatable; sqlite by default, all for every available one",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--case", action="append", help="run only this case, repeatable"
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    return parser.parse_args(argv)
+
+
+def _print_results(results: List[BenchmarkResult]) -> None:
+    print(
+        f"{'backend':<11}{'case':<22}{'ops/sec':>12}{'p50 ms':>10}"
+        f"{'p99 ms':>10}{'peak KiB':>11}"
+    )
+    for r in results:
+        print(
+            f"{r.backend:<11}{r.name:<22}{r.ops_per_sec:>12.1f}{r.p50_ms:>10.3f}"
+            f"{r.p99_ms:>10.3f}{r.peak_memory_kb:>11.1f}"
+        )
+
+
+def _print_comparisons(comparisons: List[Comparison]) -> None:
+    print(f"\n{'backend':<11}{'case':<22}{'ops/sec':>10}{'p99':>10}")
+    for c in comparisons:
+        flag = "  REGRESSION" if c.regression else ""
+        print(
+            f"{c.backend:<11}{c.name:<22}{c.ops_per_sec_change:>+10.1%}"
+            f"{c.p99_change:>+10.1%}{flag}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the suite.
+    :param argv: (List[str] | None) The command line arguments, sys.argv by default.
+    :return: (int) The exit status: 1 if --fail-on-regression is set and a case regressed.
+    """
+    args = _parse_args(argv)
+    backends = args.backend or ["sqlite"]
+    if "all" in backends:
+        backends = list(BACKENDS)
+    results: List[BenchmarkResult] = []
+    for backend in backends:
+        database = open_database(backend)
+        if database is None:
+            print(
+                f"Skipping {backend}: not configured or not reachable", file=sys.stderr
+            )
+            continue
+        cleanup(database)
+        try:
+            for case in build_cases(database, batch_size=args.batch_size):
+                if args.case and case.name not in args.case:
+                    continue
+                # Bulk and streaming calls process a whole batch, so run fewer of them
+                iterations = (
+                    args.iterations
+                    if case.ops_per_call == 1
+                    else max(5, args.iterations // 20)
+                )
+                results.append(
+                    run_case(
+                        backend, case, iterations, warmup=min(args.warmup, iterations)
+                    )
+                )
+        finally:
+            cleanup(database)
+            database.engine.dispose()
+    _print_results(results)
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "results": [result.to_dict() for result in results],
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        comparisons = compare(results, baseline, tolerance=args.tolerance)
+        _print_comparisons(comparisons)
+        if args.fail_on_regression and any(c.regression for c in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
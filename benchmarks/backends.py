@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the database backends the benchmark suite can run against.
+
+SQLite always runs, on a temporary file. PostgreSQL, MySQL and MariaDB use the same
+environment variables as the integration tests (see example.env and docker-compose.yml)
+and are skipped when those are unset or the server does not answer.
+"""
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, text
+
+from crud_repository.db.factory import DatabaseFactory
+from crud_repository.db.idatabase import IDatabase
+from crud_repository.db.sqlite.db import SQLiteDatabase
+
+BACKENDS = ("sqlite", "postgresql", "mysql", "mariadb")
+
+# The environment variable prefix and URL scheme of each server backend.
+_SERVERS = {
+    "postgresql": ("POSTGRES", "postgresql+psycopg2", "POSTGRES_DB"),
+    "mysql": ("MYSQL", "mysql+pymysql", "MYSQL_DATABASE"),
+    "mariadb": ("MARIADB", "mariadb+pymysql", "MARIADB_DATABASE"),
+}
+
+
+# ---------------------------------------------------------
+def server_config(backend: str) -> Optional[Dict[str, Any]]:
+    """
+    Build the DatabaseFactory configuration of a server backend from the environment.
+    :param backend: (str) One of "postgresql", "mysql" and "mariadb".
+    :return: (dict | None) The configuration, or None if a variable is missing.
+    """
+    prefix, scheme, db_variable = _SERVERS[backend]
+    values = {
+        "db_name": os.getenv(db_variable),
+        "user": os.getenv(f"{prefix}_USER"),
+        "password": os.getenv(f"{prefix}_PASSWORD"),
+        "host": os.getenv(f"{prefix}_HOST"),
+        "port": os.getenv(f"{prefix}_PORT"),
+    }
+    if not all(values.values()):
+        return None
+    url = (
+        f"{scheme}://{values['user']}:{values['password']}"
+        f"@{values['host']}:{values['port']}/{values['db_name']}"
+    )
+    return {"type": backend, **values, "url": url}
+
+
+def _reachable(url: str, timeout: int = 3) -> bool:
+    engine = create_engine(url, connect_args={"connect_timeout": timeout})
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        return False
+    finally:
+        engine.dispose()
+
+
+# ---------------------------------------------------------
+def open_database(backend: str, directory: Optional[str] = None) -> Optional[IDatabase]:
+    """
+    Open a benchmark database.
+    :param backend: (str) One of BACKENDS.
+    :param directory: (str | None) The directory of the SQLite file, a new temporary
+        directory by default.
+    :return: (IDatabase | None) The database, or None if the backend is unavailable.
+    """
+    if backend == "sqlite":
+        directory = directory or tempfile.mkdtemp(prefix="crud_repository_bench_")
+        return SQLiteDatabase(db_name=os.path.join(directory, "benchmark.db"))
+    config = server_config(backend)
+    if config is None or not _reachable(config["url"]):
+        return None
+    return DatabaseFactory.create(config)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the benchmark cases for the Repository CRUD, bulk and streaming paths.
+
+Every row a case writes has a username starting with "bench_", so `cleanup` can remove
+them from a shared server database without touching other data.
+"""
+import itertools
+from typing import Any, List
+
+from sqlalchemy import delete, select
+
+from benchmarks.harness import Case
+from crud_repository.db.idatabase import IDatabase
+from crud_repository.repo.cache import ReadCache
+from crud_repository.repo.repository import Repository
+from crud_repository.repo.unit_of_work import UnitOfWork
+from tests.models import Address, Email, Role, User
+from tests.repository import UserRepository
+
+# The username prefix of every row written by the benchmarks.
+PREFIX = "bench_"
+# The number of keys cycled over by the read_cached case.
+HOT_KEYS = 50
+
+_sequence = itertools.count()
+
+
+def _user(tag: str) -> User:
+    return User(username=f"{PREFIX}{tag}_{next(_sequence)}", password="pw", name=tag)
+
+
+def _user_values(tag: str) -> dict:
+    return {
+        "username": f"{PREFIX}{tag}_{next(_sequence)}",
+        "password": "pw",
+        "name": tag,
+    }
+
+
+# ---------------------------------------------------------
+def cleanup(database: IDatabase) -> None:
+    """
+    Delete every row written by the benchmarks, children first.
+    :param database: (IDatabase) The benchmark database.
+    """
+    users = select(User.id).where(User.username.like(f"{PREFIX}%"))
+    with database.get_session() as session:
+        for child in (Email, Address, Role):
+            session.execute(delete(child).where(child.user_id.in_(users)))
+        session.execute(delete(User).where(User.username.like(f"{PREFIX}%")))
+        session.commit()
+
+
+# ---------------------------------------------------------
+def build_cases(database: IDatabase, batch_size: int = 500) -> List[Case]:
+    """
+    Build the benchmark cases for a database.
+    :param database: (IDatabase) The benchmark database.
+    :param batch_size: (int) The number of rows per call of the bulk and streaming cases.
+    :return: (List[Case]) The cases, in the order they should run.
+    """
+    repo = Repository(database, User)
+    read_cache = ReadCache(max_size=100_000, ttl=None)
+    cached_repo = Repository(database, User, cache=read_cache)
+    dto_repo = Repository(database, User, result_mode="dto")
+    user_repo = UserRepository(database)
+    seeded = repo.create_many(
+        [_user_values("seed") for _ in range(batch_size)]
+    ).primary_keys
+    seed_filter = [User.username.like(f"{PREFIX}seed_%")]
+
+    def created(n: int) -> List[Any]:
+        # create() returns a transient copy; delete() needs a persisted instance
+        return [repo.read(repo.create(_user("target")).id) for _ in range(n)]
+
+    # The keys read by read_cached: fewer than the iterations, and read once untimed
+    # before every pass, so that every timed read is a cache hit.
+    hot = seeded[:HOT_KEYS]
+    warmed = [0]
+
+    def warm_hot_keys(n: int) -> List[Any]:
+        for key in hot:
+            cached_repo.read(key)
+        warmed[0] += len(hot)
+        return [hot[i % len(hot)] for i in range(n)]
+
+    def check_hits() -> None:
+        # Only the untimed warm-up reads may miss; fail rather than report misses
+        stats = read_cache.stats()
+        if stats.misses > warmed[0] or not stats.hits:
+            raise RuntimeError("read_cached measured cache misses: %s" % stats)
+
+    def rename(user: User) -> User:
+        user.name = f"{user.name}!"
+        return repo.update(user)
+
+    def walk_pages(_: Any) -> None:
+        token = None
+        while True:
+            page = repo.page(after=token, limit=100, filters=seed_filter)
+            token = page.next_token
+            if token is None:
+                return
+
+    def serialize_lazy(keys: List[Any]) -> List[dict]:
+        # Lazy loading needs a live session: one query per relationship per user
+        with UnitOfWork(database):
+            return [user.to_dict() for user in repo.read_many(keys).items]
+
+    def serialize_profile(keys: List[Any]) -> List[dict]:
+        users = user_repo.read_many(keys, profile="with_relations").items
+        return [user.to_dict() for user in users]
+
+    def with_children(_: Any) -> User:
+        user = _user("graph")
+        user.emails = [Email(email=f"{user.username}@example.com") for _ in range(2)]
+        user.addresses = [Address(street="1 Main", city="X", state="Y", zipcode="0")]
+        user.roles = [Role(name="member")]
+        return repo.create(user)
+
+    return [
+        Case(
+            "create",
+            lambda user: repo.create(user),
+            lambda n: [_user("c") for _ in range(n)],
+        ),
+        Case("create_with_children", with_children),
+        Case("read", repo.read, lambda n: [seeded[i % len(seeded)] for i in range(n)]),
+        Case("read_cached", cached_repo.read, warm_hot_keys, cleanup=check_hits),
+        Case(
+            "read_dto",
+            dto_repo.read,
+            lambda n: [seeded[i % len(seeded)] for i in range(n)],
+        ),
+        Case(
+            "read_row",
+            repo.read_row,
+            lambda n: [seeded[i % len(seeded)] for i in range(n)],
+        ),
+        Case(
+            "create_dto",
+            lambda user: dto_repo.create(user),
+            lambda n: [_user("c") for _ in range(n)],
+        ),
+        Case("update", rename, created),
+        Case("delete", repo.delete, created),
+        Case(
+            "create_many",
+            lambda rows: repo.create_many(rows, chunk_size=batch_size),
+            lambda n: [
+                [_user_values("b") for _ in range(batch_size)] for _ in range(n)
+            ],
+            ops_per_call=batch_size,
+        ),
+        Case(
+            "update_many",
+            lambda rows: repo.update_many(rows, chunk_size=batch_size),
+            lambda n: [
+                [{"id": key, "name": f"u{i}"} for key in seeded] for i in range(n)
+            ],
+            ops_per_call=len(seeded),
+        ),
+        Case(
+            "delete_many",
+            lambda keys: repo.delete_many(keys, chunk_size=batch_size),
+            lambda n: [
+                repo.create_many(
+                    [_user_values("d") for _ in range(batch_size)]
+                ).primary_keys
+                for _ in range(n)
+            ],
+            ops_per_call=batch_size,
+        ),
+        Case(
+            "read_many",
+            lambda keys: repo.read_many(keys),
+            lambda n: [seeded] * n,
+            ops_per_call=len(seeded),
+        ),
+        Case(
+            "iter_all",
+            lambda _: sum(
+                1 for _ in repo.iter_all(batch_size=100, filters=seed_filter)
+            ),
+            ops_per_call=len(seeded),
+        ),
+        Case(
+            "read_rows",
+            lambda keys: repo.read_rows(keys),
+            lambda n: [seeded] * n,
+            ops_per_call=len(seeded),
+        ),
+        Case("page", walk_pages, ops_per_call=len(seeded)),
+        Case(
+            "find_by",
+            lambda name: repo.find_by(name=name, username__startswith=PREFIX, limit=10),
+            lambda n: [f"n{i}" for i in range(n)],
+        ),
+        Case("count", lambda _: repo.count(username__startswith=f"{PREFIX}seed_")),
+        Case(
+            "serialize_lazy",
+            serialize_lazy,
+            lambda n: [seeded[:100]] * n,
+            ops_per_call=min(100, len(seeded)),
+        ),
+        Case(
+            "serialize_profile",
+            serialize_profile,
+            lambda n: [seeded[:100]] * n,
+            ops_per_call=min(100, len(seeded)),
+        ),
+        Case(
+            "iter_all_dto",
+            lambda _: sum(
+                1 for _ in dto_repo.iter_all(batch_size=100, filters=seed_filter)
+            ),
+            ops_per_call=len(seeded),
+        ),
+    ]
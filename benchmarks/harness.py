@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the timing, memory and baseline comparison machinery of the benchmark suite.
+"""
+import gc
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+# ---------------------------------------------------------
+@dataclass
+class Case:
+    """
+    A single benchmarked operation.
+
+    Attributes:
+        name (str): The name of the case, unique within a backend.
+        run (Callable[[Any], Any]): The timed operation, called once per iteration.
+        prepare (Callable[[int], List[Any]]): Builds the argument of each call, untimed,
+            given the number of calls.
+        ops_per_call (int): The number of rows one call processes, for bulk and
+            streaming cases; ops/sec counts rows rather than calls.
+        cleanup (Optional[Callable[[], None]]): Called once after the case, untimed.
+    """
+
+    name: str
+    run: Callable[[Any], Any]
+    prepare: Callable[[int], List[Any]] = lambda n: [None] * n
+    ops_per_call: int = 1
+    cleanup: Optional[Callable[[], None]] = None
+
+
+# ---------------------------------------------------------
+@dataclass
+class BenchmarkResult:
+    """
+    The measurements of one case on one backend.
+
+    Attributes:
+        backend (str): The database backend, e.g. "sqlite".
+        name (str): The name of the case.
+        iterations (int): The number of timed calls.
+        ops_per_call (int): The number of rows per call.
+        ops_per_sec (float): Rows (or calls) processed per second.
+        mean_ms (float): The mean latency of a call, in milliseconds.
+        p50_ms (float): The median latency of a call, in milliseconds.
+        p99_ms (float): The 99th percentile latency of a call, in milliseconds.
+        peak_memory_kb (float): The peak memory allocated while running the case, in KiB.
+    """
+
+    backend: str
+    name: str
+    iterations: int
+    ops_per_call: int
+    ops_per_sec: float
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    peak_memory_kb: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: (dict) The result as JSON-serializable values.
+        """
+        return asdict(self)
+
+
+# ---------------------------------------------------------
+@dataclass
+class Comparison:
+    """
+    The change of one result against its baseline.
+
+    Attributes:
+        backend (str): The database backend.
+        name (str): The name of the case.
+        ops_per_sec_change (float): The relative change in throughput, e.g. -0.2 for 20% slower.
+        p99_change (float): The relative change in p99 latency, e.g. 0.2 for 20% slower.
+        regression (bool): Whether either change exceeds the tolerance in the bad direction.
+    """
+
+    backend: str
+    name: str
+    ops_per_sec_change: float
+    p99_change: float
+    regression: bool = field(default=False)
+
+
+# ---------------------------------------------------------
+def percentile(samples: Sequence[float], q: float) -> float:
+    """
+    Compute a percentile with the nearest-rank method.
+    :param samples: (Sequence[float]) The samples, sorted in ascending order.
+    :param q: (float) The percentile, between 0 and 100.
+    :return: (float) The sample at that rank, 0.0 if there are none.
+    """
+    if not samples:
+        return 0.0
+    rank = max(1, int(round(q / 100.0 * len(samples) + 0.5)))
+    return samples[min(rank, len(samples)) - 1]
+
+
+# ---------------------------------------------------------
+def run_case(
+    backend: str,
+    case: Case,
+    iterations: int,
+    warmup: int = 10,
+    memory_iterations: int = 50,
+) -> BenchmarkResult:
+    """
+    Time a case, then measure its peak memory in a separate pass.
+
+    Latency is measured without tracemalloc, whose hooks slow every allocation down;
+    the peak memory comes from a shorter second pass run under tracemalloc. Garbage
+    collection is disabled while timing so that a collection is not billed to one call.
+
+    :param backend: (str) The name of the backend the case runs on.
+    :param case: (Case) The case.
+    :param iterations: (int) The number of timed calls.
+    :param warmup: (int) The number of untimed calls made first.
+    :param memory_iterations: (int) The number of calls in the memory pass.
+    :return: (BenchmarkResult) The measurements.
+    """
+    try:
+        for argument in case.prepare(warmup):
+            case.run(argument)
+        arguments = case.prepare(iterations)
+        timings: List[float] = []
+        gc.collect()
+        gc.disable()
+        try:
+            for argument in arguments:
+                started = time.perf_counter()
+                case.run(argument)
+                timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+        arguments = case.prepare(min(iterations, memory_iterations))
+        gc.collect()
+        tracemalloc.start()
+        try:
+            for argument in arguments:
+                case.run(argument)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        if case.cleanup is not None:
+            case.cleanup()
+    total = sum(timings)
+    timings.sort()
+    return BenchmarkResult(
+        backend=backend,
+        name=case.name,
+        iterations=iterations,
+        ops_per_call=case.ops_per_call,
+        ops_per_sec=iterations * case.ops_per_call / total if total else 0.0,
+        mean_ms=total / len(timings) * 1000.0 if timings else 0.0,
+        p50_ms=percentile(timings, 50) * 1000.0,
+        p99_ms=percentile(timings, 99) * 1000.0,
+        peak_memory_kb=peak / 1024.0,
+    )
+
+
+# ---------------------------------------------------------
+def compare(
+    results: Sequence[BenchmarkResult],
+    baseline: Sequence[Dict[str, Any]],
+    tolerance: float = 0.1,
+) -> List[Comparison]:
+    """
+    Compare results with the results of a baseline run, case by case.
+    :param results: (Sequence[BenchmarkResult]) The results of this run.
+    :param baseline: (Sequence[dict]) The "results" list of a saved run.
+    :param tolerance: (float) The relative change tolerated before a case counts as a regression.
+    :return: (List[Comparison]) One comparison per case present in both runs.
+    """
+    previous = {(item["backend"], item["name"]): item for item in baseline}
+    comparisons = []
+    for result in results:
+        before = previous.get((result.backend, result.name))
+        if before is None:
+            continue
+        throughput = _change(before["ops_per_sec"], result.ops_per_sec)
+        latency = _change(before["p99_ms"], result.p99_ms)
+        comparisons.append(
+            Comparison(
+                backend=result.backend,
+                name=result.name,
+                ops_per_sec_change=throughput,
+                p99_change=latency,
+                regression=throughput < -tolerance or latency > tolerance,
+            )
+        )
+    return comparisons
+
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
@@ -2,44 +2,23 @@
 # -*- coding: utf-8 -*-
 """
 This module is used for managing the configuration of the CRUDRepository project.
+
+The configuration is resolved lazily: the .env file is searched for and loaded, and the
+settings below are built, on the first access to one of them, e.g. `__config__.log_config`,
+rather than when the module is imported.
 """
 # --------------------------------------------------------------
 import time
 import os
-import json
-from dotenv import load_dotenv, find_dotenv, dotenv_values
+import threading
+from typing import Any, Dict, Optional
 
 # --------------------------------------------------------------
-# Load environment variables from .env file
-try:
-    for filename in [".env"]:
-        load_dotenv(
-            find_dotenv(
-                filename=filename,
-                raise_error_if_not_found=True,
-                usecwd=True,
-            )
-        )
-except Exception as e:
-    print(f"Error loading environment variables: {e}")
-
-
-# --------------------------------------------------------------
-# Load and setup environment variables
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))  # ~/CRUDRepository/crud_repository
 # --------------------------------------------------------------
 DATA_DIR = os.path.join(ROOT_DIR, "data")  # ~/CRUDRepository/crud_repository/data
-LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
-LOG_FILE = f'{ROOT_DIR}/logs/crud_{time.strftime("%Y%m%d%H%M%S")}.log'
 LOG_DIR = os.path.join(ROOT_DIR, "logs")  # ~/CRUDRepository/crud_repository/logs
 # --------------------------------------------------------------
-# Set environment variables
-os.environ.setdefault("ROOT_DIR", ROOT_DIR)
-os.environ.setdefault("LOG_FILE", LOG_FILE)
-os.environ.setdefault("LOG_LEVEL", LOG_LEVEL)
-os.environ.setdefault("LOG_DIR", LOG_DIR)
-print(json.dumps(dotenv_values(), indent=2, sort_keys=True))
-# --------------------------------------------------------------
 # Define log colors
 log_colors_config = {
     "DEBUG": "cyan",
@@ -49,50 +28,133 @@ log_colors_config = {
     "CRITICAL": "red",
 }
 # --------------------------------------------------------------
-# Logging configuration
-log_config = {
-    "version": 1,
-    "disable_existing_loggers": True,
-    "formatters": {
-        "standard": {
-            "class": "logging.Formatter",
-            "format": "[%(asctime)s][%(levelname)s][%(name)s][%(lineno)s]: \n%(message)s",
-            "datefmt": "%Y-%m-%d %H:%M:%S",
-            "style": "%",
-        },
-        "colored": {
-            "()": "colorlog.ColoredFormatter",
-            "format": "%(log_color)s[%(asctime)s][%(levelname)s][%(name)s][%(lineno)s]: "
-            "\n%(message)s",
-            "datefmt": "%Y-%m-%d %H:%M:%S",
-            "log_colors": log_colors_config,
+# The settings resolved from the environment, and the lock guarding their resolution.
+_settings: Optional[Dict[str, Any]] = None
+_settings_lock = threading.Lock()
+
+
+# --------------------------------------------------------------
+def load_environment() -> Optional[str]:
+    """
+    Load environment variables from the .env file found from the working directory up,
+    without overriding variables already set.
+    :return: (str | None) The path of the loaded .env file, None if there is none.
+    """
+    from dotenv import find_dotenv, load_dotenv
+
+    path = find_dotenv(filename=".env", usecwd=True)
+    if not path:
+        return None
+    load_dotenv(path)
+    return path
+
+
+# --------------------------------------------------------------
+def get_settings() -> Dict[str, Any]:
+    """
+    Resolve the settings on first use: load the .env file and build the settings.
+    :return: (dict) The settings, by name.
+    """
+    global _settings
+    if _settings is not None:
+        return _settings
+    with _settings_lock:
+        if _settings is None:
+            load_environment()
+            _settings = _build_settings()
+        return _settings
+
+
+# --------------------------------------------------------------
+def __getattr__(name: str) -> Any:
+    # PEP 562: settings that depend on the environment are resolved on first access
+    settings = get_settings()
+    if name in settings:
+        return settings[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# --------------------------------------------------------------
+def _build_settings() -> Dict[str, Any]:
+    # Load and setup environment variables
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+    LOG_FILE = f'{ROOT_DIR}/logs/crud_{time.strftime("%Y%m%d%H%M%S")}.log'
+    # --------------------------------------------------------------
+    # Set environment variables
+    os.environ.setdefault("ROOT_DIR", ROOT_DIR)
+    os.environ.setdefault("LOG_FILE", LOG_FILE)
+    os.environ.setdefault("LOG_LEVEL", LOG_LEVEL)
+    os.environ.setdefault("LOG_DIR", LOG_DIR)
+    # --------------------------------------------------------------
+    # Queue logging: with LOG_QUEUE enabled, records are put on a bounded queue and the
+    # handlers below write them from a background thread, in batches.
+    log_queue_config = {
+        "enabled": os.getenv("LOG_QUEUE", "false").lower() in ("1", "true", "yes", "on"),
+        "max_size": int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+        "policy": os.getenv("LOG_QUEUE_POLICY", "drop"),  # drop or block
+        "timeout": float(os.getenv("LOG_QUEUE_TIMEOUT", "1.0")),  # block policy only
+        "batch_size": int(os.getenv("LOG_QUEUE_BATCH_SIZE", "256")),
+    }
+    # --------------------------------------------------------------
+    # Log rotation: the log file also rolls over at LOG_MAX_BYTES (0 disables it), and
+    # rotated files are gzip-compressed unless LOG_COMPRESS is disabled.
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_COMPRESS = os.getenv("LOG_COMPRESS", "true").lower() in ("1", "true", "yes", "on")
+    # --------------------------------------------------------------
+    # Logging configuration
+    log_config = {
+        "version": 1,
+        "disable_existing_loggers": True,
+        "formatters": {
+            "standard": {
+                "class": "logging.Formatter",
+                "format": "[%(asctime)s][%(levelname)s][%(name)s][%(lineno)s]: \n%(message)s",
+                "datefmt": "%Y-%m-%d %H:%M:%S",
+                "style": "%",
+            },
+            "colored": {
+                "()": "colorlog.ColoredFormatter",
+                "format": "%(log_color)s[%(asctime)s][%(levelname)s][%(name)s][%(lineno)s]: "
+                "\n%(message)s",
+                "datefmt": "%Y-%m-%d %H:%M:%S",
+                "log_colors": log_colors_config,
+            },
         },
-    },
-    "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "level": "DEBUG",
-            "formatter": "colored",
+        "handlers": {
+            "console": {
+                "class": "logging.StreamHandler",
+                "level": "DEBUG",
+                "formatter": "colored",
+            },
+            "file_handler": {
+                "class": "crud_repository.my_logger.handlers.CustomTimedRotatingFileHandler",
+                "filename": f"{LOG_FILE}",
+                "when": "midnight",
+                "interval": 1,
+                "backup_count": 2,  # Modified this line to keep only 2 log files
+                "max_bytes": LOG_MAX_BYTES,
+                "compress": LOG_COMPRESS,
+                # Each process logs to its own crud_<timestamp>.log; prune them all
+                "prune_pattern": "crud_*.log*",
+                "encoding": "utf-8",
+                "delay": False,
+                "utc": False,
+                "level": "DEBUG",
+                "formatter": "standard",
+            },
         },
-        "file_handler": {
-            "class": "crud_repository.my_logger.handlers.CustomTimedRotatingFileHandler",
-            "filename": f"{LOG_FILE}",
-            "when": "midnight",
-            "interval": 1,
-            "backup_count": 2,  # Modified this line to keep only 2 log files
-            "encoding": "utf-8",
-            "delay": False,
-            "utc": False,
-            "level": "DEBUG",
-            "formatter": "standard",
+        "loggers": {
+            "root": {
+                "handlers": ["console", "file_handler"],
+                "level": "DEBUG",
+                "propagate": True,
+            }
         },
-    },
-    "loggers": {
-        "root": {
-            "handlers": ["console", "file_handler"],
-            "level": "DEBUG",
-            "propagate": True,
-        }
-    },
-}
+    }
+    return {
+        "LOG_LEVEL": LOG_LEVEL,
+        "LOG_FILE": LOG_FILE,
+        "log_queue_config": log_queue_config,
+        "log_config": log_config,
+    }
 # --------------------------------------------------------------
@@ -3,14 +3,15 @@
 """
 This module provides classes for managing databases.
 """
-from typing import Dict
-from crud_repository.db.idatabase import IDatabase
-from crud_repository.db.mariadb.db import MariaDBDatabase
-from crud_repository.db.mysql.db import MySQLDatabase
-from crud_repository.db.postgres.db import PostgreSQLDatabase
-from crud_repository.model.base import Base
+import importlib
+from typing import TYPE_CHECKING, Dict, Type, Union
+from crud_repository.db.routing import DEFAULT_READ_YOUR_WRITES
 from crud_repository.my_logger.logger import CustomLogger
 
+if TYPE_CHECKING:
+    from crud_repository.db.iasyncdatabase import IAsyncDatabase
+    from crud_repository.db.idatabase import IDatabase
+
 log = CustomLogger(__name__).get_logger("DEBUG")
 
 
@@ -19,39 +20,106 @@ class DatabaseFactory:
     """
     This class provides a factory for creating database instances and ensuring tables are created.
     """
-    _instances: Dict[str, IDatabase] = {}
+    _instances: Dict[str, Union["IDatabase", "IAsyncDatabase"]] = {}
+    # Database classes by type, as "module:class" paths; a backend module, and the
+    # driver it pulls in, is only imported the first time a database of its type is created.
+    _types = {
+        "postgresql": "crud_repository.db.postgres.db:PostgreSQLDatabase",
+        "mysql": "crud_repository.db.mysql.db:MySQLDatabase",
+        "mariadb": "crud_repository.db.mariadb.db:MariaDBDatabase",
+        "sqlite": "crud_repository.db.sqlite.db:SQLiteDatabase",
+    }
+    _async_types = {
+        "postgresql": "crud_repository.db.postgres.async_db:AsyncPostgreSQLDatabase",
+        "mysql": "crud_repository.db.mysql.async_db:AsyncMySQLDatabase",
+        "mariadb": "crud_repository.db.mariadb.async_db:AsyncMariaDBDatabase",
+        "sqlite": "crud_repository.db.sqlite.async_db:AsyncSQLiteDatabase",
+    }
 
     @staticmethod
-    def create(config: dict) -> IDatabase:
+    def create(config: dict) -> Union["IDatabase", "IAsyncDatabase"]:
         """
         Create a database instance based on the provided configuration and create/update all tables.
 
+        Set `"async": True` in the configuration to get an IAsyncDatabase backed by
+        asyncpg, aiomysql or aiosqlite instead; its tables are created on first use.
+
+        Instances are registered under `config["name"]`, or the database type if no name
+        is given, so several databases of one type can coexist. `config["replicas"]` lists
+        read replicas as configurations overriding the primary's, e.g. its host or url;
+        repository reads are routed to them by `config["replica_policy"]` ("round_robin" or
+        "least_connections"), except for `config["read_your_writes"]` seconds after a write.
+
         :param config: The configuration for the database.
         :return: The created database instance.
         """
         try:
             db_type = config["type"].lower()
+            is_async = bool(config.get("async", False))
+            name = config.get("name", None) or db_type
+            key = f"{name}+async" if is_async else name
 
-            # Check if an instance of this type already exists
-            if db_type in DatabaseFactory._instances:
-                return DatabaseFactory._instances[db_type]
+            # Check if an instance with this name already exists
+            if key in DatabaseFactory._instances:
+                return DatabaseFactory._instances[key]
 
             # Create the database instance
-            instance: IDatabase
-            if db_type == "postgresql":
-                instance = PostgreSQLDatabase(**config)
-            elif db_type == "mysql":
-                instance = MySQLDatabase(**config)
-            elif db_type == "mariadb":
-                instance = MariaDBDatabase(**config)
+            instance: Union["IDatabase", "IAsyncDatabase"]
+            if is_async and db_type in DatabaseFactory._async_types:
+                instance = DatabaseFactory._load(DatabaseFactory._async_types[db_type])(**config)
+            elif is_async:
+                log.debug(f"Invalid async database type: {db_type}")
+                raise ValueError("Invalid async database type: %s" % db_type)
+            elif db_type in DatabaseFactory._types:
+                instance = DatabaseFactory._load(DatabaseFactory._types[db_type])(**config)
+                if config.get("replicas"):
+                    instance.set_replicas(
+                        [DatabaseFactory._create_replica(config, replica) for replica in config["replicas"]],
+                        policy=config.get("replica_policy", "round_robin"),
+                        read_your_writes=config.get("read_your_writes", DEFAULT_READ_YOUR_WRITES),
+                    )
             else:
                 log.debug(f"Invalid database type: {db_type}")
                 raise ValueError("Invalid database type: %s" % db_type)
 
             # Store the new instance in the dictionary
-            DatabaseFactory._instances[db_type] = instance
+            DatabaseFactory._instances[key] = instance
             return instance
         except Exception as e:
             log.debug(f"Error creating database instance: {e}")
             raise e
 
+    @staticmethod
+    def get(name: str) -> Union["IDatabase", "IAsyncDatabase"]:
+        """
+        Get a database instance by the name it was created under.
+        :param name: The `name` of its configuration, or its type if it had no name;
+            async instances are registered as "<name>+async".
+        :return: The database instance.
+        """
+        if name not in DatabaseFactory._instances:
+            raise ValueError("Unknown data source: %s" % name)
+        return DatabaseFactory._instances[name]
+
+    @staticmethod
+    def _create_replica(config: dict, replica: dict) -> "IDatabase":
+        """
+        Create a read replica from the primary's configuration overridden by the replica's.
+        Replicas never provision the schema, which is replicated from the primary.
+        """
+        replica_config = {k: v for k, v in config.items() if k not in ("name", "replicas")}
+        if "url" not in replica:
+            replica_config.pop("url", None)
+        replica_config.update(replica)
+        replica_config["provisioning"] = "none"
+        return DatabaseFactory._load(DatabaseFactory._types[config["type"].lower()])(**replica_config)
+
+    @staticmethod
+    def _load(path: str) -> Type:
+        """
+        Import a database class from its "module:class" path; imported modules are cached
+        by Python, so only the first call for a backend pays for the import.
+        """
+        module_name, class_name = path.split(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
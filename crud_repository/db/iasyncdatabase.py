@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the interface for databases accessed through SQLAlchemy's asyncio extension.
+"""
+import asyncio
+from abc import ABC
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
+
+from crud_repository.db.pooling import pool_status
+from crud_repository.model.base import Base
+from crud_repository.my_logger.instrumentation import EngineMetrics
+from crud_repository.my_logger.logger import CustomLogger
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+
+
+# ---------------------------------------------------------
+class IAsyncDatabase(ABC):
+    """
+    This class defines the interface for all asynchronous databases.
+
+    Tables are created on first use rather than in the constructor, since the
+    constructor cannot await; call `initialize()` to do it eagerly.
+
+    Attributes:
+        engine (AsyncEngine): The SQLAlchemy async engine for the database.
+        session_factory (async_sessionmaker): The session factory bound to the engine.
+        metrics (EngineMetrics): The statement, pool and connection metrics of the engine.
+    """
+
+    engine: AsyncEngine
+    session_factory: async_sessionmaker
+    metrics: Optional[EngineMetrics] = None
+    _initialized: bool = False
+    _init_lock: Optional[asyncio.Lock] = None
+
+    def connect(self) -> AsyncConnection:
+        """
+        Connect to the database. Use the result as `async with database.connect() as conn`.
+        :return: (AsyncConnection) The SQLAlchemy async connection for the database.
+        """
+        return self.engine.connect()
+
+    def get_session(self, **kwargs) -> AsyncSession:
+        """
+        Get a new session from the database's session factory.
+        :param kwargs: (dict) Session options overriding the factory's.
+        :return: (AsyncSession) A new SQLAlchemy async session; the caller is responsible for closing it.
+        """
+        return self.session_factory(**kwargs)
+
+    async def initialize(self) -> None:
+        """
+        Create all tables registered on Base, once per database instance.
+        """
+        if self._initialized:
+            return
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if self._initialized:
+                return
+            async with self.engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            self._initialized = True
+
+    def get_pool_status(self) -> Dict[str, Any]:
+        """
+        Report the state of the engine's connection pool.
+        :return: (dict) The pool class and, for queue pools, the size and the checked-out,
+            idle and overflow connection counts.
+        """
+        return pool_status(self.engine.sync_engine.pool)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Export the statement latency, pool wait time and connection churn of the engine.
+        :return: (dict) The metrics snapshot, empty if the engine is not instrumented.
+        """
+        return self.metrics.snapshot() if self.metrics is not None else {}
+
+    async def dispose(self) -> None:
+        """
+        Close all pooled connections of the engine.
+        """
+        await self.engine.dispose()
+
+    def __dict__(self):
+        return {"engine": self.engine, "session_factory": self.session_factory}
+
+    def __repr__(self):
+        return f"AsyncDatabaseInterface(engine={self.engine!r})"
+
+
+# ---------------------------------------------------------
@@ -4,8 +4,13 @@
 This module provides classes for managing databases.
 """
 from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
 from sqlalchemy import Engine, Connection
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.orm import Session, scoped_session, sessionmaker
+from crud_repository.db.pooling import pool_status
+from crud_repository.db.routing import DEFAULT_READ_YOUR_WRITES, ReplicaRouter
+from crud_repository.db.schema import SchemaProvisioner, model_tables
+from crud_repository.my_logger.instrumentation import EngineMetrics
 from crud_repository.my_logger.logger import CustomLogger
 
 
@@ -17,9 +22,19 @@ class IDatabase(ABC):
     Attributes:
         engine (Engine): The SQLAlchemy engine for the database.
         session (Session): The SQLAlchemy session for the database.
+        session_factory (sessionmaker): The session factory bound to the engine, built once.
+        metrics (EngineMetrics): The statement, pool and connection metrics of the engine.
+        provisioning (str): The schema provisioning mode, one of "eager", "cached", "lazy"
+            and "none"; see crud_repository.db.schema.
+        router (ReplicaRouter): The read replica router, if replicas are configured.
     """
     engine: Engine
     session: scoped_session
+    session_factory: sessionmaker = None
+    metrics: Optional[EngineMetrics] = None
+    provisioning: str = "eager"
+    schema: Optional[SchemaProvisioner] = None
+    router: Optional[ReplicaRouter] = None
 
     def connect(self) -> Connection:
         """
@@ -28,13 +43,114 @@ class IDatabase(ABC):
         """
         return self.engine.connect()
 
+    def get_session_factory(self) -> sessionmaker:
+        """
+        Get the session factory for the database, building it on first use.
+        :return: (sessionmaker) The SQLAlchemy session factory bound to the engine.
+        """
+        if self.session_factory is None:
+            self.session_factory = sessionmaker(bind=self.engine)
+        return self.session_factory
+
+    def get_session(self, **kwargs) -> Session:
+        """
+        Get a new session from the database's session factory.
+        :param kwargs: (dict) Session options overriding the factory's, e.g. expire_on_commit.
+        :return: (Session) A new SQLAlchemy session; the caller is responsible for closing it.
+        """
+        return self.get_session_factory()(**kwargs)
+
+    def get_read_session(self, **kwargs) -> Session:
+        """
+        Get a new session for reads: on a replica chosen by the router, or on this
+        database without replicas or during the read-your-writes window.
+        :param kwargs: (dict) Session options overriding the factory's, e.g. expire_on_commit.
+        :return: (Session) A new SQLAlchemy session; the caller is responsible for closing it.
+        """
+        database = self.router.route(self) if self.router is not None else self
+        return database.get_session(**kwargs)
+
+    def get_read_connection(self) -> Connection:
+        """
+        Get a pooled connection for reads, routed like get_read_session.
+        :return: (Connection) A new SQLAlchemy connection; the caller is responsible for closing it.
+        """
+        database = self.router.route(self) if self.router is not None else self
+        return database.connect()
+
+    def set_replicas(
+        self,
+        replicas: List["IDatabase"],
+        policy: str = "round_robin",
+        read_your_writes: float = DEFAULT_READ_YOUR_WRITES,
+    ) -> None:
+        """
+        Route the reads of repositories to read replicas of this database.
+        :param replicas: (List[IDatabase]) The replicas; an empty list routes every read here.
+        :param policy: (str) "round_robin" or "least_connections".
+        :param read_your_writes: (float) Seconds after a write during which reads in the
+            same thread or task stay on this database.
+        """
+        self.router = ReplicaRouter(replicas, policy, read_your_writes)
+
+    def get_replicas(self) -> List["IDatabase"]:
+        """
+        :return: (List[IDatabase]) The read replicas of the database.
+        """
+        return list(self.router.replicas) if self.router is not None else []
+
+    def mark_write(self) -> None:
+        """
+        Record a committed write, opening the read-your-writes window of the current
+        thread or task.
+        """
+        if self.router is not None:
+            self.router.mark_write()
+
     def get_scoped_session(self) -> scoped_session:
         """
-        Get a session from the PostgreSQL database.  .
-        :return: (scoped_session) The SQLAlchemy session for the PostgreSQL database.
+        Get the thread-local scoped session registry of the database.
+        :return: (scoped_session) The SQLAlchemy scoped session for the database.
+        """
+        if getattr(self, "session", None) is None:
+            self.session = scoped_session(self.get_session_factory())
+        return self.session
+
+    def get_pool_status(self) -> Dict[str, Any]:
+        """
+        Report the state of the engine's connection pool.
+        :return: (dict) The pool class and, for queue pools, the size and the checked-out,
+            idle and overflow connection counts.
+        """
+        return pool_status(self.engine.pool)
+
+    def provision(self, *models: Any) -> List[str]:
+        """
+        Create the tables of models that do not exist yet, checking the schema fingerprints
+        in a single query; tables already provisioned by this instance cost nothing.
+        :param models: (Any) Mapped model classes or tables, with their relationship targets and
+            foreign key dependencies; every table registered on Base if none are given.
+        :return: (List[str]) The names of the tables that were missing or changed.
+        """
+        if self.schema is None:
+            self.schema = SchemaProvisioner(self.engine)
+        return self.schema.provision(model_tables(*models) if models else None)
+
+    def ensure_schema(self, model: Any) -> None:
+        """
+        Provision the tables of a model when the provisioning mode is "lazy"; called by
+        each Repository so that a process only provisions the tables it uses.
+        :param model: (Any) The mapped model class.
+        """
+        if self.provisioning == "lazy":
+            self.provision(model)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Export the statement latency, pool wait time and connection churn of the engine.
+        :return: (dict) The metrics snapshot, empty if the engine is not instrumented.
         """
-        _scoped_session = scoped_session(sessionmaker(bind=self.engine))
-        return _scoped_session
+        return self.metrics.snapshot() if self.metrics is not None else {}
 
     def __dict__(self):
         return {"engine": self.engine, "session": self.session}
@@ -13,7 +13,10 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy_utils import database_exists, create_database
 
 from crud_repository.db.idatabase import IDatabase
+from crud_repository.db.pooling import pool_options
+from crud_repository.db.schema import provisioning_mode
 from crud_repository.model.base import Base
+from crud_repository.my_logger.instrumentation import instrument
 from crud_repository.my_logger.logger import CustomLogger
 
 log = CustomLogger(__name__).get_logger("DEBUG")
@@ -37,15 +40,22 @@ class MySQLDatabase(IDatabase):
             host = kwargs.get("host", None)
             port = kwargs.get("port", None)
             url = kwargs.get("url", f"mysql+pymysql://{user}:{password}@{host}:{port}/{db_name}")
+            self.provisioning = provisioning_mode(kwargs)
             # Create the database if it doesn't exist
-            if not database_exists(url):
+            if self.provisioning == "eager" and not database_exists(url):
                 create_database(url)
             # Create the engine and session
-            self.engine = create_engine(url)
-            self.session = scoped_session(sessionmaker(bind=self.engine))
+            self.engine = create_engine(
+                url, echo=kwargs.get("echo", False), **pool_options(kwargs, url=url)
+            )
+            self.metrics = instrument(self.engine, kwargs)
+            self.session_factory = sessionmaker(bind=self.engine)
+            self.session = scoped_session(self.session_factory)
             # Create all tables for the specific database type
-            self.engine.echo = True
-            Base.metadata.create_all(self.engine)
+            if self.provisioning == "eager":
+                Base.metadata.create_all(self.engine)
+            elif self.provisioning == "cached":
+                self.provision()
         except OperationalError as e:
             log.debug(f"Error connecting to MySQL database: {e}")
             traceback.print_exc()
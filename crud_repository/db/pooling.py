@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides helpers for configuring and inspecting the connection pools of the databases.
+"""
+from typing import Any, Dict, Optional, Type, Union
+
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import NoSuchModuleError
+from sqlalchemy.pool import (
+    AssertionPool,
+    AsyncAdaptedQueuePool,
+    NullPool,
+    Pool,
+    QueuePool,
+    SingletonThreadPool,
+    StaticPool,
+)
+
+from crud_repository.my_logger.instrumentation import timed_pool_class
+from crud_repository.my_logger.logger import CustomLogger
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+
+# Pool classes selectable by name through the "pool_class" configuration key.
+POOL_CLASSES = {
+    "queue": QueuePool,
+    "null": NullPool,
+    "static": StaticPool,
+    "singleton_thread": SingletonThreadPool,
+    "assertion": AssertionPool,
+}
+# Configuration keys passed through to create_engine when present.
+POOL_OPTIONS = (
+    "pool_size",
+    "max_overflow",
+    "pool_timeout",
+    "pool_recycle",
+    "pool_pre_ping",
+    "pool_use_lifo",
+)
+# Options only understood by queue pools.
+QUEUE_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout", "pool_use_lifo")
+
+
+# ---------------------------------------------------------
+def pool_options(
+    config: Dict[str, Any],
+    is_async: bool = False,
+    url: Union[str, URL, None] = None,
+) -> Dict[str, Any]:
+    """
+    Extract the connection pool options for create_engine from a database configuration.
+
+    Recognized keys are "pool_class" (a Pool subclass or one of "queue", "null", "static",
+    "singleton_thread" and "assertion"), "pool_size", "max_overflow", "pool_timeout",
+    "pool_recycle", "pool_pre_ping" and "pool_use_lifo" (alias "pool_lifo"). Keys that
+    are absent keep SQLAlchemy's defaults; without a "pool_class", the dialect of the
+    url chooses it.
+
+    The pool class is passed as its timed_pool_class, so that EngineMetrics can time
+    the checkouts; without a "pool_class" or a url, SQLAlchemy creates an untimed pool.
+
+    :param config: (dict) The database configuration.
+    :param is_async: (bool) Whether the options are for create_async_engine.
+    :param url: (str | URL | None) The database URL given to create_engine.
+    :return: (dict) The keyword arguments for create_engine.
+    """
+    options = {key: config[key] for key in POOL_OPTIONS if config.get(key) is not None}
+    if config.get("pool_lifo") is not None and "pool_use_lifo" not in options:
+        options["pool_use_lifo"] = config["pool_lifo"]
+    pool_class: Union[str, Type[Pool], None] = config.get("pool_class", None)
+    if pool_class is None:
+        pool_class = default_pool_class(url, is_async) if url is not None else None
+        if pool_class is not None:
+            options["poolclass"] = timed_pool_class(pool_class)
+        return options
+    if isinstance(pool_class, str):
+        if pool_class.lower() not in POOL_CLASSES:
+            raise ValueError("Invalid pool class: %s" % pool_class)
+        pool_class = POOL_CLASSES[pool_class.lower()]
+    if is_async and pool_class is QueuePool:
+        pool_class = AsyncAdaptedQueuePool
+    if not issubclass(pool_class, QueuePool):
+        ignored = [key for key in QUEUE_POOL_OPTIONS if key in options]
+        if ignored:
+            log.warning(f"Ignoring {ignored} for pool class {pool_class.__name__}")
+        for key in ignored:
+            options.pop(key)
+    options["poolclass"] = timed_pool_class(pool_class)
+    return options
+
+
+def default_pool_class(
+    url: Union[str, URL], is_async: bool = False
+) -> Optional[Type[Pool]]:
+    """
+    Get the pool class create_engine would choose for a database URL.
+
+    :param url: (str | URL) The database URL.
+    :param is_async: (bool) Whether the URL is for create_async_engine.
+    :return: (Type[Pool] | None) The pool class of the dialect, or None if the dialect
+        cannot be loaded, leaving create_engine to report it.
+    """
+    url = make_url(url)
+    try:
+        dialect_class = url.get_dialect()
+    except NoSuchModuleError:
+        return None
+    if is_async:
+        dialect_class = dialect_class.get_async_dialect_cls(url)
+    return dialect_class.get_pool_class(url)
+
+
+# ---------------------------------------------------------
+def pool_status(pool: Pool) -> Dict[str, Any]:
+    """
+    Report the state of a connection pool.
+
+    Queue pools report their configured size, the connections checked out and
+    idle, the overflow connections currently open beyond the size and the
+    overflow limit. Other pools only report their class and status line.
+
+    :param pool: (Pool) The pool to inspect.
+    :return: (dict) The pool state.
+    """
+    status: Dict[str, Any] = {
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+    }
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        )
+    return status
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides read-replica routing for the databases.
+"""
+import itertools
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, List, Sequence
+
+# Replica selection policies selectable through the "replica_policy" configuration key.
+REPLICA_POLICIES = ("round_robin", "least_connections")
+# Seconds after a write during which reads in the same thread or task stay on the primary.
+DEFAULT_READ_YOUR_WRITES = 5.0
+
+
+# ---------------------------------------------------------
+def checked_out(database: Any) -> int:
+    """
+    Count the connections a database currently has checked out of its pool.
+    :param database: (IDatabase) The database.
+    :return: (int) The checked-out connections, 0 for pools that do not track them.
+    """
+    pool = database.engine.pool
+    return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+# ---------------------------------------------------------
+class ReplicaRouter:
+    """
+    Chooses the database a read goes to: one of the replicas, or the primary while a
+    read-your-writes window is open.
+
+    The window is tracked per thread and per asyncio task, like UnitOfWork, so a caller
+    sees its own writes while other callers keep reading from the replicas.
+
+    Attributes:
+        replicas (List[IDatabase]): The read replicas.
+        policy (str): "round_robin", or "least_connections" to pick the replica with the
+            fewest checked-out connections.
+        read_your_writes (float): The window in seconds after a write during which reads
+            go to the primary; 0 disables it.
+    """
+
+    def __init__(
+        self,
+        replicas: Sequence[Any],
+        policy: str = "round_robin",
+        read_your_writes: float = DEFAULT_READ_YOUR_WRITES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the ReplicaRouter.
+        :param replicas: (Sequence[IDatabase]) The read replicas.
+        :param policy: (str) One of REPLICA_POLICIES.
+        :param read_your_writes: (float) The read-your-writes window in seconds.
+        :param clock: (Callable) The monotonic clock, replaceable in tests.
+        """
+        if policy not in REPLICA_POLICIES:
+            raise ValueError("Invalid replica policy: %s" % policy)
+        self.replicas: List[Any] = list(replicas)
+        self.policy = policy
+        self.read_your_writes = read_your_writes
+        self._clock = clock
+        self._counter = itertools.count()
+        self._last_write: ContextVar[float] = ContextVar(
+            f"crud_repository_last_write_{id(self)}", default=float("-inf")
+        )
+
+    def mark_write(self) -> None:
+        """
+        Open the read-your-writes window for the current thread or task.
+        """
+        self._last_write.set(self._clock())
+
+    def in_write_window(self) -> bool:
+        """
+        :return: (bool) Whether the current thread or task wrote within the window.
+        """
+        return self._clock() - self._last_write.get() < self.read_your_writes
+
+    def route(self, primary: Any) -> Any:
+        """
+        Choose the database for a read.
+        :param primary: (IDatabase) The primary database.
+        :return: (IDatabase) The primary during the read-your-writes window or without
+            replicas, otherwise a replica chosen by the policy.
+        """
+        if not self.replicas or self.in_write_window():
+            return primary
+        start = next(self._counter) % len(self.replicas)
+        if self.policy == "least_connections":
+            # Rotate the starting point so that ties are spread round-robin
+            rotated = self.replicas[start:] + self.replicas[:start]
+            return min(rotated, key=checked_out)
+        return self.replicas[start]
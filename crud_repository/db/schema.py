@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides schema provisioning for the databases, backed by a schema fingerprint table.
+
+Each provisioned table has a fingerprint, the hash of its CREATE TABLE and CREATE INDEX
+statements for the dialect, stored in the crud_repository_schema table. An unchanged
+schema is then confirmed with a single SELECT, instead of the database_exists check and
+the per-table catalog queries of create_all.
+"""
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import (
+    Column,
+    Engine,
+    MetaData,
+    String,
+    Table,
+    delete,
+    insert,
+    inspect,
+    select,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from crud_repository.model.base import Base
+from crud_repository.my_logger.logger import CustomLogger
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+
+# Provisioning modes selectable through the "provisioning" configuration key:
+#   eager:  check the database exists and run create_all for every table at startup (default)
+#   cached: provision every table at startup through the fingerprint table
+#   lazy:   provision nothing at startup; each Repository provisions the tables of its model
+#   none:   never provision; the schema is managed elsewhere, e.g. by migrations
+PROVISIONING_MODES = ("eager", "cached", "lazy", "none")
+
+# The fingerprint table lives outside Base.metadata so it never reaches user schemas.
+schema_metadata = MetaData()
+schema_fingerprints = Table(
+    "crud_repository_schema",
+    schema_metadata,
+    Column("table_name", String(255), primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+)
+
+
+# ---------------------------------------------------------
+def provisioning_mode(config: Dict[str, Any]) -> str:
+    """
+    Read the provisioning mode from a database configuration.
+    :param config: (dict) The database configuration.
+    :return: (str) One of PROVISIONING_MODES, "eager" if absent.
+    """
+    mode = str(config.get("provisioning", None) or "eager").lower()
+    if mode not in PROVISIONING_MODES:
+        raise ValueError("Invalid provisioning mode: %s" % mode)
+    return mode
+
+
+# ---------------------------------------------------------
+def model_tables(*models: Any) -> List[Table]:
+    """
+    Collect the tables a set of models needs: their own tables, the tables of the models
+    their relationships load, and every table those reference through foreign keys.
+    :param models: (Any) Mapped model classes or Table objects.
+    :return: (List[Table]) The tables, each once.
+    """
+    pending: List[Table] = []
+    for model in models:
+        if isinstance(model, Table):
+            pending.append(model)
+            continue
+        mapper = inspect(model)
+        pending.extend(mapper.tables)
+        for relationship in mapper.relationships:
+            pending.extend(relationship.mapper.tables)
+    tables: Dict[str, Table] = {}
+    while pending:
+        table = pending.pop()
+        if table.fullname in tables:
+            continue
+        tables[table.fullname] = table
+        pending.extend(key.column.table for key in table.foreign_keys)
+    return list(tables.values())
+
+
+# ---------------------------------------------------------
+def fingerprint(table: Table, engine: Engine) -> str:
+    """
+    Hash the DDL of a table and its indexes as compiled for the engine's dialect.
+    :param table: (Table) The table.
+    :param engine: (Engine) The engine.
+    :return: (str) The hex SHA-256 digest.
+    """
+    ddl = [str(CreateTable(table).compile(dialect=engine.dialect))]
+    ddl.extend(
+        str(CreateIndex(index).compile(dialect=engine.dialect))
+        for index in sorted(table.indexes, key=lambda index: index.name or "")
+    )
+    return hashlib.sha256("\n".join(ddl).encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------
+class SchemaProvisioner:
+    """
+    Creates the tables of a database on demand, remembering what is already provisioned.
+
+    Tables provisioned in this process cost nothing; the others are checked against the
+    fingerprint table in one query, and only missing or changed ones go through create_all.
+    create_all creates missing tables but does not alter existing ones, so changes to
+    existing tables remain a job for migrations.
+
+    Attributes:
+        engine (Engine): The engine of the database.
+        metadata (MetaData): The metadata holding the tables, Base.metadata by default.
+        provisioned (Set[str]): The names of the tables known to be provisioned.
+    """
+
+    def __init__(self, engine: Engine, metadata: Optional[MetaData] = None):
+        """
+        Initialize the SchemaProvisioner.
+        :param engine: (Engine) The engine of the database.
+        :param metadata: (MetaData) The metadata holding the tables.
+        """
+        self.engine = engine
+        self.metadata = metadata if metadata is not None else Base.metadata
+        self.provisioned: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def provision(self, tables: Optional[Iterable[Table]] = None) -> List[str]:
+        """
+        Make sure tables exist, creating the database itself if needed.
+        :param tables: (Iterable[Table] | None) The tables, every table of the metadata by default.
+        :return: (List[str]) The names of the tables that were missing or changed.
+        """
+        if tables is None:
+            tables = self.metadata.sorted_tables
+        tables = [table for table in tables if table.fullname not in self.provisioned]
+        if not tables:
+            return []
+        with self._lock:
+            fingerprints = {
+                table.fullname: fingerprint(table, self.engine) for table in tables
+            }
+            stored = self._stored_fingerprints(list(fingerprints))
+            stale = [
+                table
+                for table in tables
+                if stored.get(table.fullname) != fingerprints[table.fullname]
+            ]
+            if stale:
+                names = [table.fullname for table in stale]
+                log.debug(f"Provisioning tables: {names}")
+                with self.engine.begin() as conn:
+                    schema_metadata.create_all(conn)
+                    self.metadata.create_all(conn, tables=stale)
+                    conn.execute(
+                        delete(schema_fingerprints).where(
+                            schema_fingerprints.c.table_name.in_(names)
+                        )
+                    )
+                    conn.execute(
+                        insert(schema_fingerprints),
+                        [
+                            {"table_name": name, "fingerprint": fingerprints[name]}
+                            for name in names
+                        ],
+                    )
+            self.provisioned.update(fingerprints)
+            return [table.fullname for table in stale]
+
+    def _stored_fingerprints(self, names: List[str]) -> Dict[str, str]:
+        """
+        Read the stored fingerprints of tables in one query. If the query fails, the
+        fingerprint table or the database itself is missing; the database is created if
+        needed and no fingerprint is returned.
+        """
+        stmt = select(
+            schema_fingerprints.c.table_name, schema_fingerprints.c.fingerprint
+        ).where(schema_fingerprints.c.table_name.in_(names))
+        try:
+            with self.engine.connect() as conn:
+                return {name: value for name, value in conn.execute(stmt)}
+        except DBAPIError as e:
+            log.debug(f"No schema fingerprints available: {e}")
+        # sqlalchemy_utils is imported here, not at module level, as importing it pulls in
+        # every dialect and driver it supports
+        from sqlalchemy_utils import create_database, database_exists
+
+        url = self.engine.url
+        if url.get_backend_name() != "sqlite" and not database_exists(url):
+            create_database(url)
+        return {}
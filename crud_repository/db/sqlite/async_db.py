@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides an asynchronous SQLite implementation of the Database using aiosqlite.
+"""
+import traceback
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from crud_repository.db.iasyncdatabase import IAsyncDatabase
+from crud_repository.db.pooling import pool_options
+from crud_repository.my_logger.instrumentation import instrument
+from crud_repository.my_logger.logger import CustomLogger
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+
+
+# ---------------------------------------------------------
+class AsyncSQLiteDatabase(IAsyncDatabase):
+    """
+    This class provides an asynchronous SQLite implementation of the Database.
+
+    Attributes:
+        engine (AsyncEngine): The SQLAlchemy async engine for the SQLite database.
+        session_factory (async_sessionmaker): The session factory bound to the engine.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Initialize the AsyncSQLiteDatabase.
+        :param kwargs: (dict) The keyword arguments for the SQLite database. `db_name` is the
+            path of the database file; omit it or use ":memory:" for an in-memory database.
+        """
+        try:
+            db_name = kwargs.get("db_name", None) or ":memory:"
+            url = kwargs.get("url", f"sqlite+aiosqlite:///{db_name}")
+            # Create the engine and session factory; tables are created on first use
+            self.engine = create_async_engine(
+                url,
+                echo=kwargs.get("echo", False),
+                **pool_options(kwargs, is_async=True, url=url),
+            )
+            self.metrics = instrument(self.engine, kwargs)
+            self.session_factory = async_sessionmaker(
+                self.engine, expire_on_commit=False
+            )
+        except Exception as e:
+            log.debug(f"Error initializing async SQLite database: {e}")
+            traceback.print_exc()
+            raise e
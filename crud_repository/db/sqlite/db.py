@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides an embedded SQLite implementation of the Database, tuned for throughput.
+"""
+import sqlite3
+import traceback
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from crud_repository.db.idatabase import IDatabase
+from crud_repository.db.pooling import pool_options
+from crud_repository.db.schema import provisioning_mode
+from crud_repository.model.base import Base
+from crud_repository.my_logger.instrumentation import instrument
+from crud_repository.my_logger.logger import CustomLogger
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+
+# Pragmas applied to every new connection of a file-backed database.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,  # 256 MiB
+    "cache_size": -65536,  # 64 MiB, negative values are in KiB
+    "busy_timeout": 5000,  # milliseconds
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+
+# ---------------------------------------------------------
+class SQLiteDatabase(IDatabase):
+    """
+    This class provides an embedded SQLite implementation of the Database.
+
+    File-backed databases use WAL journaling with synchronous=NORMAL, a memory map,
+    a larger page cache and a busy timeout, all set through connect-event pragmas.
+    In-memory databases use a named shared-cache database, so every pooled
+    connection sees the same data for the lifetime of the instance.
+
+    Attributes:
+        engine (Engine): The SQLAlchemy engine for the SQLite database.
+        session (Session): The SQLAlchemy session for the SQLite database.
+        pragmas (dict): The pragmas applied to every new connection.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Initialize the SQLiteDatabase.
+        :param kwargs: (dict) The keyword arguments for the SQLite database:
+            db_name: the path of the database file, or the name of the shared in-memory
+                database when `memory` is True. ":memory:" or no name selects memory mode.
+            memory: whether to use a shared in-memory database.
+            pragmas: pragmas overriding DEFAULT_PRAGMAS; a None value removes one.
+            provisioning: the schema provisioning mode, see crud_repository.db.schema.
+        """
+        try:
+            db_name = kwargs.get("db_name", None) or ":memory:"
+            memory = bool(kwargs.get("memory", False)) or db_name == ":memory:"
+            if memory:
+                name = "crud_repository" if db_name == ":memory:" else db_name
+                uri = f"file:{name}?mode=memory&cache=shared"
+                url = kwargs.get("url", f"sqlite+pysqlite:///{uri}&uri=true")
+                # The shared database lives as long as one connection is open
+                self._anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            else:
+                url = kwargs.get("url", f"sqlite+pysqlite:///{db_name}")
+                self._anchor = None
+            self.pragmas = dict(DEFAULT_PRAGMAS)
+            if memory:
+                # WAL and memory mapping do not apply to in-memory databases
+                for name in ("journal_mode", "mmap_size"):
+                    self.pragmas.pop(name)
+            self.pragmas.update(kwargs.get("pragmas", None) or {})
+            self.pragmas = {k: v for k, v in self.pragmas.items() if v is not None}
+            self.provisioning = provisioning_mode(kwargs)
+
+            # Create the engine and session
+            self.engine = create_engine(
+                url, echo=kwargs.get("echo", False), **pool_options(kwargs, url=url)
+            )
+            self.metrics = instrument(self.engine, kwargs)
+            event.listen(self.engine, "connect", self._on_connect)
+            event.listen(self.engine, "begin", self._on_begin)
+            self.session_factory = sessionmaker(bind=self.engine)
+            self.session = scoped_session(self.session_factory)
+            # Create all tables for the specific database type
+            if self.provisioning == "eager":
+                Base.metadata.create_all(self.engine)
+            elif self.provisioning == "cached":
+                self.provision()
+        except OperationalError as e:
+            log.debug(f"Error connecting to SQLite database: {e}")
+            traceback.print_exc()
+            raise e
+        except Exception as e:
+            log.debug(f"Error initializing SQLite database: {e}")
+            traceback.print_exc()
+            raise e
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        """
+        Apply the pragmas to a new DBAPI connection, and hand transaction control to
+        SQLAlchemy so that SAVEPOINT and nested units of work behave as documented.
+        """
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _on_begin(connection) -> None:
+        """
+        Emit BEGIN explicitly, since pysqlite no longer does it with isolation_level None.
+        """
+        connection.exec_driver_sql("BEGIN")
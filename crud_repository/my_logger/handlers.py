@@ -2,13 +2,20 @@
 This module contains custom logging handlers.
 """
 
+import fnmatch
+import gzip
+import json
 import logging.handlers
 import os
+import queue
+import re
+import shutil
+import threading
 import traceback
 import sys
 import time
 from logging import StreamHandler, DEBUG, Formatter
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from crud_repository.my_logger.formatters import CustomFormatter
 
@@ -41,13 +48,28 @@ class CustomStreamHandler(StreamHandler):
 class CustomTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
     """
     This class is a custom timed rotating file handler for logging.
+
+    The file rolls over at the end of each interval and, with `max_bytes`, once it
+    reaches that size. Rolling over only renames the file; compressing the rotated file
+    with gzip and pruning old files happen on a background thread, so a rollover never
+    stalls the thread that logs.
+
+    Old files are found by name: the files of the log directory matching `prune_pattern`
+    are indexed once, in natural name order, which is chronological for the timestamped
+    file names used here, and the handler appends its own rotated files to the index.
+    All but the newest `backup_count` of them are deleted.
     """
 
     def __init__(self, **kwargs):
         """
         Initialize the CustomTimedRotatingFileHandler.
 
-        All parameters are now taken from **kwargs.
+        All parameters are now taken from **kwargs; besides those of
+        TimedRotatingFileHandler in snake case:
+        max_bytes: The size in bytes at which the file rolls over, 0 to rotate on time only.
+        compress: Whether to gzip the rotated files.
+        prune_pattern: The glob matching the names of the old files to prune, the rotated
+            files of this handler by default.
         """
 
         # Extract arguments using kwargs.get()
@@ -64,6 +86,14 @@ class CustomTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
         at_time = kwargs.get("at_time", None)
         level = kwargs.get("level", logging.WARN)
         formatter = kwargs.get("formatter", None)
+        self.max_bytes = int(kwargs.get("max_bytes", 0) or 0)
+        self.compress = bool(kwargs.get("compress", False))
+        self.prune_pattern = kwargs.get("prune_pattern", None)
+        # The old files, oldest first, owned by the maintenance thread
+        self._index: List[str] = []
+        self._jobs: "queue.SimpleQueue[Optional[tuple]]" = queue.SimpleQueue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
 
         try:
             super().__init__(
@@ -78,6 +108,8 @@ class CustomTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
             )
             super().setFormatter(formatter)
             self.setLevel(level)
+            if self.prune_pattern is None:
+                self.prune_pattern = os.path.basename(self.baseFilename) + ".*"
             self.cleanup_old_logs()
         except IOError as e:
             print(f"IOError: {e}")
@@ -86,42 +118,61 @@ class CustomTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
             print(f"ValueError: {e}")
             traceback.print_exc()
 
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """
+        Roll over at the end of the interval, or once the file has reached max_bytes.
+        The size is checked before the record is written, so the file may exceed
+        max_bytes by one record, or by one batch behind a BatchingQueueListener.
+        :param record: The record about to be written.
+        :return: Whether to roll over first.
+        """
+        if super().shouldRollover(record):
+            return True
+        if self.max_bytes > 0 and self.stream is not None:
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self) -> None:
+        """
+        Rename the file and reopen it, leaving compression and pruning to the
+        maintenance thread. A size rollover keeps the time of the next time rollover.
+        """
+        rollover_at = self.rolloverAt
+        size_only = int(time.time()) < rollover_at
+        super().doRollover()
+        if size_only:
+            self.rolloverAt = rollover_at
+
+    def rotation_filename(self, default_name: str) -> str:
+        """
+        Name a rotated file after the interval it belongs to, numbering the files of
+        size rollovers within the same interval.
+        :param default_name: The name of the file with the interval suffix.
+        :return: The first such name not taken by a rotated file, compressed or not.
+        """
+        name = super().rotation_filename(default_name)
+        candidate, number = name, 0
+        while os.path.exists(candidate) or os.path.exists(candidate + ".gz"):
+            number += 1
+            candidate = f"{name}.{number}"
+        return candidate
+
+    def rotate(self, source: str, dest: str) -> None:
+        """
+        Rename the file, then queue its compression and the pruning of old files.
+        :param source: The file being rotated.
+        :param dest: The name of the rotated file.
+        """
+        super().rotate(source, dest)
+        self._submit(self._rotated, dest)
+
     def getFilesToDelete(self):
         """
         Get the list of files to delete
-        :return: list of files to delete
+        :return: list of files to delete; always empty, as pruning happens on the
+            maintenance thread, see _prune.
         """
-        try:
-            log_dir = os.getenv("LOG_DIR")
-            # get the files in the log directory
-            file_names = os.listdir(log_dir)
-            # sort the array based on file creation time
-            file_names.sort(key=lambda x: os.path.getmtime(os.path.join(log_dir, x)))
-            # rebuild the file paths
-            file_names = [
-                os.path.join(str(log_dir), str(file_name)) for file_name in file_names
-            ]
-
-            # Calculate the number of files to delete based on the backup count
-            num_files_to_delete = max(0, len(file_names) - self.backupCount)
-
-            # Get the files to delete
-            files_to_delete = file_names[:num_files_to_delete]
-
-            #     print(f"""
-            # Logging Dir: {log_dir}
-            # Base file name: {base_file_name}
-            # Backup count: {self.backup_count}
-            # Log Files: {file_names}
-            # Log Files Exceeded Limit: {num_files_to_delete}
-            # Sorted Files: {file_names}
-            # Files to delete: {files_to_delete}
-            #                 """)
-            return files_to_delete
-        except Exception as e:
-            print(f"Error getting files to delete: {e}")
-            traceback.print_exc()
-            return []
+        return []
 
     def emit(self, record: logging.LogRecord) -> None:
         """
@@ -131,6 +182,118 @@ class CustomTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
         """
         logging.handlers.TimedRotatingFileHandler.emit(self, record)
 
+    def close(self) -> None:
+        """
+        Close the handler, waiting for pending compression and pruning.
+        """
+        self.join_maintenance()
+        super().close()
+
+    def cleanup_old_logs(self):
+        """Index the old log files and prune them, on the maintenance thread."""
+        self._submit(self._scan)
+        self._submit(self._prune)
+
+    def join_maintenance(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for the pending compression and pruning, stopping the maintenance thread.
+        :param timeout: How long to wait, in seconds; None waits until done.
+        """
+        with self._worker_lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._jobs.put(None)
+            worker.join(timeout)
+
+    def _submit(self, job, *args) -> None:
+        """
+        Queue a job for the maintenance thread, starting the thread if needed.
+        """
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._maintain,
+                    args=(self._jobs,),
+                    name="crud_repository-log-maintenance",
+                    daemon=True,
+                )
+                self._worker.start()
+            self._jobs.put((job, args))
+
+    @staticmethod
+    def _maintain(jobs: "queue.SimpleQueue[Optional[tuple]]") -> None:
+        """
+        Run queued jobs until the stop sentinel.
+        """
+        while True:
+            item = jobs.get()
+            if item is None:
+                return
+            job, args = item
+            try:
+                job(*args)
+            except Exception as e:
+                print(f"Error maintaining log files: {e}")
+                traceback.print_exc()
+
+    @staticmethod
+    def _natural_key(path: str) -> List[Any]:
+        """
+        Sort key comparing the digit runs of a file name as numbers, so that ".10"
+        comes after ".9" and timestamped names sort chronologically.
+        """
+        return [
+            int(part) if part.isdigit() else part
+            for part in re.split(r"(\d+)", os.path.basename(path))
+        ]
+
+    def _scan(self) -> None:
+        """
+        Index the old files of the log directory by name; only names are read.
+        """
+        log_dir = os.path.dirname(self.baseFilename)
+        with os.scandir(log_dir) as entries:
+            paths = [
+                entry.path
+                for entry in entries
+                if fnmatch.fnmatch(entry.name, self.prune_pattern)
+                and entry.path != self.baseFilename
+                and entry.is_file()
+            ]
+        self._index = sorted(paths, key=self._natural_key)
+
+    def _rotated(self, path: str) -> None:
+        """
+        Compress a rotated file if configured, add it to the index and prune.
+        """
+        if path in self._index:
+            # Renamed before the startup scan ran, which indexed it already
+            self._index.remove(path)
+        if self.compress:
+            with open(path, "rb") as source, gzip.open(path + ".gz", "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(path)
+            path += ".gz"
+        self._index.append(path)
+        self._prune()
+
+    def _files_to_prune(self) -> List[str]:
+        """
+        Get the indexed files beyond the backup count, oldest first.
+        :return: The files to delete.
+        """
+        if self.backupCount <= 0:
+            return []
+        return self._index[: self._limit(self._index)]
+
+    def _prune(self) -> None:
+        """
+        Delete the old files beyond the backup count.
+        """
+        files_to_delete = self._files_to_prune()
+        self._delete_files(files_to_delete)
+        del self._index[: len(files_to_delete)]
+
     @classmethod
     def _delete_files(cls, files_to_delete):
         """
@@ -138,19 +301,12 @@ class CustomTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
         :param files_to_delete:
         :return:
         """
-        # Delete files
+        # Delete files; one already gone was pruned by another process
         for file in files_to_delete:
-            if os.path.exists(file):
-                print(f"Deleting file: {file}")
+            try:
                 os.remove(file)
-            else:
-                print(f"File not found: {file}")
-
-    def cleanup_old_logs(self):
-        """Override the doRollover method to delete old log files."""
-        # Now clean up old files
-        files_to_delete = self.getFilesToDelete()
-        self._delete_files(files_to_delete)
+            except FileNotFoundError:
+                pass
 
     def _limit(self, x):
         """
@@ -161,4 +317,234 @@ class CustomTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
         return max(0, len(x) - self.backupCount)
 
 
+# ------------------------------------------------------------------------
+class SlowQueryHandler(StreamHandler):
+    """
+    This class writes slow query records as JSON lines, to a file or a stream.
+    """
+
+    def __init__(
+        self,
+        filename: Optional[str] = None,
+        stream=None,
+        level: int = logging.WARNING,
+    ):
+        """
+        Initialize the SlowQueryHandler.
+        :param filename: The file to append the records to; its directory is created if needed.
+        :param stream: The stream to write to when no filename is given, stderr by default.
+        :param level: The level of the handler.
+        """
+        self.filename = filename
+        if filename is not None:
+            directory = os.path.dirname(filename)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            stream = open(filename, "a", encoding="utf-8")
+        super().__init__(stream=stream if stream is not None else sys.stderr)
+        self.setLevel(level)
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record as one JSON object: the structured slow query fields, or the
+        message for other records, with the time and level.
+        :param record: The record to be formatted.
+        :return: The JSON line.
+        """
+        payload = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)),
+            "level": record.levelname,
+        }
+        payload.update(
+            getattr(record, "slow_query", None) or {"message": record.getMessage()}
+        )
+        return json.dumps(payload, default=str)
+
+    def close(self) -> None:
+        """
+        Close the handler, and the file if the handler opened it.
+        """
+        try:
+            if self.filename is not None and self.stream is not None:
+                self.stream.close()
+        finally:
+            super().close()
+
+
+# ------------------------------------------------------------------------
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    This class is a queue handler with a bounded queue, which never lets a full queue
+    raise into the logging call.
+
+    With the "drop" policy a record that does not fit is dropped at once; with the
+    "block" policy the caller waits up to `timeout` seconds (None waits forever) for
+    room before the record is dropped. Dropped records are counted.
+    """
+
+    POLICIES = ("drop", "block")
+
+    def __init__(
+        self,
+        log_queue: Optional[queue.Queue] = None,
+        max_size: int = 10000,
+        policy: str = "drop",
+        timeout: Optional[float] = 1.0,
+    ):
+        """
+        Initialize the BoundedQueueHandler.
+        :param log_queue: The queue to put records on, a new Queue of max_size by default.
+        :param max_size: The capacity of the new queue.
+        :param policy: "drop" or "block".
+        :param timeout: How long the "block" policy waits for room, in seconds.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError("Invalid queue policy: %s" % policy)
+        super().__init__(log_queue if log_queue is not None else queue.Queue(max_size))
+        self.policy = policy
+        self.timeout = timeout
+        self.enqueued = 0
+        self.dropped = 0
+        self._counter_lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Put a record on the queue according to the policy, counting it as dropped if it does not fit.
+        :param record: The prepared record.
+        """
+        try:
+            if self.policy == "block":
+                self.queue.put(record, timeout=self.timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return
+        with self._counter_lock:
+            self.enqueued += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report the queue counters.
+        :return: The records enqueued and dropped, the records waiting and the queue capacity.
+        """
+        return {
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "policy": self.policy,
+        }
+
+
+# ------------------------------------------------------------------------
+class BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    This class is a queue listener that drains up to `batch_size` waiting records at a
+    time and hands them to each stream handler as a single write and flush.
+
+    Rotating file handlers still get their rollover check for every record, and other
+    handlers receive the records one by one.
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers, batch_size: int = 256):
+        """
+        Initialize the BatchingQueueListener.
+        :param log_queue: The queue to drain.
+        :param handlers: The handlers that write the records.
+        :param batch_size: The maximum number of records written at once.
+        """
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = max(1, batch_size)
+
+    def enqueue_sentinel(self) -> None:
+        """
+        Wait for room for the stop sentinel, since the bounded queue may be full.
+        """
+        self.queue.put(self._sentinel)
+
+    def _monitor(self) -> None:
+        """
+        Drain the queue in batches until the sentinel is read.
+        """
+        log_queue = self.queue
+        has_task_done = hasattr(log_queue, "task_done")
+        stopping = False
+        while not stopping:
+            batch: List[logging.LogRecord] = []
+            record = self.dequeue(True)
+            while True:
+                if record is self._sentinel:
+                    stopping = True
+                else:
+                    batch.append(record)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self.dequeue(False)
+                except queue.Empty:
+                    break
+            if batch:
+                self.handle_batch(batch)
+            if has_task_done:
+                for _ in range(len(batch) + stopping):
+                    log_queue.task_done()
+
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        """
+        Write a batch of records to every handler.
+        :param records: The records, in the order they were logged.
+        """
+        records = [self.prepare(record) for record in records]
+        for handler in self.handlers:
+            accepted = [
+                record
+                for record in records
+                if record.levelno >= handler.level and handler.filter(record)
+            ]
+            if not accepted:
+                continue
+            if isinstance(handler, StreamHandler):
+                self._write_batch(handler, accepted)
+            else:
+                for record in accepted:
+                    handler.handle(record)
+
+    @staticmethod
+    def _write_batch(handler: StreamHandler, records: List[logging.LogRecord]) -> None:
+        """
+        Format records and write them to a stream handler in one write, rolling over
+        a rotating file handler between records where it asks to.
+        """
+        rotating = isinstance(handler, logging.handlers.BaseRotatingHandler)
+        chunk: List[str] = []
+
+        def write() -> None:
+            if not chunk:
+                return
+            if handler.stream is None:
+                handler.stream = handler._open()
+            handler.stream.write("".join(chunk))
+            handler.flush()
+            chunk.clear()
+
+        handler.acquire()
+        try:
+            for record in records:
+                try:
+                    if rotating and handler.shouldRollover(record):
+                        write()
+                        handler.doRollover()
+                    chunk.append(handler.format(record) + handler.terminator)
+                except Exception:
+                    handler.handleError(record)
+            try:
+                write()
+            except Exception:
+                handler.handleError(records[-1])
+        finally:
+            handler.release()
+
+
 # ------------------------------------------------------------------------
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides in-process metrics for SQLAlchemy engines, collected through engine and pool events.
+
+Statement latency is measured between the before_cursor_execute and after_cursor_execute
+events, and pool wait time around the checkout of a connection from the pool, so a slow
+request can be attributed either to the server or to pool contention. Pools have no event
+before a checkout, so the wait is timed by the pool classes of timed_pool_class, which
+the databases pass to create_engine as their poolclass.
+"""
+import bisect
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type
+
+from sqlalchemy import Engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+
+from crud_repository.my_logger.monitor import CommandEvent, CommandLogger
+from crud_repository.my_logger.slow_query import SlowQueryDetector, detect_slow_queries
+
+# Upper bounds of the histogram buckets, in milliseconds.
+DEFAULT_BUCKETS = (
+    0.1,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    25.0,
+    50.0,
+    100.0,
+    250.0,
+    500.0,
+    1000.0,
+    2500.0,
+    5000.0,
+    10000.0,
+)
+
+# The execution context attribute holding the start time of a statement.
+_STARTED = "_crud_repository_started"
+
+# A checkout observer, called with the wait in milliseconds and whether it timed out.
+CheckoutObserver = Callable[[float, bool], None]
+
+
+# ---------------------------------------------------------
+class Counter:
+    """
+    A thread-safe, monotonically increasing counter.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        """
+        Increment the counter.
+        :param amount: (int) The amount to add.
+        """
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        """
+        :return: (int) The current value.
+        """
+        return self._value
+
+    def reset(self) -> None:
+        """
+        Set the counter back to zero.
+        """
+        with self._lock:
+            self._value = 0
+
+
+# ---------------------------------------------------------
+class Histogram:
+    """
+    A thread-safe histogram with fixed bucket bounds, tracking count, sum, min and max.
+
+    Percentiles are estimated as the upper bound of the bucket they fall in, capped by the
+    largest observed value.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the Histogram.
+        :param buckets: (Sequence[float]) The ascending upper bounds of the buckets; an
+            overflow bucket is added for larger values.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def observe(self, value: float) -> None:
+        """
+        Record a value.
+        :param value: (float) The observed value.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            self._min = value if self._min is None else min(self._min, value)
+            self._max = value if self._max is None else max(self._max, value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Estimate a percentile of the observed values.
+        :param q: (float) The percentile, between 0 and 100.
+        :return: (float | None) The estimate, or None if nothing was observed.
+        """
+        with self._lock:
+            return self._percentile(q)
+
+    def _percentile(self, q: float) -> Optional[float]:
+        if not self._count:
+            return None
+        rank = q / 100.0 * self._count
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if count and cumulative >= rank:
+                if index < len(self.buckets):
+                    return min(self.buckets[index], self._max)
+                return self._max
+        return self._max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Export the state of the histogram.
+        :return: (dict) The count, sum, min, max, mean, p50, p95 and p99, and the
+            cumulative count of each bucket keyed by its upper bound.
+        """
+        with self._lock:
+            cumulative = list(itertools.accumulate(self._counts))
+            return {
+                "count": self._count,
+                "sum": self._sum,
+                "min": self._min,
+                "max": self._max,
+                "mean": self._sum / self._count if self._count else None,
+                "p50": self._percentile(50),
+                "p95": self._percentile(95),
+                "p99": self._percentile(99),
+                "buckets": {
+                    **dict(zip(self.buckets, cumulative)),
+                    "inf": cumulative[-1],
+                },
+            }
+
+    def reset(self) -> None:
+        """
+        Drop every observation.
+        """
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._min: Optional[float] = None
+            self._max: Optional[float] = None
+
+
+# ---------------------------------------------------------
+class TimedCheckout:
+    """
+    A Pool mixin timing how long each checkout waits for a connection, including opening
+    a new one, and reporting it to the checkout observers of the pool.
+
+    The observers are handed on by recreate(), so they survive Engine.dispose().
+    """
+
+    _checkout_observers: List[CheckoutObserver]
+
+    def add_checkout_observer(self, observer: CheckoutObserver) -> None:
+        """
+        Report the checkouts of this pool and of the pools that replace it.
+        :param observer: (CheckoutObserver) Called with the wait in milliseconds and
+            whether the checkout timed out; added once however often it is given.
+        """
+        observers = self.__dict__.setdefault("_checkout_observers", [])
+        if observer not in observers:
+            observers.append(observer)
+
+    def recreate(self) -> Pool:
+        pool = super().recreate()
+        pool._checkout_observers = self.__dict__.get("_checkout_observers", [])
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = (time.perf_counter() - started) * 1000.0
+            for observer in self.__dict__.get("_checkout_observers", ()):
+                observer(waited, timed_out)
+
+
+_timed_pool_classes: Dict[Type[Pool], Type[Pool]] = {}
+_timed_pool_classes_lock = threading.Lock()
+
+
+def timed_pool_class(pool_class: Type[Pool]) -> Type[Pool]:
+    """
+    Get the TimedCheckout subclass of a pool class. It keeps the name of the pool class.
+
+    :param pool_class: (Type[Pool]) The pool class.
+    :return: (Type[Pool]) The timed pool class; pool_class itself if it is timed already.
+    """
+    if issubclass(pool_class, TimedCheckout):
+        return pool_class
+    with _timed_pool_classes_lock:
+        timed = _timed_pool_classes.get(pool_class)
+        if timed is None:
+            timed = type(pool_class.__name__, (TimedCheckout, pool_class), {})
+            timed.__module__ = __name__
+            _timed_pool_classes[pool_class] = timed
+        return timed
+
+
+# ---------------------------------------------------------
+class EngineMetrics:
+    """
+    Statement, pool and connection metrics of one SQLAlchemy engine.
+
+    Attributes:
+        statements (Counter): Statements executed, including failed ones.
+        errors (Counter): Statements that raised an error.
+        statement_ms (Histogram): Statement execution time, in milliseconds.
+        pool_wait_ms (Histogram): Time spent getting a connection from the pool, in
+            milliseconds, including opening a new connection when the pool has to; only
+            recorded for pools of a timed_pool_class.
+        pool_timeouts (Counter): Checkouts that gave up waiting for the pool.
+        checkouts (Counter): Connections checked out of the pool.
+        checkins (Counter): Connections returned to the pool.
+        connections_opened (Counter): New DBAPI connections opened by the pool.
+        connections_closed (Counter): DBAPI connections closed by the pool.
+        connections_invalidated (Counter): DBAPI connections invalidated after an error.
+        command_logger: An object with started/succeeded/failed hooks, such as
+            CommandLogger, called with a CommandEvent for each statement; or None.
+        slow_queries (Optional[SlowQueryDetector]): The slow query detector of the
+            engine, if one is configured.
+    """
+
+    def __init__(self, command_logger: Any = None):
+        """
+        Initialize the EngineMetrics.
+        :param command_logger: (Any) An object with started/succeeded/failed hooks, or None.
+        """
+        self.statements = Counter()
+        self.errors = Counter()
+        self.statement_ms = Histogram()
+        self.pool_wait_ms = Histogram()
+        self.pool_timeouts = Counter()
+        self.checkouts = Counter()
+        self.checkins = Counter()
+        self.connections_opened = Counter()
+        self.connections_closed = Counter()
+        self.connections_invalidated = Counter()
+        self.command_logger = command_logger
+        self.slow_queries: Optional[SlowQueryDetector] = None
+        self.connection_id = ""
+        self._request_ids = itertools.count(1)
+
+    def attach(self, engine: Engine) -> "EngineMetrics":
+        """
+        Listen to the statement and pool events of an engine.
+        :param engine: (Engine) The engine; the sync_engine of an AsyncEngine is used.
+        :return: (EngineMetrics) This instance.
+        """
+        engine = getattr(engine, "sync_engine", engine)
+        self.connection_id = engine.url.render_as_string(hide_password=True)
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "close_detached", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        if isinstance(engine.pool, TimedCheckout):
+            engine.pool.add_checkout_observer(self._observe_checkout)
+        return self
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Export the metrics.
+        :return: (dict) The statement counts and latency, the pool wait time and
+            timeouts, and the connection checkout and churn counts.
+        """
+        return {
+            "statements": self.statements.value,
+            "errors": self.errors.value,
+            "slow_statements": self.slow_queries.count if self.slow_queries else 0,
+            "statement_ms": self.statement_ms.snapshot(),
+            "pool_wait_ms": self.pool_wait_ms.snapshot(),
+            "pool_timeouts": self.pool_timeouts.value,
+            "connections": {
+                "checkouts": self.checkouts.value,
+                "checkins": self.checkins.value,
+                "opened": self.connections_opened.value,
+                "closed": self.connections_closed.value,
+                "invalidated": self.connections_invalidated.value,
+            },
+        }
+
+    def reset(self) -> None:
+        """
+        Set every counter and histogram back to zero.
+        """
+        for metric in vars(self).values():
+            if isinstance(metric, (Counter, Histogram)):
+                metric.reset()
+
+    def _observe_checkout(self, waited: float, timed_out: bool) -> None:
+        self.pool_wait_ms.observe(waited)
+        if timed_out:
+            self.pool_timeouts.inc()
+
+    def _event(self, statement: str, request_id: int, duration: Optional[float] = None):
+        words = statement.split(None, 1) if statement else None
+        return CommandEvent(
+            command_name=words[0].upper() if words else "",
+            request_id=request_id,
+            connection_id=self.connection_id,
+            duration_micros=int(duration * 1e6) if duration is not None else None,
+        )
+
+    def _before_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        request_id = next(self._request_ids)
+        if context is not None:
+            setattr(context, _STARTED, (time.perf_counter(), request_id))
+        if self.command_logger is not None:
+            self.command_logger.started(self._event(statement, request_id))
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.inc()
+        started = getattr(context, _STARTED, None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started[0]
+        self.statement_ms.observe(duration * 1000.0)
+        if self.command_logger is not None:
+            self.command_logger.succeeded(self._event(statement, started[1], duration))
+
+    def _handle_error(self, exception_context) -> None:
+        started = getattr(exception_context.execution_context, _STARTED, None)
+        if started is None:
+            return
+        self.statements.inc()
+        self.errors.inc()
+        duration = time.perf_counter() - started[0]
+        self.statement_ms.observe(duration * 1000.0)
+        if self.command_logger is not None:
+            statement = exception_context.statement
+            self.command_logger.failed(self._event(statement, started[1], duration))
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts.inc()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.checkins.inc()
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connections_opened.inc()
+
+    def _on_close(self, dbapi_connection, *args):
+        self.connections_closed.inc()
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.connections_invalidated.inc()
+
+
+# ---------------------------------------------------------
+def instrument(
+    engine: Engine, config: Optional[Dict[str, Any]] = None
+) -> EngineMetrics:
+    """
+    Attach EngineMetrics to an engine according to a database configuration.
+
+    Recognized keys are "instrument" (default True; False returns metrics that are not
+    attached and stay empty) and "log_commands" (default False; True sends a CommandEvent
+    per statement to CommandLogger, or to the given object with the same hooks), as well
+    as the "slow_query_*" keys of detect_slow_queries.
+
+    :param engine: (Engine) The engine, or an AsyncEngine.
+    :param config: (dict) The database configuration.
+    :return: (EngineMetrics) The metrics of the engine.
+    """
+    config = config or {}
+    command_logger = config.get("log_commands", None) or None
+    if command_logger is True:
+        command_logger = CommandLogger
+    metrics = EngineMetrics(command_logger=command_logger)
+    if config.get("instrument", True):
+        metrics.attach(engine)
+    metrics.slow_queries = detect_slow_queries(engine, config)
+    return metrics
@@ -2,17 +2,37 @@
 This module contains the CustomLogger class which is used for custom logging.
 """
 
+import atexit
 import logging
 import logging.config
+import os
 import sys
+import threading
+from typing import Any, Dict, Optional, Set
 
-from crud_repository.__config__ import log_config
+from crud_repository import __config__
+from crud_repository.my_logger.handlers import (
+    BatchingQueueListener,
+    BoundedQueueHandler,
+)
+
+# The logger, queue handler and listener installed by enable_queue_logging.
+_queue_logging: Optional[tuple] = None
+# The logging configuration applied to this process, and the lock guarding it.
+_applied_config: Optional[Dict[str, Any]] = None
+_config_lock = threading.Lock()
+# The names of the loggers handed out by CustomLogger, kept enabled by configure_logging.
+_custom_loggers: Set[str] = set()
 
 
 # ---------------------------------------------------------
 class CustomLogger(logging.Logger):
     """
     This class is used for custom logging.
+
+    The logging configuration is applied once per process, when a logger handed out
+    by get_logger emits its first record, or by configure_logging. Creating loggers at
+    import therefore neither resolves the settings nor opens the log file.
     """
 
     def __init__(self, name, level=logging.INFO, config=None):
@@ -21,27 +41,13 @@ class CustomLogger(logging.Logger):
 
         :param name: The name of the logger.
         :param level: The logging level.
-        :param config: The configuration for the logger.
+        :param config: The configuration for the logger; a configuration other than the
+            one already applied is applied in its place, right away.
         """
         super().__init__(name, level)
         self.name = name
-        if config is None:
-            config = log_config
-        try:
-            # check for and create log directory defined in config
-            if "handlers" in config:
-                for file_handler in config["handlers"]:
-                    if "filename" in config["handlers"][file_handler]:
-                        log_dir = config["handlers"][file_handler]["filename"]
-                        log_dir = log_dir[: log_dir.rfind("/")]
-                        if log_dir:
-                            import os
-
-                            os.makedirs(log_dir, exist_ok=True)
-            logging.config.dictConfig(config)
-        except ValueError as e:
-            logging.error("Failed to configure logger: %s", e)
-            sys.exit(1)
+        if config is not None:
+            _configure_or_exit(config)
 
     def get_logger(self, level):
         """
@@ -52,4 +58,142 @@ class CustomLogger(logging.Logger):
         """
         logger = logging.getLogger(self.name)
         logger.setLevel(level)
+        _custom_loggers.add(self.name)
+        if not any(isinstance(f, _ConfigureOnFirstRecord) for f in logger.filters):
+            logger.addFilter(_ConfigureOnFirstRecord())
         return logger
+
+
+# ---------------------------------------------------------
+class _ConfigureOnFirstRecord(logging.Filter):
+    """
+    A logger filter that applies the logging configuration, if none is applied yet,
+    before its logger dispatches a record to the handlers; it lets every record through.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if _applied_config is None:
+            _configure_or_exit(None)
+        return True
+
+
+def _configure_or_exit(config: Optional[Dict[str, Any]]) -> None:
+    try:
+        configure_logging(config)
+    except ValueError as e:
+        logging.error("Failed to configure logger: %s", e)
+        sys.exit(1)
+
+
+# ---------------------------------------------------------
+def configure_logging(
+    config: Optional[Dict[str, Any]] = None, force: bool = False
+) -> bool:
+    """
+    Apply a logging configuration to the process, once.
+
+    Applying the same configuration again is a no-op, so the handlers, and the log file
+    they hold open, are built only once however many modules create a CustomLogger.
+
+    :param config: The dictConfig configuration, __config__.log_config by default.
+    :param force: Whether to apply the configuration even if it is already applied.
+    :return: Whether the configuration was applied by this call.
+    """
+    global _applied_config
+    if config is None:
+        config = __config__.log_config
+    if _applied_config is config and not force:
+        return False
+    with _config_lock:
+        if _applied_config is config and not force:
+            return False
+        # Create the directories of the file handlers defined in the config
+        for handler in config.get("handlers", {}).values():
+            log_dir = os.path.dirname(handler.get("filename", ""))
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+        # Flush the queue into the current handlers before dictConfig closes them
+        disable_queue_logging()
+        logging.config.dictConfig(config)
+        # Loggers created before the configuration are not disabled by it
+        for name in _custom_loggers:
+            logging.getLogger(name).disabled = False
+        log_queue_config = __config__.log_queue_config
+        if log_queue_config["enabled"]:
+            enable_queue_logging(
+                max_size=log_queue_config["max_size"],
+                policy=log_queue_config["policy"],
+                timeout=log_queue_config["timeout"],
+                batch_size=log_queue_config["batch_size"],
+            )
+        _applied_config = config
+        return True
+
+
+# ---------------------------------------------------------
+def enable_queue_logging(
+    logger: Optional[logging.Logger] = None,
+    max_size: int = 10000,
+    policy: str = "drop",
+    timeout: Optional[float] = 1.0,
+    batch_size: int = 256,
+) -> BatchingQueueListener:
+    """
+    Move the handlers of a logger behind a bounded queue, written by a background listener.
+
+    Logging calls then only format the message and put the record on the queue; the file
+    and console I/O happen on the listener thread, in batches. Calling it again replaces
+    the previous queue, and the listener is stopped, flushing the queue, at exit.
+
+    :param logger: The logger whose handlers are moved, the root logger by default.
+    :param max_size: The capacity of the queue.
+    :param policy: "drop" to drop records when the queue is full, or "block" to wait for room.
+    :param timeout: How long the "block" policy waits before dropping, in seconds.
+    :param batch_size: The maximum number of records the listener writes at once.
+    :return: The started listener.
+    """
+    global _queue_logging
+    disable_queue_logging()
+    logger = logger if logger is not None else logging.getLogger()
+    handlers = [h for h in logger.handlers if not isinstance(h, BoundedQueueHandler)]
+    queue_handler = BoundedQueueHandler(
+        max_size=max_size, policy=policy, timeout=timeout
+    )
+    listener = BatchingQueueListener(
+        queue_handler.queue, *handlers, batch_size=batch_size
+    )
+    for handler in handlers:
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    listener.start()
+    _queue_logging = (logger, queue_handler, listener)
+    return listener
+
+
+def disable_queue_logging() -> None:
+    """
+    Stop the queue listener, after it has written every queued record, and give the
+    handlers back to their logger.
+    """
+    global _queue_logging
+    if _queue_logging is None:
+        return
+    logger, queue_handler, listener = _queue_logging
+    _queue_logging = None
+    listener.stop()
+    logger.removeHandler(queue_handler)
+    for handler in listener.handlers:
+        if handler not in logger.handlers:
+            logger.addHandler(handler)
+
+
+def queue_logging_stats() -> Dict[str, Any]:
+    """
+    Report the counters of the logging queue.
+    :return: The records enqueued and dropped, the records waiting and the queue capacity,
+        or an empty dict when queue logging is off.
+    """
+    return _queue_logging[1].stats() if _queue_logging is not None else {}
+
+
+atexit.register(disable_queue_logging)
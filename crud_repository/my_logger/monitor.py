@@ -2,11 +2,30 @@
 This module contains the CommandLogger class which is used for logging command events.
 """
 
+from typing import NamedTuple, Optional
+
 from crud_repository.my_logger.logger import CustomLogger
 
 log = CustomLogger(__name__).get_logger("DEBUG")
 
 
+class CommandEvent(NamedTuple):
+    """
+    A command event, as passed to the CommandLogger hooks.
+
+    Attributes:
+        command_name (str): The SQL verb of the statement, e.g. "SELECT".
+        request_id (int): A per-engine sequence number shared by the events of one statement.
+        connection_id (str): The engine URL, with the password hidden.
+        duration_micros (Optional[int]): The execution time, None for started events.
+    """
+
+    command_name: str
+    request_id: int
+    connection_id: str
+    duration_micros: Optional[int] = None
+
+
 class CommandLogger:
     """
     This class is used for logging command events.
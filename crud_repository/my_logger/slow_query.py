@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides an opt-in detector that records the statements of an engine running over a threshold.
+
+Each slow statement produces a structured record with the SQL, the shapes (not the values)
+of its bound parameters, its duration, the repository method that issued it and,
+optionally, the execution plan reported by the backend's EXPLAIN.
+"""
+import json
+import logging
+import sys
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional
+
+from sqlalchemy import Engine, event
+
+from crud_repository.my_logger.handlers import SlowQueryHandler
+
+# The name of the logger slow query records are written to.
+SLOW_QUERY_LOGGER = "crud_repository.slow_query"
+# The EXPLAIN prefix producing a machine-readable plan, per dialect.
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN (FORMAT JSON) ",
+    "mysql": "EXPLAIN FORMAT=JSON ",
+    "mariadb": "EXPLAIN FORMAT=JSON ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+# Statements the backends accept after EXPLAIN.
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+# Modules whose classes are repositories, for finding the calling method.
+REPOSITORY_MODULES = (
+    "crud_repository.repo.repository",
+    "crud_repository.repo.async_repository",
+)
+
+# The execution context attribute holding the start time of a statement.
+_STARTED = "_crud_repository_slow_query_started"
+
+
+# ---------------------------------------------------------
+def parameter_shape(parameters: Any, executemany: bool = False) -> Any:
+    """
+    Describe bound parameters by their types, so records carry no row data.
+    :param parameters: (Any) The DBAPI parameters of a statement.
+    :param executemany: (bool) Whether the parameters are a sequence of parameter sets.
+    :return: (Any) The type names, keyed or ordered like the parameters; for executemany,
+        the number of parameter sets and the shape of the first.
+    """
+    if executemany:
+        rows = list(parameters or ())
+        return {"rows": len(rows), "row": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, Mapping):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+# ---------------------------------------------------------
+def repository_caller() -> Optional[str]:
+    """
+    Find the outermost public repository method on the current call stack.
+    :return: (str | None) The method as "Class.method", or None if no repository issued the statement.
+    """
+    caller = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        instance = frame.f_locals.get("self")
+        name = frame.f_code.co_name
+        if instance is not None and not name.startswith("_"):
+            cls = type(instance)
+            if any(base.__module__ in REPOSITORY_MODULES for base in cls.__mro__):
+                caller = f"{cls.__name__}.{name}"
+        frame = frame.f_back
+    return caller
+
+
+# ---------------------------------------------------------
+class SlowQueryDetector:
+    """
+    Records the statements of an engine that run longer than a threshold.
+
+    Records are written as the `slow_query` attribute of WARNING log records, on a
+    dedicated logger that does not propagate to the application's handlers, and the
+    most recent ones are kept in memory.
+
+    Attributes:
+        threshold_ms (float): The duration, in milliseconds, at or over which a statement is slow.
+        explain (bool): Whether to add the backend's EXPLAIN output to the records.
+        logger (logging.Logger): The logger the records are written to.
+        recent (Deque[dict]): The most recent records.
+        count (int): The number of slow statements seen.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        explain: bool = False,
+        handler: Optional[logging.Handler] = None,
+        keep: int = 100,
+    ):
+        """
+        Initialize the SlowQueryDetector.
+        :param threshold_ms: (float) The threshold in milliseconds.
+        :param explain: (bool) Whether to run EXPLAIN for slow statements.
+        :param handler: (logging.Handler) The handler for the records, a SlowQueryHandler
+            writing to stderr by default.
+        :param keep: (int) The number of recent records kept in memory.
+        """
+        self.threshold_ms = float(threshold_ms)
+        self.explain = explain
+        # A logger outside the logging manager, so dictConfig never disables or reroutes it
+        self.logger = logging.Logger(SLOW_QUERY_LOGGER, logging.WARNING)
+        self.logger.addHandler(handler if handler is not None else SlowQueryHandler())
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.count = 0
+
+    def attach(self, engine: Engine) -> "SlowQueryDetector":
+        """
+        Listen to the statement events of an engine.
+        :param engine: (Engine) The engine; the sync_engine of an AsyncEngine is used.
+        :return: (SlowQueryDetector) This instance.
+        """
+        engine = getattr(engine, "sync_engine", engine)
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        return self
+
+    def _before_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        if context is not None:
+            setattr(context, _STARTED, time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, _STARTED, None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000.0
+        if duration_ms < self.threshold_ms:
+            return
+        record = {
+            "sql": statement,
+            "parameters": parameter_shape(parameters, executemany),
+            "duration_ms": round(duration_ms, 3),
+            "threshold_ms": self.threshold_ms,
+            "dialect": conn.dialect.name,
+            "caller": repository_caller(),
+        }
+        if self.explain:
+            record["explain"] = self._explain(
+                conn, statement, parameters, context, executemany
+            )
+        self.count += 1
+        self.recent.append(record)
+        self.logger.warning(
+            "Slow query (%.1f ms) from %s",
+            duration_ms,
+            record["caller"],
+            extra={"slow_query": record},
+        )
+
+    @staticmethod
+    def _explain(conn, statement, parameters, context, executemany) -> Any:
+        """
+        Run the backend's EXPLAIN for a statement on the same DBAPI connection.
+
+        Streaming results are skipped, since the connection is still reading them. On
+        PostgreSQL the EXPLAIN runs inside a savepoint, so that a failure does not abort
+        the caller's transaction.
+
+        :return: (Any) The plan, an {"error": ...} dict if EXPLAIN failed, or None if the
+            dialect or the statement is not supported.
+        """
+        dialect = conn.dialect.name
+        prefix = EXPLAIN_PREFIXES.get(dialect)
+        words = statement.split(None, 1)
+        if prefix is None or not words or words[0].upper() not in EXPLAINABLE:
+            return None
+        if context.execution_options.get("stream_results", False):
+            return None
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        savepoint = dialect == "postgresql"
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT crud_repository_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                rows = cursor.fetchall()
+            except Exception as e:
+                if savepoint:
+                    cursor.execute("ROLLBACK TO SAVEPOINT crud_repository_explain")
+                return {"error": str(e)}
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT crud_repository_explain")
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            cursor.close()
+        return SlowQueryDetector._plan(dialect, rows)
+
+    @staticmethod
+    def _plan(dialect: str, rows: List[Any]) -> Any:
+        """
+        Decode the rows returned by EXPLAIN.
+        """
+        if dialect == "sqlite":
+            return [row[-1] for row in rows]
+        plan = rows[0][0] if rows else None
+        if isinstance(plan, (str, bytes)):
+            plan = json.loads(plan)
+        return plan
+
+
+# ---------------------------------------------------------
+def detect_slow_queries(
+    engine: Engine, config: Optional[Dict[str, Any]] = None
+) -> Optional[SlowQueryDetector]:
+    """
+    Attach a SlowQueryDetector to an engine if the database configuration asks for one.
+
+    Recognized keys are "slow_query_ms" (the threshold; absent or None disables the
+    detector), "slow_query_explain" (default False) and "slow_query_log" (a file path
+    for the records, or a logging.Handler; stderr by default).
+
+    :param engine: (Engine) The engine, or an AsyncEngine.
+    :param config: (dict) The database configuration.
+    :return: (SlowQueryDetector | None) The attached detector, or None.
+    """
+    config = config or {}
+    if config.get("slow_query_ms", None) is None:
+        return None
+    handler = config.get("slow_query_log", None)
+    if handler is not None and not isinstance(handler, logging.Handler):
+        handler = SlowQueryHandler(filename=handler)
+    detector = SlowQueryDetector(
+        threshold_ms=config["slow_query_ms"],
+        explain=bool(config.get("slow_query_explain", False)),
+        handler=handler,
+    )
+    return detector.attach(engine)
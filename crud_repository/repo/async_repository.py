@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the asyncio counterpart of the Repository, built on SQLAlchemy's
+AsyncEngine and AsyncSession.
+"""
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Iterable,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+)
+
+import sqlalchemy
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud_repository.db.iasyncdatabase import IAsyncDatabase
+from crud_repository.model.base import Base
+from crud_repository.my_logger.logger import CustomLogger
+from crud_repository.repo.pagination import (
+    OrderBy,
+    decode_token,
+    encode_token,
+    seek_clause,
+    sort_keys,
+)
+from crud_repository.repo.repository import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_PAGE_SIZE,
+)
+from crud_repository.repo.results import BulkResult, ChunkResult, Page
+from crud_repository.repo.utils import (
+    Filters,
+    assign_primary_keys,
+    chunked,
+    model_snapshot,
+    primary_key_attributes,
+    primary_key_columns,
+    primary_key_of,
+    to_params,
+    where_clauses,
+)
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+T = TypeVar("T", bound=Base)
+
+
+# ---------------------------------------------------------
+class IAsyncRepository(ABC, Generic[T]):
+    @abstractmethod
+    async def create(self, entity: T) -> T:
+        pass
+
+    @abstractmethod
+    async def read(self, id: int) -> T:
+        pass
+
+    @abstractmethod
+    async def update(self, entity) -> T:
+        pass
+
+    @abstractmethod
+    async def delete(self, entity) -> None:
+        pass
+
+    @abstractmethod
+    async def create_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkResult:
+        pass
+
+    @abstractmethod
+    async def update_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkResult:
+        pass
+
+    @abstractmethod
+    async def delete_many(
+        self, entities: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> BulkResult:
+        pass
+
+    @abstractmethod
+    def iter_all(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, filters: Optional[Filters] = None
+    ) -> AsyncIterator[T]:
+        pass
+
+    @abstractmethod
+    async def page(
+        self,
+        after: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        order_by: Optional[OrderBy] = None,
+    ) -> Page[T]:
+        pass
+
+
+# ---------------------------------------------------------
+class AsyncRepository(IAsyncRepository[T]):
+    def __init__(self, database: IAsyncDatabase, model: Type[T]):
+        self.database = database
+        self.model = model
+
+    async def create(self, entity: T) -> T:
+        try:
+            async with self._session_scope(write=True) as session:
+                session.add(entity)
+                await session.flush()
+                await self._load_expired(session, entity)
+                return self._copy(entity)
+        except SQLAlchemyError as e:
+            log.error(f"Error creating entity in {self.model.__name__} table: {e}")
+            raise e
+
+    async def read(self, id) -> T:
+        try:
+            async with self._session_scope() as session:
+                return await session.get(self.model, id)
+        except SQLAlchemyError as e:
+            log.error(f"Error reading entity from {self.model.__name__} table: {e}")
+            raise e
+
+    async def update(self, entity: T) -> T:
+        try:
+            async with self._session_scope(write=True) as session:
+                await session.merge(entity)
+                await session.flush()
+                return self._copy(entity)
+        except SQLAlchemyError as e:
+            log.error(f"Error updating entity from {self.model.__name__} table: {e}")
+            raise e
+
+    async def delete(self, entity: T) -> None:
+        try:
+            async with self._session_scope(write=True) as session:
+                await session.delete(entity)
+                await session.flush()
+        except SQLAlchemyError as e:
+            log.error(f"Error deleting entity from {self.model.__name__} table: {e}")
+            raise e
+
+    async def create_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        return_primary_keys: bool = True,
+    ) -> BulkResult:
+        """
+        Insert many rows using one multi-row INSERT and one transaction per chunk.
+        See Repository.create_many.
+
+        :param entities: (Iterable[T | dict]) The model instances or dicts of column values.
+        :param chunk_size: (int) The maximum number of rows per INSERT and transaction.
+        :param return_primary_keys: (bool) Whether to collect the generated primary keys.
+        :return: (BulkResult) The primary keys and per-chunk timing.
+        """
+        result = BulkResult(operation="create_many")
+        pk_attrs = primary_key_attributes(self.model)
+        returning = self.database.engine.dialect.insert_executemany_returning
+        for index, chunk in enumerate(chunked(entities, chunk_size)):
+            started = time.perf_counter()
+            try:
+                async with self._session_scope(write=True) as session:
+                    params = [to_params(self.model, item) for item in chunk]
+                    if return_primary_keys and returning:
+                        rows = (
+                            await session.execute(
+                                insert(self.model).returning(
+                                    *pk_attrs, sort_by_parameter_order=True
+                                ),
+                                params,
+                            )
+                        ).all()
+                        keys = [
+                            row[0] if len(pk_attrs) == 1 else tuple(row) for row in rows
+                        ]
+                    elif return_primary_keys:
+                        instances = [self.model(**values) for values in params]
+                        session.add_all(instances)
+                        await session.flush()
+                        keys = [
+                            primary_key_of(self.model, instance)
+                            for instance in instances
+                        ]
+                    else:
+                        await session.execute(insert(self.model), params)
+                        keys = []
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error creating chunk {index} in {self.model.__name__} table: {e}"
+                )
+                raise e
+            assign_primary_keys(self.model, chunk, keys)
+            result.primary_keys.extend(keys)
+            self._record_chunk(result, index, len(chunk), len(chunk), started)
+        return result
+
+    async def update_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkResult:
+        """
+        Update many rows by primary key using an executemany UPDATE and one
+        transaction per chunk. See Repository.update_many.
+
+        :param entities: (Iterable[T | dict]) The model instances or dicts of column values.
+        :param chunk_size: (int) The maximum number of rows per UPDATE and transaction.
+        :return: (BulkResult) The primary keys of the updated rows and per-chunk timing.
+        """
+        result = BulkResult(operation="update_many")
+        for index, chunk in enumerate(chunked(entities, chunk_size)):
+            started = time.perf_counter()
+            try:
+                async with self._session_scope(write=True) as session:
+                    params = [to_params(self.model, item) for item in chunk]
+                    keys = [primary_key_of(self.model, values) for values in params]
+                    await session.execute(update(self.model), params)
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error updating chunk {index} in {self.model.__name__} table: {e}"
+                )
+                raise e
+            result.primary_keys.extend(keys)
+            self._record_chunk(result, index, len(chunk), len(chunk), started)
+        return result
+
+    async def delete_many(
+        self, entities: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> BulkResult:
+        """
+        Delete many rows by primary key using one DELETE ... WHERE pk IN (...) and
+        one transaction per chunk. See Repository.delete_many.
+
+        :param entities: (Iterable) Model instances, dicts of column values or primary keys.
+        :param chunk_size: (int) The maximum number of rows per DELETE and transaction.
+        :return: (BulkResult) The primary keys submitted for deletion and per-chunk timing.
+        """
+        result = BulkResult(operation="delete_many")
+        pk_columns = primary_key_columns(self.model)
+        key_clause = pk_columns[0] if len(pk_columns) == 1 else tuple_(*pk_columns)
+        for index, chunk in enumerate(chunked(entities, chunk_size)):
+            started = time.perf_counter()
+            try:
+                async with self._session_scope(write=True) as session:
+                    keys = [primary_key_of(self.model, item) for item in chunk]
+                    cursor = await session.execute(
+                        delete(self.model)
+                        .where(key_clause.in_(keys))
+                        .execution_options(synchronize_session=False)
+                    )
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error deleting chunk {index} from {self.model.__name__} table: {e}"
+                )
+                raise e
+            result.primary_keys.extend(keys)
+            self._record_chunk(result, index, len(chunk), cursor.rowcount, started)
+        return result
+
+    async def iter_all(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, filters: Optional[Filters] = None
+    ) -> AsyncIterator[T]:
+        """
+        Stream the rows of the table through a server-side cursor, `batch_size` rows
+        at a time. See Repository.iter_all.
+
+        :param batch_size: (int) The number of rows fetched per round trip.
+        :param filters: (Mapping | Iterable[ColumnElement]) Optional filters, see where_clauses.
+        :return: (AsyncIterator[T]) The matching entities.
+        """
+        stmt = (
+            select(self.model)
+            .where(*where_clauses(self.model, filters))
+            .execution_options(yield_per=batch_size)
+        )
+        try:
+            async with self._session_scope() as session:
+                async for entity in await session.stream_scalars(stmt):
+                    yield entity
+        except SQLAlchemyError as e:
+            log.error(f"Error iterating entities from {self.model.__name__} table: {e}")
+            raise e
+
+    async def page(
+        self,
+        after: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        order_by: Optional[OrderBy] = None,
+        descending: bool = False,
+        filters: Optional[Filters] = None,
+    ) -> Page[T]:
+        """
+        Fetch one page of rows using keyset (seek) pagination. See Repository.page.
+
+        :param after: (str | None) The next_token of the previous page, or None for the first page.
+        :param limit: (int) The maximum number of rows on the page.
+        :param order_by: (OrderBy | None) Attribute names or attributes to sort by.
+        :param descending: (bool) Whether to sort in descending order.
+        :param filters: (Mapping | Iterable[ColumnElement]) Optional filters, see where_clauses.
+        :return: (Page[T]) The rows of the page and the token for the next one.
+        """
+        if limit < 1:
+            raise ValueError("Page limit must be a positive integer: %s" % limit)
+        keys = sort_keys(self.model, order_by)
+        stmt = select(self.model).where(*where_clauses(self.model, filters))
+        if after is not None:
+            stmt = stmt.where(
+                seek_clause(keys, decode_token(after, keys, descending), descending)
+            )
+        stmt = stmt.order_by(
+            *[key.desc() if descending else key.asc() for key in keys]
+        ).limit(limit + 1)
+        try:
+            async with self._session_scope() as session:
+                items = list(await session.scalars(stmt))
+        except SQLAlchemyError as e:
+            log.error(f"Error paging entities from {self.model.__name__} table: {e}")
+            raise e
+        next_token = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_token = encode_token(
+                keys, [getattr(last, key.key) for key in keys], descending
+            )
+        return Page(items=items, limit=limit, next_token=next_token)
+
+    @asynccontextmanager
+    async def _session_scope(self, write: bool = False) -> AsyncIterator[AsyncSession]:
+        """
+        Provide a new session for one repository operation, committed when `write`
+        is True, rolled back on error and closed.
+
+        :param write: (bool) Whether the operation writes and must be committed.
+        :return: (AsyncIterator[AsyncSession]) The session to use.
+        """
+        await self.database.initialize()
+        session = self.database.get_session()
+        try:
+            yield session
+            if write:
+                await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    @staticmethod
+    async def _load_expired(session: AsyncSession, entity: T) -> None:
+        """
+        Refresh the attributes expired by a flush, such as server-generated defaults,
+        since they cannot be lazy loaded outside of the session's greenlet.
+        """
+        expired = sqlalchemy.inspect(entity).expired_attributes
+        if expired:
+            await session.refresh(entity, attribute_names=list(expired))
+
+    def _copy(self, entity: T) -> T:
+        """
+        :return: (T) A new instance holding the column values of the entity.
+        """
+        snapshot = model_snapshot(self.model)
+        return snapshot.instance(snapshot.values(entity))
+
+    def _record_chunk(
+        self, result: BulkResult, index: int, size: int, rowcount: int, started: float
+    ) -> None:
+        """
+        Append the timing of a finished chunk to a bulk result.
+        """
+        elapsed = time.perf_counter() - started
+        result.chunks.append(ChunkResult(index, size, rowcount, elapsed))
+        log.debug(
+            f"{result.operation} chunk {index} on {self.model.__name__}: "
+            f"{size} rows in {elapsed * 1000:.2f} ms"
+        )
+
+    def __dict__(self):
+        return {"database": self.database.__dict__(), "model": self.model.__name__}
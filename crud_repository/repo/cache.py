@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the read-through cache used by Repository.read.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+# ---------------------------------------------------------
+@dataclass
+class CacheStats:
+    """
+    A point-in-time copy of the counters of a ReadCache.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that were not cached or had expired.
+        evictions (int): Entries dropped to stay within max_size.
+        expirations (int): Entries dropped because they outlived the TTL.
+        invalidations (int): Entries dropped because the row was written.
+        size (int): The number of entries currently cached.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        :return: (float) The share of lookups answered from the cache, 0.0 if none were made.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# ---------------------------------------------------------
+class ReadCache:
+    """
+    A thread-safe LRU cache with a time-to-live, keyed by (model, primary key).
+
+    Entries are immutable snapshots of column values rather than ORM instances,
+    so one entry can be handed to many threads: each lookup builds its own copy.
+
+    Attributes:
+        max_size (int): The maximum number of entries; the least recently used is evicted first.
+        ttl (Optional[float]): The lifetime of an entry in seconds, or None for no expiry.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the ReadCache.
+        :param max_size: (int) The maximum number of entries.
+        :param ttl: (float | None) The lifetime of an entry in seconds, or None for no expiry.
+        :param clock: (Callable) The monotonic clock used for expiry, replaceable in tests.
+        """
+        if max_size < 1:
+            raise ValueError("Cache max_size must be a positive integer: %s" % max_size)
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._generation = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        Look up an entry, refreshing its LRU position.
+        :param key: (Hashable) The (model, primary key) pair.
+        :return: (dict | None) The cached column values, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            expires_at, values = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return values
+
+    def generation(self) -> int:
+        """
+        Get the invalidation generation, to be passed to `put` after loading a row.
+        :return: (int) A counter incremented by every invalidation.
+        """
+        return self._generation
+
+    def put(
+        self, key: Hashable, values: Dict[str, Any], generation: Optional[int] = None
+    ) -> None:
+        """
+        Store an entry, evicting the least recently used ones beyond max_size.
+
+        If `generation` is given and an invalidation happened since it was taken, the
+        row may have been loaded before a concurrent write committed, so it is not stored.
+
+        :param key: (Hashable) The (model, primary key) pair.
+        :param values: (dict) The column values of the row.
+        :param generation: (int | None) The value of generation() taken before loading the row.
+        """
+        expires_at = self._clock() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (expires_at, dict(values))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        """
+        Drop the entries for rows that were written.
+        :param keys: (Iterable[Hashable]) The (model, primary key) pairs.
+        """
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats.invalidations += 1
+
+    def invalidate_model(self, model: Any) -> None:
+        """
+        Drop the entries of every row of a model, for writes whose rows are not known.
+        :param model: (Any) The model of the written rows.
+        """
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if key[0] is model]:
+                del self._entries[key]
+                self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        """
+        Drop every entry, keeping the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """
+        :return: (CacheStats) A copy of the counters and the current size.
+        """
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                invalidations=self._stats.invalidations,
+                size=len(self._entries),
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
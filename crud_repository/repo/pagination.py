@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the helpers for keyset (seek) pagination: resolving the sort
+keys of a model and encoding the position of the last row into an opaque token.
+"""
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any, List, Optional, Sequence, Tuple, Type, Union
+
+import sqlalchemy
+from sqlalchemy import ColumnElement, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+from crud_repository.model.base import Base
+
+OrderBy = Union[str, InstrumentedAttribute, Sequence[Union[str, InstrumentedAttribute]]]
+
+
+# ---------------------------------------------------------
+def sort_keys(
+    model: Type[Base], order_by: Optional[OrderBy]
+) -> List[InstrumentedAttribute]:
+    """
+    Resolve the sort keys of a page, appending the primary key columns that are not
+    already part of the ordering so that every row has a unique position.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param order_by: (OrderBy | None) Attribute names or attributes to sort by.
+    :return: (List[InstrumentedAttribute]) The attributes to sort and seek on.
+    """
+    if order_by is None:
+        order_by = []
+    elif isinstance(order_by, (str, InstrumentedAttribute)):
+        order_by = [order_by]
+    keys = []
+    for key in order_by:
+        attr = getattr(model, key, None) if isinstance(key, str) else key
+        if attr is None:
+            raise ValueError("%s has no attribute %r" % (model.__name__, key))
+        keys.append(attr)
+    mapper = sqlalchemy.inspect(model)
+    names = {attr.key for attr in keys}
+    for column in mapper.primary_key:
+        name = mapper.get_property_by_column(column).key
+        if name not in names:
+            keys.append(getattr(model, name))
+    return keys
+
+
+# ---------------------------------------------------------
+def seek_clause(
+    keys: List[InstrumentedAttribute], values: Sequence[Any], descending: bool = False
+) -> ColumnElement:
+    """
+    Build the predicate selecting the rows after a position in the sort order.
+
+    A single key compiles to `key > value`; composite keys use a row-value
+    comparison, which PostgreSQL, MySQL, MariaDB and SQLite all support.
+
+    :param keys: (List[InstrumentedAttribute]) The sort keys.
+    :param values: (Sequence) The sort key values of the last row of the previous page.
+    :param descending: (bool) Whether the page is sorted in descending order.
+    :return: (ColumnElement) The WHERE clause.
+    """
+    if len(keys) == 1:
+        left, right = keys[0], values[0]
+    else:
+        left, right = tuple_(*keys), tuple_(*values)
+    return left < right if descending else left > right
+
+
+# ---------------------------------------------------------
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"$dec": str(value)}
+    if isinstance(value, uuid.UUID):
+        return {"$uuid": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return datetime.date.fromisoformat(value["$d"])
+        if "$dec" in value:
+            return decimal.Decimal(value["$dec"])
+        if "$uuid" in value:
+            return uuid.UUID(value["$uuid"])
+    return value
+
+
+# ---------------------------------------------------------
+def encode_token(
+    keys: List[InstrumentedAttribute], values: Sequence[Any], descending: bool
+) -> str:
+    """
+    Encode the position of a row into an opaque, URL-safe continuation token.
+
+    :param keys: (List[InstrumentedAttribute]) The sort keys of the page.
+    :param values: (Sequence) The sort key values of the last row on the page.
+    :param descending: (bool) Whether the page is sorted in descending order.
+    :return: (str) The continuation token.
+    """
+    payload = {
+        "k": [attr.key for attr in keys],
+        "v": [_encode_value(value) for value in values],
+        "d": descending,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_token(
+    token: str, keys: List[InstrumentedAttribute], descending: bool
+) -> Tuple[Any, ...]:
+    """
+    Decode a continuation token, checking that it was issued for the same ordering.
+
+    :param token: (str) The continuation token from a previous Page.
+    :param keys: (List[InstrumentedAttribute]) The sort keys of the requested page.
+    :param descending: (bool) Whether the requested page is sorted in descending order.
+    :return: (Tuple) The sort key values to seek past.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        names, values = payload["k"], payload["v"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid continuation token: %s" % e)
+    if names != [attr.key for attr in keys] or payload.get("d") != descending:
+        raise ValueError("Continuation token does not match the requested ordering")
+    return tuple(_decode_value(value) for value in values)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the query specifications of Repository.find_by, count, exists and
+aggregate: criteria with operator suffixes, orderings and aggregates, split into the
+shape of a query, which decides its SQL, and the values bound when it is executed.
+"""
+import operator
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import ColumnElement, bindparam, func
+
+from crud_repository.model.base import Base
+from crud_repository.repo.utils import model_snapshot
+
+# The operator suffixes of find_by criteria, e.g. `name__startswith="a"`. A criterion
+# without a suffix is an equality test, an IN for a list, tuple or set value, or an
+# IS NULL for None; `isnull` takes a bool and binds no value.
+OPERATORS: Dict[str, Callable[[Any, Any], ColumnElement]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda column, value: column.in_(value),
+    "not_in": lambda column, value: column.not_in(value),
+    "like": lambda column, value: column.like(value),
+    "ilike": lambda column, value: column.ilike(value),
+    "startswith": lambda column, value: column.startswith(value),
+    "endswith": lambda column, value: column.endswith(value),
+    "contains": lambda column, value: column.contains(value),
+}
+# The operators that test for NULL and bind no value.
+NULL_OPERATORS = {
+    "isnull": lambda column: column.is_(None),
+    "notnull": lambda column: column.is_not(None),
+}
+# The aggregate functions of Repository.aggregate, e.g. "max__last_updated".
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+# The separator between an attribute name and an operator, or a function and a name.
+SEPARATOR = "__"
+
+# The shape of a criterion: the attribute name and the operator.
+Shape = Tuple[Tuple[str, str], ...]
+
+
+# ---------------------------------------------------------
+def parse_criteria(
+    model: Type[Base], criteria: Mapping[str, Any]
+) -> Tuple[Shape, Dict[str, Any]]:
+    """
+    Split find_by criteria into their shape and their values. Queries with the same
+    shape share one statement whatever their values.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param criteria: (Mapping[str, Any]) The criteria, keyed by attribute name with an
+        optional operator suffix, see OPERATORS.
+    :return: (tuple) The shape, as (attribute name, operator) pairs in name order, and
+        the values to bind, by parameter name, see criteria_clauses.
+    """
+    columns = model_snapshot(model).column_by_key
+    shape = []
+    params = {}
+    for name in sorted(criteria):
+        value = criteria[name]
+        key, _, op = name.partition(SEPARATOR)
+        if key not in columns:
+            raise ValueError("%s has no column attribute %r" % (model.__name__, key))
+        op = op or "eq"
+        if op == "isnull":
+            op = "isnull" if value else "notnull"
+        elif op not in OPERATORS:
+            raise ValueError("Invalid criteria operator: %s" % name)
+        elif value is None and op in ("eq", "ne"):
+            op = "isnull" if op == "eq" else "notnull"
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            if op == "eq":
+                op = "in"
+            if op in ("in", "not_in"):
+                value = list(value)
+        if op not in NULL_OPERATORS:
+            params[_param_name(len(shape))] = value
+        shape.append((key, op))
+    return tuple(shape), params
+
+
+def criteria_clauses(model: Type[Base], shape: Shape) -> List[ColumnElement]:
+    """
+    Build the WHERE clauses of a criteria shape, with bind parameters for the values.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param shape: (Shape) The shape from parse_criteria.
+    :return: (List[ColumnElement]) The clauses, to be combined with AND.
+    """
+    columns = model_snapshot(model).column_by_key
+    clauses = []
+    for index, (key, op) in enumerate(shape):
+        column = columns[key]
+        if op in NULL_OPERATORS:
+            clauses.append(NULL_OPERATORS[op](column))
+        else:
+            expanding = op in ("in", "not_in")
+            value = bindparam(_param_name(index), expanding=expanding)
+            clauses.append(OPERATORS[op](column, value))
+    return clauses
+
+
+def _param_name(index: int) -> str:
+    return f"criterion_{index}"
+
+
+# ---------------------------------------------------------
+def parse_order_by(
+    model: Type[Base], order_by: Optional[Sequence[str]]
+) -> Tuple[str, ...]:
+    """
+    Validate an ordering of attribute names, each descending when prefixed with "-".
+
+    :param model: (Type[Base]) The mapped model class.
+    :param order_by: (str | Sequence[str] | None) The ordering, e.g. ["-last_updated", "id"].
+    :return: (Tuple[str, ...]) The ordering, as a hashable part of the query shape.
+    """
+    if order_by is None:
+        return ()
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    columns = model_snapshot(model).column_by_key
+    for name in order_by:
+        if name.lstrip("-") not in columns:
+            raise ValueError("%s has no column attribute %r" % (model.__name__, name))
+    return tuple(order_by)
+
+
+def order_by_clauses(model: Type[Base], order_by: Tuple[str, ...]) -> List[Any]:
+    """
+    :return: (List[ColumnElement]) The ORDER BY clauses of an ordering from parse_order_by.
+    """
+    columns = model_snapshot(model).column_by_key
+    return [
+        columns[name[1:]].desc() if name.startswith("-") else columns[name].asc()
+        for name in order_by
+    ]
+
+
+# ---------------------------------------------------------
+def aggregate_columns(model: Type[Base], aggregates: Sequence[str]) -> List[Any]:
+    """
+    Build the labeled aggregate columns of a list of "function__attribute" names,
+    e.g. "max__last_updated", see AGGREGATES.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param aggregates: (Sequence[str]) The aggregates; each is labeled with its name.
+    :return: (List[Label]) The columns, for a SELECT over the model's table.
+    """
+    columns = model_snapshot(model).column_by_key
+    selected = []
+    for name in aggregates:
+        function, _, key = name.partition(SEPARATOR)
+        if function not in AGGREGATES or key not in columns:
+            raise ValueError("Invalid aggregate: %s" % name)
+        selected.append(getattr(func, function)(columns[key]).label(name))
+    return selected
@@ -1,15 +1,84 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import itertools
+import time
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Type
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Type,
+    Union,
+)
 import sqlalchemy
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_, update
+from sqlalchemy.engine import Connection, RowMapping
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
 from crud_repository.db.idatabase import IDatabase
 from crud_repository.model.base import Base
 from crud_repository.my_logger.logger import CustomLogger
+from crud_repository.repo.cache import ReadCache
+from crud_repository.repo.pagination import (
+    OrderBy,
+    decode_token,
+    encode_token,
+    seek_clause,
+    sort_keys,
+)
+from crud_repository.repo.query import (
+    aggregate_columns,
+    criteria_clauses,
+    order_by_clauses,
+    parse_criteria,
+    parse_order_by,
+)
+from crud_repository.repo.results import (
+    BulkResult,
+    ChunkResult,
+    Page,
+    ReadManyResult,
+    UpdateResult,
+)
+from crud_repository.repo.statements import StatementCache, StatementStats
+from crud_repository.repo.unit_of_work import UnitOfWork
+from crud_repository.repo.utils import (
+    CASCADES,
+    Filters,
+    assign_primary_keys,
+    cascade_statements,
+    chunked,
+    max_in_list_size,
+    model_snapshot,
+    onupdate_params,
+    primary_key_attributes,
+    primary_key_columns,
+    primary_key_of,
+    to_column_params,
+    to_params,
+    upsert_statement,
+    where_clauses,
+)
 
 log = CustomLogger(__name__).get_logger("DEBUG")
 T = TypeVar("T", bound=Base)
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_PAGE_SIZE = 50
+# Result modes: "orm" returns model instances, "dto" returns the namedtuple DTOs of
+# ModelSnapshot, read straight from the rows without ORM instrumentation.
+RESULT_MODES = ("orm", "dto")
 
 
 # ---------------------------------------------------------
@@ -22,6 +91,10 @@ class IRepository(ABC, Generic[T]):
     def read(self, id: int) -> T:
         pass
 
+    @abstractmethod
+    def read_many(self, ids: Iterable[Any]) -> ReadManyResult[T]:
+        pass
+
     @abstractmethod
     def update(self, entity) -> T:
         pass
@@ -30,70 +103,1354 @@ class IRepository(ABC, Generic[T]):
     def delete(self, entity) -> None:
         pass
 
+    @abstractmethod
+    def create_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkResult:
+        pass
+
+    @abstractmethod
+    def update_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkResult:
+        pass
+
+    @abstractmethod
+    def delete_many(
+        self, entities: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> BulkResult:
+        pass
+
+    @abstractmethod
+    def iter_all(
+        self, batch_size: int = DEFAULT_BATCH_SIZE, filters: Optional[Filters] = None
+    ) -> Iterator[T]:
+        pass
+
+    @abstractmethod
+    def page(
+        self,
+        after: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        order_by: Optional[OrderBy] = None,
+    ) -> Page[T]:
+        pass
+
+    @abstractmethod
+    def find_by(
+        self,
+        order_by: Optional[Union[str, Sequence[str]]] = None,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        **criteria: Any,
+    ) -> List[Any]:
+        pass
+
+    @abstractmethod
+    def count(self, **criteria: Any) -> int:
+        pass
+
+    @abstractmethod
+    def exists(self, **criteria: Any) -> bool:
+        pass
+
+    @abstractmethod
+    def aggregate(self, aggregates: Sequence[str], **criteria: Any) -> Dict[str, Any]:
+        pass
+
 
 # ---------------------------------------------------------
 class Repository(IRepository[T]):
-    def __init__(self, database: IDatabase, model: Type[T]):
+    # Named relationship loading profiles, by name, for the `profile` argument of the
+    # read and scan methods: sequences of SQLAlchemy loader options, e.g.
+    # (selectinload(User.emails), raiseload("*")). Subclasses define their own.
+    loading_profiles: ClassVar[Dict[str, Sequence[Any]]] = {}
+
+    def __init__(
+        self,
+        database: IDatabase,
+        model: Type[T],
+        cache: Optional[ReadCache] = None,
+        result_mode: str = "orm",
+    ):
+        """
+        Initialize the Repository.
+        :param database: (IDatabase) The database to operate on.
+        :param model: (Type[T]) The mapped model class managed by the repository.
+        :param cache: (ReadCache | None) An optional read-through cache for `read`.
+        :param result_mode: (str) "orm" to return model instances, or "dto" to return
+            `self.snapshot.dto` namedtuples from create, read, read_many, update,
+            iter_all and page.
+        """
+        if result_mode not in RESULT_MODES:
+            raise ValueError("Invalid result mode: %s" % result_mode)
         self.database = database
         self.model = model
+        self.cache = cache
+        self.result_mode = result_mode
+        self.snapshot = model_snapshot(model)
+        self.statements = StatementCache()
+        self.database.ensure_schema(model)
 
     def create(self, entity: T) -> T:
-        session = self.database.get_scoped_session()
         try:
-            session.add(entity)
-            session.commit()
-            return self.model(
-                **{
-                    c.key: getattr(entity, c.key)
-                    for c in sqlalchemy.inspect(entity).mapper.column_attrs
-                }
-            )
+            with self._session_scope(write=True) as session:
+                session.add(entity)
+                session.flush()
+                return self._result(entity)
         except SQLAlchemyError as e:
-            session.rollback()
             log.error(f"Error creating entity in {self.model.__name__} table: {e}")
             raise e
-        finally:
-            session.close()
 
-    def read(self, id) -> T:
-        session = self.database.get_scoped_session()
+    def read(self, id, profile: Optional[str] = None) -> T:
+        """
+        Fetch an entity by primary key, from the read cache when there is one.
+
+        :param id: (Any) The primary key; a tuple for composite keys.
+        :param profile: (str | None) The name of a loading profile of the repository,
+            see loading_profiles. Reads with a profile bypass the read cache.
+        :return: (T | None) The entity, or its DTO; None if there is no such row.
+        """
+        options = self._loader_options(profile)
+        use_cache = (
+            self.cache is not None
+            and UnitOfWork.current(self.database) is None
+            and not options
+        )
+        if use_cache:
+            values = self.cache.get((self.model, id))
+            if values is not None:
+                return self._from_values(values)
+            generation = self.cache.generation()
         try:
-            return session.get(self.model, id)
+            with self._session_scope() as session:
+                if self.result_mode == "dto":
+                    entity = self._read_dto(session, id)
+                else:
+                    entity = session.get(self.model, id, options=options)
+                if use_cache and entity is not None:
+                    self.cache.put(
+                        (self.model, id), self._column_values(entity), generation
+                    )
+                return entity
         except SQLAlchemyError as e:
             log.error(f"Error reading entity from {self.model.__name__} table: {e}")
             raise e
-        finally:
-            session.close()
+
+    def read_many(
+        self, ids: Iterable[Any], chunk_size: int = 0, profile: Optional[str] = None
+    ) -> ReadManyResult[T]:
+        """
+        Fetch many entities by primary key with chunked IN (...) queries.
+
+        Keys already held by the active unit of work's identity map, or by the read
+        cache outside of one, are answered without a query. The remaining keys are
+        fetched in as few IN lists as the dialect's bound parameter limit allows.
+        Duplicate keys are fetched once.
+
+        With a loading profile every key is queried, so that the profile's
+        relationships are loaded in bulk for the whole chunk.
+
+        :param ids: (Iterable) The primary keys; tuples for composite keys. They must
+            have the column's Python type to match the loaded rows.
+        :param chunk_size: (int) An optional cap on the number of keys per query.
+        :param profile: (str | None) The name of a loading profile, see loading_profiles.
+        :return: (ReadManyResult[T]) The entities in request order and the missing keys.
+        """
+        keys = list(dict.fromkeys(ids))
+        found: Dict[Any, T] = {}
+        options = self._loader_options(profile)
+        unit = UnitOfWork.current(self.database)
+        use_identity_map = unit is not None and not options
+        use_cache = self.cache is not None and unit is None and not options
+        pending = []
+        for key in keys:
+            if use_identity_map:
+                entity = unit.session.identity_map.get(identity_key(self.model, key))
+                if entity is not None:
+                    found[key] = (
+                        self.snapshot.to_dto(entity)
+                        if self.result_mode == "dto"
+                        else entity
+                    )
+                    continue
+            elif use_cache:
+                values = self.cache.get((self.model, key))
+                if values is not None:
+                    found[key] = self._from_values(values)
+                    continue
+            pending.append(key)
+        if pending:
+            pk_columns = primary_key_columns(self.model)
+            key_clause = pk_columns[0] if len(pk_columns) == 1 else tuple_(*pk_columns)
+            generation = self.cache.generation() if use_cache else None
+            try:
+                with self._session_scope() as session:
+                    size = max_in_list_size(
+                        session.get_bind().dialect.name, len(pk_columns), chunk_size
+                    )
+                    for chunk in chunked(pending, size):
+                        stmt = (
+                            self._select()
+                            .where(key_clause.in_(chunk))
+                            .options(*options)
+                        )
+                        for entity in self._fetch(session, stmt, unique=True):
+                            key = self._key_of(entity)
+                            found[key] = entity
+                            if use_cache:
+                                self.cache.put(
+                                    (self.model, key),
+                                    self._column_values(entity),
+                                    generation,
+                                )
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error reading entities from {self.model.__name__} table: {e}"
+                )
+                raise e
+        result = ReadManyResult(by_key=found)
+        for key in keys:
+            if key in found:
+                result.items.append(found[key])
+            else:
+                result.missing.append(key)
+        return result
 
     def update(self, entity: T) -> T:
-        session = self.database.get_scoped_session()
+        """
+        Update an entity, or insert it if its row does not exist.
+
+        Outside a unit of work, an entity of the repository's model with its full
+        primary key and no loaded relationships is written with a single UPDATE ...
+        WHERE pk of its modified columns, see `update_fields`, so that onupdate columns
+        such as last_updated still refresh. Otherwise, or if that row does not exist,
+        it goes through session.merge, which loads the row first and cascades to the
+        loaded relationships. Use `upsert` for an INSERT ... ON CONFLICT in one
+        statement.
+
+        :param entity: (T) The entity holding the new column values; columns it does
+            not hold or did not modify are left as they are.
+        :return: (T) A new instance holding the column values, or its DTO; after a
+            single UPDATE with RETURNING, those stored by the database.
+        """
+        changes = self._update_in_place_changes(entity)
+        if changes:
+            result = self.update_fields(self._given_key(entity.__dict__), **changes)
+            if result.items:
+                return result.items[0]
+            if result.rowcount:
+                return self._result(entity)
         try:
-            session.merge(entity)
-            session.commit()
-            return self.model(
-                **{
-                    c.key: getattr(entity, c.key)
-                    for c in sqlalchemy.inspect(entity).mapper.column_attrs
-                }
-            )
+            with self._session_scope(write=True) as session:
+                merged = session.merge(entity)
+                session.flush()
+                self._invalidate_entity(merged)
+                return self._result(entity)
         except SQLAlchemyError as e:
-            session.rollback()
-            log.error(f"Error updating entity from {entity.__name__} table: {e}")
+            log.error(f"Error updating entity from {self.model.__name__} table: {e}")
             raise e
-        finally:
-            session.close()
+
+    def update_fields(self, id: Any, **changes: Any) -> UpdateResult:
+        """
+        Update columns of one row by primary key with a single UPDATE ... WHERE, without
+        loading or merging the entity.
+
+        Values may be SQL expressions, e.g. `login_count=User.login_count + 1`. Column
+        `onupdate` defaults, such as last_updated, are applied to the columns not changed.
+
+        :param id: (Any) The primary key; a tuple for composite keys.
+        :param changes: (Any) The new values, keyed by column attribute name.
+        :return: (UpdateResult) The number of rows updated, 0 or 1, and the new values
+            where the dialect supports UPDATE ... RETURNING.
+        """
+        pk_columns = self.snapshot.primary_key_columns
+        values = id if len(pk_columns) > 1 else (id,)
+        clauses = [column == value for column, value in zip(pk_columns, values)]
+        return self._update_rows("update_fields", clauses, changes, keys=[id])
+
+    def update_where(self, criteria: Filters, **changes: Any) -> UpdateResult:
+        """
+        Update columns of every row matching criteria with a single UPDATE ... WHERE,
+        see update_fields.
+
+        :param criteria: (Mapping | Iterable[ColumnElement]) The filters, see where_clauses;
+            they must not be empty.
+        :param changes: (Any) The new values, keyed by column attribute name.
+        :return: (UpdateResult) The number of rows updated, and their keys and new values
+            where the dialect supports UPDATE ... RETURNING.
+        """
+        clauses = where_clauses(self.model, criteria)
+        if not clauses:
+            raise ValueError("Missing update criteria for %s" % self.model.__name__)
+        return self._update_rows("update_where", clauses, changes)
 
     def delete(self, entity: T) -> None:
-        session = self.database.get_scoped_session()
         try:
-            session.delete(entity)
-            session.commit()
+            with self._session_scope(write=True) as session:
+                session.delete(entity)
+                session.flush()
+                self._invalidate_entity(entity)
         except SQLAlchemyError as e:
-            session.rollback()
-            log.error(f"Error deleting entity from {entity.__name__} table: {e}")
+            log.error(f"Error deleting entity from {self.model.__name__} table: {e}")
+            raise e
+
+    def upsert(
+        self,
+        entity: Union[T, Dict[str, Any]],
+        conflict_columns: Optional[Iterable[str]] = None,
+        update_columns: Optional[Iterable[str]] = None,
+        returning: Optional[bool] = True,
+    ) -> Optional[T]:
+        """
+        Insert a row, or update the existing row on a key conflict, in one statement:
+        INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and SQLite, INSERT ... ON
+        DUPLICATE KEY UPDATE on MySQL and MariaDB. See upsert_many.
+
+        :param entity: (T | dict) The model instance or dict of column values.
+        :param conflict_columns: (Iterable[str] | None) The attribute names of the
+            conflict target, the primary key by default.
+        :param update_columns: (Iterable[str] | None) The attribute names of the columns
+            to update on a conflict, by default every given column outside the conflict
+            target; empty to leave a conflicting row as it is.
+        :param returning: (bool | None) Whether to return the resulting row; None
+            returns it only when the dialect supports RETURNING, and the given values
+            otherwise.
+        :return: (T | None) A new instance holding the column values of the row, or its
+            DTO; None if returning is False, or the row was left as it is.
+        """
+        result = self.upsert_many(
+            [entity],
+            conflict_columns=conflict_columns,
+            update_columns=update_columns,
+            returning=returning,
+        )
+        if result.items:
+            return result.items[0]
+        if returning is None and isinstance(entity, self.model):
+            return self._result(entity)
+        return None
+
+    def upsert_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        conflict_columns: Optional[Iterable[str]] = None,
+        update_columns: Optional[Iterable[str]] = None,
+        returning: Optional[bool] = False,
+    ) -> BulkResult:
+        """
+        Insert many rows, updating the existing ones on a key conflict, with one
+        executemany upsert and one transaction per chunk; see upsert for the statements.
+
+        Only the columns given for a row are inserted or updated, so rows are sent in
+        groups sharing the same columns. When a chunk holds several rows with the same
+        conflict key, the last one wins. Column `onupdate` defaults are applied to
+        updated rows. MySQL and MariaDB resolve conflicts on any unique key; there the
+        conflict columns only identify the rows read back for `returning`.
+
+        :param entities: (Iterable[T | dict]) The model instances or dicts of column values.
+        :param chunk_size: (int) The maximum number of rows per statement and transaction.
+        :param conflict_columns: (Iterable[str] | None) The attribute names of the
+            conflict target, the primary key by default.
+        :param update_columns: (Iterable[str] | None) The attribute names of the columns
+            to update on a conflict, by default every given column outside the conflict
+            target; empty to leave conflicting rows as they are.
+        :param returning: (bool | None) Whether to return the resulting rows in `items`,
+            with RETURNING where the dialect supports it and a SELECT in the same
+            transaction otherwise; None uses RETURNING only where it is supported.
+        :return: (BulkResult) The primary keys, the resulting rows when returned, and
+            per-chunk timing. Without returned rows the keys are those given in the input.
+        """
+        result = BulkResult(operation="upsert_many")
+        conflict_keys = tuple(conflict_columns or self.snapshot.primary_key_keys)
+        for index, chunk in enumerate(chunked(entities, chunk_size)):
+            started = time.perf_counter()
+            params = self._last_by_key(
+                conflict_keys, [to_params(self.model, item) for item in chunk]
+            )
+            items: List[Any] = []
+            try:
+                with self._session_scope(write=True) as session:
+                    dialect = session.get_bind().dialect
+                    use_returning = (
+                        returning is not False
+                        and dialect.name in ("postgresql", "sqlite")
+                        and dialect.insert_executemany_returning
+                    )
+                    for columns, group in self._group_by_columns(params):
+                        update_keys = (
+                            tuple(update_columns)
+                            if update_columns is not None
+                            else tuple(
+                                key for key in columns if key not in conflict_keys
+                            )
+                        )
+                        stmt = self.statements.get(
+                            (
+                                "upsert",
+                                dialect.name,
+                                conflict_keys,
+                                update_keys,
+                                use_returning,
+                            ),
+                            lambda: self._build_upsert(
+                                dialect, conflict_keys, update_keys, use_returning
+                            ),
+                        )
+                        # Callable onupdate defaults are evaluated per execution
+                        onupdate = onupdate_params(self.model, update_keys)
+                        rows = [
+                            dict(to_column_params(self.model, values), **onupdate)
+                            for values in group
+                        ]
+                        connection = session.connection()
+                        if len(rows) > 1:
+                            cursor = connection.execute(stmt, rows)
+                        else:
+                            cursor = connection.execute(stmt, rows[0])
+                            if not use_returning and self._given_key(group[0]) is None:
+                                # Without RETURNING, read the generated key of a
+                                # single inserted row back from the cursor
+                                generated = cursor.inserted_primary_key or ()
+                                group[0].update(
+                                    zip(self.snapshot.primary_key_keys, generated)
+                                )
+                        if use_returning:
+                            items.extend(cursor.mappings())
+                    if returning and not use_returning:
+                        items = self._select_by(session, conflict_keys, params)
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error upserting chunk {index} in {self.model.__name__} table: {e}"
+                )
+                raise e
+            if items:
+                keys = [self._key_of(row) for row in items]
+                result.items.extend(self._from_row(row) for row in items)
+            else:
+                keys = [key for key in map(self._given_key, params) if key is not None]
+            self._invalidate(keys)
+            result.primary_keys.extend(keys)
+            self._record_chunk(result, index, len(chunk), len(params), started)
+        return result
+
+    def create_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        return_primary_keys: bool = True,
+    ) -> BulkResult:
+        """
+        Insert many rows using one multi-row INSERT and one transaction per chunk.
+
+        On dialects that support RETURNING with executemany (PostgreSQL, SQLite,
+        MariaDB) the generated primary keys are returned in input order. On MySQL
+        the rows of a chunk are flushed through the ORM to collect the keys, unless
+        `return_primary_keys` is False, in which case a plain executemany is used.
+
+        :param entities: (Iterable[T | dict]) The model instances or dicts of column values.
+        :param chunk_size: (int) The maximum number of rows per INSERT and transaction.
+        :param return_primary_keys: (bool) Whether to collect the generated primary keys.
+        :return: (BulkResult) The primary keys and per-chunk timing.
+        """
+        result = BulkResult(operation="create_many")
+        pk_attrs = primary_key_attributes(self.model)
+        for index, chunk in enumerate(chunked(entities, chunk_size)):
+            started = time.perf_counter()
+            try:
+                with self._session_scope(write=True) as session:
+                    params = [to_params(self.model, item) for item in chunk]
+                    returning = session.get_bind().dialect.insert_executemany_returning
+                    if return_primary_keys and returning:
+                        rows = session.execute(
+                            insert(self.model).returning(
+                                *pk_attrs, sort_by_parameter_order=True
+                            ),
+                            params,
+                        ).all()
+                        keys = [
+                            row[0] if len(pk_attrs) == 1 else tuple(row) for row in rows
+                        ]
+                    elif return_primary_keys:
+                        instances = [self.model(**values) for values in params]
+                        session.add_all(instances)
+                        session.flush()
+                        keys = [
+                            primary_key_of(self.model, instance)
+                            for instance in instances
+                        ]
+                    else:
+                        session.execute(insert(self.model), params)
+                        keys = []
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error creating chunk {index} in {self.model.__name__} table: {e}"
+                )
+                raise e
+            assign_primary_keys(self.model, chunk, keys)
+            result.primary_keys.extend(keys)
+            self._record_chunk(result, index, len(chunk), len(chunk), started)
+        return result
+
+    def update_many(
+        self,
+        entities: Iterable[Union[T, Dict[str, Any]]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> BulkResult:
+        """
+        Update many rows by primary key using an executemany UPDATE and one
+        transaction per chunk. Each item must carry its full primary key; only the
+        attributes present on the item are updated.
+
+        :param entities: (Iterable[T | dict]) The model instances or dicts of column values.
+        :param chunk_size: (int) The maximum number of rows per UPDATE and transaction.
+        :return: (BulkResult) The primary keys of the updated rows and per-chunk timing.
+        """
+        result = BulkResult(operation="update_many")
+        for index, chunk in enumerate(chunked(entities, chunk_size)):
+            started = time.perf_counter()
+            try:
+                with self._session_scope(write=True) as session:
+                    params = [to_params(self.model, item) for item in chunk]
+                    keys = [primary_key_of(self.model, values) for values in params]
+                    session.execute(update(self.model), params)
+                    self._invalidate(keys)
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error updating chunk {index} in {self.model.__name__} table: {e}"
+                )
+                raise e
+            result.primary_keys.extend(keys)
+            self._record_chunk(result, index, len(chunk), len(chunk), started)
+        return result
+
+    def delete_many(
+        self, entities: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> BulkResult:
+        """
+        Delete many rows by primary key using one DELETE ... WHERE pk IN (...) and
+        one transaction per chunk. Relationships are not loaded, so ORM-level
+        cascades do not run.
+
+        :param entities: (Iterable) Model instances, dicts of column values or primary keys.
+        :param chunk_size: (int) The maximum number of rows per DELETE and transaction.
+        :return: (BulkResult) The primary keys submitted for deletion and per-chunk timing.
+        """
+        keys = (primary_key_of(self.model, item) for item in entities)
+        return self._delete_keys("delete_many", keys, chunk_size, "database")
+
+    def delete_by_id(self, id: Any, cascade: str = "database") -> int:
+        """
+        Delete one row by primary key with a single DELETE, without loading it.
+
+        :param id: (Any) The primary key; a tuple for composite keys.
+        :param cascade: (str) How related rows are handled, see delete_many_by_id.
+        :return: (int) The number of rows deleted, 0 or 1.
+        """
+        return self._delete_keys("delete_by_id", [id], 1, cascade).rowcount
+
+    def delete_many_by_id(
+        self,
+        ids: Iterable[Any],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        cascade: str = "database",
+    ) -> BulkResult:
+        """
+        Delete many rows by primary key using one DELETE ... WHERE pk IN (...) and one
+        transaction per chunk, without loading any rows.
+
+        :param ids: (Iterable[Any]) The primary keys; tuples for composite keys.
+        :param chunk_size: (int) The maximum number of rows per DELETE and transaction.
+        :param cascade: (str) "database" to leave related rows to the foreign keys' ON
+            DELETE actions, or "orm" to emulate the model's relationship cascades in
+            bulk first, see cascade_statements.
+        :return: (BulkResult) The primary keys submitted for deletion and per-chunk timing.
+        """
+        return self._delete_keys("delete_many_by_id", ids, chunk_size, cascade)
+
+    def delete_where(
+        self,
+        criteria: Filters,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        cascade: str = "database",
+    ) -> BulkResult:
+        """
+        Delete every row matching criteria, `chunk_size` rows per DELETE and transaction,
+        without loading any rows. Each chunk selects the keys of up to `chunk_size`
+        matching rows and deletes them by key, so a purge of millions of rows holds its
+        locks briefly and can be interrupted without losing the chunks already done.
+
+        :param criteria: (Mapping | Iterable[ColumnElement]) The filters, see where_clauses;
+            they must not be empty.
+        :param chunk_size: (int) The maximum number of rows per DELETE and transaction.
+        :param cascade: (str) How related rows are handled, see delete_many_by_id.
+        :return: (BulkResult) The primary keys of the deleted rows and per-chunk timing.
+        """
+        clauses = where_clauses(self.model, criteria)
+        if not clauses:
+            raise ValueError("Missing delete criteria for %s" % self.model.__name__)
+        self._check_cascade(cascade)
+        pk_columns = self.snapshot.primary_key_columns
+        stmt = select(*pk_columns).where(*clauses).limit(chunk_size)
+        result = BulkResult(operation="delete_where")
+        for index in itertools.count():
+            started = time.perf_counter()
+            try:
+                with self._session_scope(write=True) as session:
+                    rows = session.execute(stmt).all()
+                    keys = [row[0] if len(row) == 1 else tuple(row) for row in rows]
+                    rowcount = self._delete_chunk(session, keys, cascade) if keys else 0
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error deleting chunk {index} from {self.model.__name__} table: {e}"
+                )
+                raise e
+            if not keys:
+                break
+            result.primary_keys.extend(keys)
+            self._record_chunk(result, index, len(keys), rowcount, started)
+            if len(keys) < chunk_size or not rowcount:
+                break
+        return result
+
+    def iter_all(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        filters: Optional[Filters] = None,
+        profile: Optional[str] = None,
+    ) -> Iterator[T]:
+        """
+        Stream the rows of the table without loading them all into memory.
+
+        Rows are fetched `batch_size` at a time through a server-side cursor
+        (a named cursor on psycopg2, SSCursor on PyMySQL), so memory stays flat
+        regardless of the table size. The session stays open until the generator
+        is exhausted or closed.
+
+        :param batch_size: (int) The number of rows fetched per round trip.
+        :param filters: (Mapping | Iterable[ColumnElement]) Optional filters, see where_clauses.
+        :param profile: (str | None) The name of a loading profile, see loading_profiles.
+            Collections must use selectinload, which loads them once per batch;
+            joinedload of a collection cannot be streamed.
+        :return: (Iterator[T]) The matching entities.
+        """
+        stmt = (
+            self._select()
+            .where(*where_clauses(self.model, filters))
+            .options(*self._loader_options(profile))
+            .execution_options(yield_per=batch_size, stream_results=True)
+        )
+        try:
+            with self._session_scope() as session:
+                for entity in self._fetch(session, stmt):
+                    yield entity
+        except SQLAlchemyError as e:
+            log.error(f"Error iterating entities from {self.model.__name__} table: {e}")
             raise e
+
+    def page(
+        self,
+        after: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        order_by: Optional[OrderBy] = None,
+        descending: bool = False,
+        filters: Optional[Filters] = None,
+        profile: Optional[str] = None,
+    ) -> Page[T]:
+        """
+        Fetch one page of rows using keyset (seek) pagination.
+
+        Instead of an OFFSET, each page seeks past the sort key values of the last
+        row of the previous page, so every page costs the same index range scan
+        however deep it is. The primary key is appended to the ordering as a
+        tie-breaker; the ordering columns should be indexed and NOT NULL.
+
+        :param after: (str | None) The next_token of the previous page, or None for the first page.
+        :param limit: (int) The maximum number of rows on the page.
+        :param order_by: (OrderBy | None) Attribute names or attributes to sort by; defaults to
+            the primary key.
+        :param descending: (bool) Whether to sort in descending order.
+        :param filters: (Mapping | Iterable[ColumnElement]) Optional filters, see where_clauses.
+        :param profile: (str | None) The name of a loading profile, see loading_profiles;
+            it must load the ordering columns.
+        :return: (Page[T]) The rows of the page and the token for the next one.
+        """
+        if limit < 1:
+            raise ValueError("Page limit must be a positive integer: %s" % limit)
+        keys = sort_keys(self.model, order_by)
+        stmt = (
+            self._select()
+            .where(*where_clauses(self.model, filters))
+            .options(*self._loader_options(profile))
+        )
+        if after is not None:
+            stmt = stmt.where(
+                seek_clause(keys, decode_token(after, keys, descending), descending)
+            )
+        stmt = stmt.order_by(
+            *[key.desc() if descending else key.asc() for key in keys]
+        ).limit(limit + 1)
+        try:
+            with self._session_scope() as session:
+                items = list(self._fetch(session, stmt, unique=True))
+        except SQLAlchemyError as e:
+            log.error(f"Error paging entities from {self.model.__name__} table: {e}")
+            raise e
+        next_token = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_token = encode_token(
+                keys, [getattr(last, key.key) for key in keys], descending
+            )
+        return Page(items=items, limit=limit, next_token=next_token)
+
+    def read_row(self, id: Any) -> Optional[RowMapping]:
+        """
+        Read the column values of one row on the Core fast path.
+
+        The prebuilt SELECT of the statement cache runs directly on a pooled connection,
+        from a read replica when the database has any, or on the connection of the active
+        unit of work. No ORM instance, identity map or change tracking is involved, and
+        the read cache is not consulted.
+
+        :param id: (Any) The primary key; a tuple for composite keys.
+        :return: (RowMapping | None) The column values keyed by attribute name, None if
+            there is no such row.
+        """
+        pk_columns = self.snapshot.primary_key_columns
+        stmt = self.statements.get(
+            ("read_row",),
+            lambda: select(*self.snapshot.core_columns).where(
+                *[column == bindparam(f"pk_{i}") for i, column in enumerate(pk_columns)]
+            ),
+        )
+        values = id if len(pk_columns) > 1 else (id,)
+        params = {f"pk_{i}": value for i, value in enumerate(values)}
+        try:
+            with self._connection_scope() as connection:
+                result = connection.execute(stmt, params)
+                self.statements.record(result)
+                return result.mappings().first()
+        except SQLAlchemyError as e:
+            log.error(f"Error reading row from {self.model.__name__} table: {e}")
+            raise e
+
+    def read_rows(self, ids: Iterable[Any], chunk_size: int = 0) -> List[RowMapping]:
+        """
+        Read the column values of many rows on the Core fast path, see read_row, with
+        one cached SELECT ... WHERE pk IN (...) per chunk of keys.
+
+        :param ids: (Iterable) The primary keys; tuples for composite keys.
+        :param chunk_size: (int) An optional cap on the number of keys per query.
+        :return: (List[RowMapping]) The rows found, in request order; duplicate keys
+            are fetched once and missing keys are skipped.
+        """
+        keys = list(dict.fromkeys(ids))
+        pk_columns = self.snapshot.primary_key_columns
+        pk_names = self.snapshot.primary_key_keys
+        key_clause = pk_columns[0] if len(pk_columns) == 1 else tuple_(*pk_columns)
+        stmt = self.statements.get(
+            ("read_rows",),
+            lambda: select(*self.snapshot.core_columns).where(
+                key_clause.in_(bindparam("keys", expanding=True))
+            ),
+        )
+        found: Dict[Any, RowMapping] = {}
+        try:
+            with self._connection_scope() as connection:
+                size = max_in_list_size(
+                    connection.dialect.name, len(pk_columns), chunk_size
+                )
+                for chunk in chunked(keys, size):
+                    result = connection.execute(stmt, {"keys": chunk})
+                    self.statements.record(result)
+                    for row in result.mappings():
+                        values = tuple(row[name] for name in pk_names)
+                        found[values[0] if len(values) == 1 else values] = row
+        except SQLAlchemyError as e:
+            log.error(f"Error reading rows from {self.model.__name__} table: {e}")
+            raise e
+        return [found[key] for key in keys if key in found]
+
+    def find_by(
+        self,
+        order_by: Optional[Union[str, Sequence[str]]] = None,
+        limit: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        profile: Optional[str] = None,
+        **criteria: Any,
+    ) -> List[Any]:
+        """
+        Find the rows matching criteria, e.g.
+        `find_by(username__startswith="a", order_by="-last_updated", limit=10)`.
+
+        The statement is built once per query shape (the criteria names and operators,
+        ordering, projection and profile) with bind parameters for the values, and kept
+        in the statement cache, so repeated queries skip statement building and SQL
+        compilation whatever their values.
+
+        :param order_by: (str | Sequence[str] | None) Attribute names to sort by, each
+            descending when prefixed with "-".
+        :param limit: (int | None) The maximum number of rows.
+        :param columns: (Sequence[str] | None) Attribute names to select instead of the
+            entities; rows are then read on the Core path, see read_row.
+        :param profile: (str | None) The name of a loading profile, see loading_profiles.
+        :param criteria: (Any) The filters, keyed by attribute name with an optional
+            operator suffix, e.g. `id__in=[1, 2]`; see query.OPERATORS.
+        :return: (List[T | DTO | RowMapping]) The entities, their DTOs, or the selected
+            column values keyed by attribute name.
+        """
+        shape, params = parse_criteria(self.model, criteria)
+        order = parse_order_by(self.model, order_by)
+        options = self._loader_options(profile)
+        if limit is not None:
+            if limit < 1:
+                raise ValueError("Invalid limit: %s" % limit)
+            params["limit"] = limit
+        projection = None
+        if columns is not None:
+            projection = tuple(columns)
+            unknown = [
+                key for key in projection if key not in self.snapshot.column_by_key
+            ]
+            if not projection or unknown or options:
+                raise ValueError(
+                    "Invalid projection of %s: %s" % (self.model.__name__, projection)
+                )
+
+        def build() -> sqlalchemy.Select:
+            if projection is None:
+                stmt = self._select().options(*options)
+            else:
+                stmt = select(
+                    *[self.snapshot.column_by_key[key].label(key) for key in projection]
+                )
+            stmt = stmt.where(*criteria_clauses(self.model, shape)).order_by(
+                *order_by_clauses(self.model, order)
+            )
+            return stmt if limit is None else stmt.limit(bindparam("limit"))
+
+        stmt = self.statements.get(
+            ("find_by", shape, order, limit is not None, projection, profile), build
+        )
+        try:
+            if projection is not None:
+                with self._connection_scope() as connection:
+                    result = connection.execute(stmt, params)
+                    self.statements.record(result)
+                    return list(result.mappings())
+            with self._session_scope() as session:
+                result = session.execute(stmt, params)
+                self.statements.record(result)
+                if self.result_mode == "dto":
+                    return [self.snapshot.dto._make(row) for row in result]
+                return list(result.scalars().unique())
+        except SQLAlchemyError as e:
+            log.error(f"Error finding entities in {self.model.__name__} table: {e}")
+            raise e
+
+    def count(self, **criteria: Any) -> int:
+        """
+        Count the rows matching criteria with SELECT count(*) in the database.
+
+        :param criteria: (Any) The filters, see find_by.
+        :return: (int) The number of matching rows.
+        """
+        return self._query_scalar(
+            "count",
+            criteria,
+            lambda clauses: select(func.count())
+            .select_from(self.snapshot.table)
+            .where(*clauses),
+        )
+
+    def exists(self, **criteria: Any) -> bool:
+        """
+        Check whether any row matches criteria with SELECT EXISTS (...), which stops at
+        the first matching row.
+
+        :param criteria: (Any) The filters, see find_by.
+        :return: (bool) Whether a matching row exists.
+        """
+        return bool(
+            self._query_scalar(
+                "exists",
+                criteria,
+                lambda clauses: select(
+                    sqlalchemy.exists().select_from(self.snapshot.table).where(*clauses)
+                ),
+            )
+        )
+
+    def aggregate(self, aggregates: Sequence[str], **criteria: Any) -> Dict[str, Any]:
+        """
+        Compute aggregates of the rows matching criteria in the database, e.g.
+        `aggregate(["count__id", "max__last_updated"], name="x")`.
+
+        :param aggregates: (Sequence[str]) "function__attribute" names, with the
+            functions of query.AGGREGATES.
+        :param criteria: (Any) The filters, see find_by.
+        :return: (Dict[str, Any]) The value of each aggregate, by name; None for sum,
+            avg, min and max over no rows.
+        """
+        names = tuple(aggregates)
+        row = self._query_row(
+            ("aggregate", names),
+            criteria,
+            lambda clauses: select(*aggregate_columns(self.model, names))
+            .select_from(self.snapshot.table)
+            .where(*clauses),
+        )
+        return dict(row)
+
+    def statement_stats(self) -> StatementStats:
+        """
+        :return: (StatementStats) The counters of the statement cache of the Core read
+            paths and of find_by, count, exists and aggregate.
+        """
+        return self.statements.stats()
+
+    @contextmanager
+    def _connection_scope(self) -> Iterator[Connection]:
+        """
+        Provide the connection for one Core read: the connection of the active unit of
+        work, which sees its flushed writes, or a pooled read connection, closed after use.
+        :return: (Iterator[Connection]) The connection to use.
+        """
+        unit = UnitOfWork.current(self.database)
+        if unit is not None:
+            yield unit.session.connection()
+            return
+        connection = self.database.get_read_connection()
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _session_scope(self, write: bool = False) -> Iterator[Session]:
+        """
+        Provide the session for one repository operation.
+
+        Inside an active UnitOfWork for the same database its shared session is used
+        and writes are only flushed. Otherwise a new session is opened, committed when
+        `write` is True, rolled back on error and closed. Reads outside a unit of work
+        go to a read replica when the database has any.
+
+        :param write: (bool) Whether the operation writes and must be committed.
+        :return: (Iterator[Session]) The session to use.
+        """
+        unit = UnitOfWork.current(self.database)
+        if unit is not None:
+            yield unit.session
+            if write:
+                unit.session.flush()
+            return
+        if write:
+            session = self.database.get_session(expire_on_commit=False)
+        else:
+            session = self.database.get_read_session(expire_on_commit=False)
+        try:
+            yield session
+            if write:
+                session.commit()
+                self.database.mark_write()
+        except BaseException:
+            session.rollback()
+            raise
         finally:
             session.close()
 
+    def _column_values(self, entity: Any) -> Dict[str, Any]:
+        """
+        :return: (dict) The column attribute values of the entity or DTO.
+        """
+        if isinstance(entity, self.snapshot.dto):
+            return entity._asdict()
+        return self.snapshot.values(entity)
+
+    def _result(self, entity: T) -> Any:
+        """
+        :return: (T | DTO) A new instance holding the column values of a written
+            entity, or its DTO.
+        """
+        if self.result_mode == "dto":
+            return self.snapshot.to_dto(entity)
+        return self.snapshot.instance(self.snapshot.values(entity))
+
+    def _from_values(self, values: Dict[str, Any]) -> Any:
+        """
+        :return: (T | DTO) A detached instance, or a DTO, built from cached column values.
+        """
+        if self.result_mode == "dto":
+            return self.snapshot.to_dto(values)
+        entity = self.snapshot.instance(values)
+        make_transient_to_detached(entity)
+        return entity
+
+    def _select(self) -> sqlalchemy.Select:
+        """
+        :return: (Select) A SELECT of the entities, or of their columns in "dto" mode.
+        """
+        if self.result_mode == "dto":
+            return select(*self.snapshot.columns)
+        return select(self.model)
+
+    def _fetch(
+        self, session: Session, stmt: sqlalchemy.Select, unique: bool = False
+    ) -> Iterator[Any]:
+        """
+        :param unique: (bool) Whether to deduplicate entities, as joined eager loading
+            of collections requires; not for streamed statements.
+        :return: (Iterator[T | DTO]) The entities, or DTOs, of a statement from `_select`.
+        """
+        if self.result_mode == "dto":
+            make = self.snapshot.dto._make
+            return (make(row) for row in session.execute(stmt))
+        result = session.scalars(stmt)
+        return iter(result.unique() if unique else result)
+
+    def _loader_options(self, profile: Optional[str]) -> Tuple[Any, ...]:
+        """
+        :return: (tuple) The loader options of a loading profile, none without a profile.
+        """
+        if profile is None:
+            return ()
+        if profile not in self.loading_profiles:
+            raise ValueError("Invalid loading profile: %s" % profile)
+        if self.result_mode != "orm":
+            raise ValueError(
+                "Loading profiles require the orm result mode: %s" % profile
+            )
+        return tuple(self.loading_profiles[profile])
+
+    def _from_row(self, row: RowMapping) -> Any:
+        """
+        :return: (T | DTO) A new instance holding the values of a row, or its DTO.
+        """
+        if self.result_mode == "dto":
+            return self.snapshot.to_dto(row)
+        return self.snapshot.instance(row)
+
+    def _given_key(self, values: Dict[str, Any]) -> Any:
+        """
+        :return: (Any) The primary key given in a dict of column values, None if incomplete.
+        """
+        key = tuple(values.get(name) for name in self.snapshot.primary_key_keys)
+        if any(value is None for value in key):
+            return None
+        return key[0] if len(key) == 1 else key
+
+    def _update_in_place_changes(self, entity: Any) -> Dict[str, Any]:
+        """
+        :return: (dict) The modified column values `update` can write with a single
+            UPDATE ... WHERE pk, by attribute name; empty if the entity must be merged.
+        """
+        if type(entity) is not self.model or UnitOfWork.current(self.database):
+            return {}
+        values = entity.__dict__
+        if any(key in values for key in self.snapshot.relationship_keys):
+            return {}
+        if self._given_key(values) is None:
+            return {}
+        # Only the modified columns, so that unmodified onupdate columns still refresh
+        attrs = sqlalchemy.inspect(entity).attrs
+        pk_keys = self.snapshot.primary_key_keys
+        return {
+            key: values[key]
+            for key in self.snapshot.column_keys
+            if key in values and key not in pk_keys and attrs[key].history.has_changes()
+        }
+
+    def _build_upsert(
+        self,
+        dialect: Any,
+        conflict_keys: Tuple[str, ...],
+        update_keys: Tuple[str, ...],
+        returning: bool,
+    ) -> Any:
+        """
+        :return: (Insert) The upsert statement, returning the rows if asked to.
+        """
+        stmt = upsert_statement(self.model, dialect.name, conflict_keys, update_keys)
+        if not returning:
+            return stmt
+        return stmt.returning(
+            *self.snapshot.core_columns,
+            sort_by_parameter_order=bool(
+                update_keys
+                and dialect.insert_executemany_returning_sort_by_parameter_order
+            ),
+        )
+
+    def _select_by(
+        self, session: Session, keys: Tuple[str, ...], params: List[Dict[str, Any]]
+    ) -> List[RowMapping]:
+        """
+        Read rows back by the values of some of their columns, in the order of `params`.
+        Rows whose values are incomplete are skipped.
+        """
+        wanted = [
+            tuple(values.get(key) for key in keys)
+            for values in params
+            if all(values.get(key) is not None for key in keys)
+        ]
+        if not wanted:
+            return []
+        columns = [self.snapshot.column_by_key[key] for key in keys]
+        clause = (
+            columns[0].in_([value[0] for value in wanted])
+            if len(columns) == 1
+            else tuple_(*columns).in_(wanted)
+        )
+        rows = {
+            tuple(row[key] for key in keys): row
+            for row in session.execute(
+                select(*self.snapshot.core_columns).where(clause)
+            ).mappings()
+        }
+        return [rows[value] for value in wanted if value in rows]
+
+    @staticmethod
+    def _last_by_key(
+        keys: Tuple[str, ...], params: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Keep the last of the rows sharing the same values of the conflict columns, as
+        one statement cannot update a row twice. Rows with incomplete values are kept.
+        """
+        unique: Dict[Any, Dict[str, Any]] = {}
+        for values in params:
+            key: Any = tuple(values.get(name) for name in keys)
+            if any(value is None for value in key):
+                key = object()
+            unique.pop(key, None)
+            unique[key] = values
+        return list(unique.values())
+
+    def _group_by_columns(
+        self, params: List[Dict[str, Any]]
+    ) -> List[Tuple[Tuple[str, ...], List[Dict[str, Any]]]]:
+        """
+        Group rows by the columns they give, in column order, preserving input order
+        within each group.
+        """
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for values in params:
+            columns = tuple(key for key in self.snapshot.column_keys if key in values)
+            groups.setdefault(columns, []).append(values)
+        return list(groups.items())
+
+    def _read_dto(self, session: Session, id: Any) -> Any:
+        """
+        :return: (DTO | None) The DTO of the row with a primary key, None if there is none.
+        """
+        pk_columns = self.snapshot.primary_key_columns
+        values = id if len(pk_columns) > 1 else (id,)
+        stmt = self._select().where(
+            *[column == value for column, value in zip(pk_columns, values)]
+        )
+        return next(self._fetch(session, stmt), None)
+
+    def _key_of(self, entity: Any) -> Any:
+        """
+        :return: (Any) The primary key of a loaded entity, DTO or row mapping; a tuple
+            for composite keys.
+        """
+        if isinstance(entity, RowMapping):
+            values = tuple(entity[key] for key in self.snapshot.primary_key_keys)
+        elif self.result_mode == "dto":
+            values = tuple(
+                getattr(entity, key) for key in self.snapshot.primary_key_keys
+            )
+        else:
+            values = sqlalchemy.inspect(entity).identity
+        return values[0] if len(values) == 1 else values
+
+    def _invalidate(self, keys: List[Any]) -> None:
+        """
+        Drop written rows from the read cache. Inside a unit of work they are dropped
+        again after it commits, so that a concurrent read cannot re-cache the old row.
+        :param keys: (List) The primary keys of the written rows.
+        """
+        if self.cache is None:
+            return
+        cache_keys = [(self.model, key) for key in keys]
+        self.cache.invalidate(cache_keys)
+        unit = UnitOfWork.current(self.database)
+        if unit is not None:
+            unit.on_commit(lambda: self.cache.invalidate(cache_keys))
+
+    def _invalidate_model(self) -> None:
+        """
+        Drop every row of the model from the read cache, for writes whose rows are not
+        known; again after the unit of work commits, like _invalidate.
+        """
+        if self.cache is None:
+            return
+        self.cache.invalidate_model(self.model)
+        unit = UnitOfWork.current(self.database)
+        if unit is not None:
+            unit.on_commit(lambda: self.cache.invalidate_model(self.model))
+
+    def _update_rows(
+        self,
+        operation: str,
+        clauses: List[Any],
+        changes: Dict[str, Any],
+        keys: Optional[List[Any]] = None,
+    ) -> UpdateResult:
+        """
+        Run an ORM-enabled UPDATE ... WHERE, returning the new values where supported.
+        Objects of an active unit of work are kept in sync with the new values.
+        """
+        unknown = [key for key in changes if key not in self.snapshot.column_by_key]
+        if not changes or unknown:
+            raise ValueError(
+                "Invalid update columns for %s: %s"
+                % (self.model.__name__, unknown or "none given")
+            )
+        stmt = update(self.model).where(*clauses).values(**changes)
+        synchronize = "auto" if UnitOfWork.current(self.database) else False
+        result = UpdateResult()
+        try:
+            with self._session_scope(write=True) as session:
+                returning = session.get_bind().dialect.update_returning
+                if returning:
+                    stmt = stmt.returning(*self.snapshot.columns)
+                cursor = session.execute(
+                    stmt, execution_options={"synchronize_session": synchronize}
+                )
+                if returning:
+                    rows = list(cursor.mappings())
+                    keys = [self._key_of(row) for row in rows]
+                    result.items = [self._from_row(row) for row in rows]
+                    result.rowcount = len(rows)
+                else:
+                    result.rowcount = cursor.rowcount
+        except SQLAlchemyError as e:
+            log.error(f"Error in {operation} on {self.model.__name__} table: {e}")
+            raise e
+        if keys is None:
+            self._invalidate_model()
+        else:
+            self._invalidate(keys)
+            result.primary_keys = keys if result.rowcount else []
+        return result
+
+    def _query_row(
+        self,
+        operation: Tuple[Any, ...],
+        criteria: Dict[str, Any],
+        build: Callable[[List[Any]], sqlalchemy.Select],
+    ) -> RowMapping:
+        """
+        Run the cached statement of a query over the rows matching criteria on the
+        Core path, and return its single row.
+        """
+        shape, params = parse_criteria(self.model, criteria)
+        stmt = self.statements.get(
+            operation + (shape,),
+            lambda: build(criteria_clauses(self.model, shape)),
+        )
+        try:
+            with self._connection_scope() as connection:
+                result = connection.execute(stmt, params)
+                self.statements.record(result)
+                return result.mappings().one()
+        except SQLAlchemyError as e:
+            log.error(f"Error querying {operation[0]} on {self.model.__name__}: {e}")
+            raise e
+
+    def _query_scalar(
+        self,
+        operation: str,
+        criteria: Dict[str, Any],
+        build: Callable[[List[Any]], sqlalchemy.Select],
+    ) -> Any:
+        """
+        :return: (Any) The single value of a query, see _query_row.
+        """
+        row = self._query_row((operation,), criteria, build)
+        return next(iter(row.values()))
+
+    def _check_cascade(self, cascade: str) -> None:
+        if cascade not in CASCADES:
+            raise ValueError("Invalid cascade: %s" % cascade)
+
+    def _delete_keys(
+        self, operation: str, keys: Iterable[Any], chunk_size: int, cascade: str
+    ) -> BulkResult:
+        """
+        Delete rows by primary key, one DELETE and transaction per chunk.
+        """
+        self._check_cascade(cascade)
+        result = BulkResult(operation=operation)
+        for index, chunk in enumerate(chunked(keys, chunk_size)):
+            started = time.perf_counter()
+            try:
+                with self._session_scope(write=True) as session:
+                    rowcount = self._delete_chunk(session, chunk, cascade)
+            except SQLAlchemyError as e:
+                log.error(
+                    f"Error deleting chunk {index} from {self.model.__name__} table: {e}"
+                )
+                raise e
+            result.primary_keys.extend(chunk)
+            self._record_chunk(result, index, len(chunk), rowcount, started)
+        return result
+
+    def _delete_chunk(self, session: Session, keys: List[Any], cascade: str) -> int:
+        """
+        Delete the rows of a chunk of keys, after the emulated ORM cascades if asked.
+        Objects of an active unit of work are kept in sync; otherwise no session state
+        is touched.
+        :return: (int) The number of rows deleted.
+        """
+        pk_columns = self.snapshot.primary_key_columns
+        key_clause = pk_columns[0] if len(pk_columns) == 1 else tuple_(*pk_columns)
+        clause = key_clause.in_(keys)
+        synchronize = "auto" if UnitOfWork.current(self.database) else False
+        options = {"synchronize_session": synchronize}
+        if cascade == "orm":
+            for target, stmt in cascade_statements(self.model, clause):
+                session.execute(stmt)
+                if self.cache is not None and isinstance(target, type):
+                    self.cache.invalidate_model(target)
+        cursor = session.execute(
+            delete(self.model).where(clause), execution_options=options
+        )
+        self._invalidate(keys)
+        return cursor.rowcount
+
+    def _invalidate_entity(self, entity: T) -> None:
+        """
+        Drop a written entity from the read cache, using its persistent identity.
+        """
+        if self.cache is None:
+            return
+        identity = sqlalchemy.inspect(entity).identity
+        if identity is not None:
+            self._invalidate([identity[0] if len(identity) == 1 else identity])
+
+    def _record_chunk(
+        self, result: BulkResult, index: int, size: int, rowcount: int, started: float
+    ) -> None:
+        """
+        Append the timing of a finished chunk to a bulk result.
+        """
+        elapsed = time.perf_counter() - started
+        result.chunks.append(ChunkResult(index, size, rowcount, elapsed))
+        log.debug(
+            f"{result.operation} chunk {index} on {self.model.__name__}: "
+            f"{size} rows in {elapsed * 1000:.2f} ms"
+        )
+
     def __dict__(self):
         return {"database": self.database.__dict__(), "model": self.model.__name__}
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the result objects returned by the repository bulk, batch and paging operations.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+# ---------------------------------------------------------
+@dataclass
+class ChunkResult:
+    """
+    Timing and row count for a single chunk of a bulk operation.
+
+    Attributes:
+        index (int): The position of the chunk in the operation, starting at 0.
+        size (int): The number of items submitted in the chunk.
+        rowcount (int): The number of rows the database reported as affected.
+        elapsed (float): The wall time spent on the chunk, including the commit, in seconds.
+    """
+
+    index: int
+    size: int
+    rowcount: int
+    elapsed: float
+
+
+# ---------------------------------------------------------
+@dataclass
+class BulkResult:
+    """
+    The outcome of a bulk create, update or delete operation.
+
+    Attributes:
+        operation (str): The name of the operation, e.g. "create_many".
+        primary_keys (List[Any]): The primary keys of the affected rows, in input order.
+            Composite keys are returned as tuples.
+        chunks (List[ChunkResult]): The per-chunk timing and row counts.
+        items (List[Any]): The resulting rows, for operations asked to return them.
+    """
+
+    operation: str
+    primary_keys: List[Any] = field(default_factory=list)
+    chunks: List[ChunkResult] = field(default_factory=list)
+    items: List[Any] = field(default_factory=list)
+
+    @property
+    def rowcount(self) -> int:
+        """
+        :return: (int) The total number of rows affected across all chunks.
+        """
+        return sum(chunk.rowcount for chunk in self.chunks)
+
+    @property
+    def elapsed(self) -> float:
+        """
+        :return: (float) The total time spent across all chunks, in seconds.
+        """
+        return sum(chunk.elapsed for chunk in self.chunks)
+
+
+# ---------------------------------------------------------
+@dataclass
+class UpdateResult:
+    """
+    The outcome of an UPDATE ... WHERE issued without loading the rows.
+
+    Attributes:
+        rowcount (int): The number of rows matched by the UPDATE.
+        primary_keys (List[Any]): The primary keys of the updated rows, where known:
+            the key of update_fields, or the keys of the returned rows.
+        items (List[Any]): The updated rows with their new values, on dialects that
+            support UPDATE ... RETURNING (PostgreSQL, SQLite); empty elsewhere.
+    """
+
+    rowcount: int = 0
+    primary_keys: List[Any] = field(default_factory=list)
+    items: List[Any] = field(default_factory=list)
+
+
+# ---------------------------------------------------------
+@dataclass
+class Page(Generic[T]):
+    """
+    One page of a keyset-paginated query.
+
+    Attributes:
+        items (List[T]): The entities on the page, in sort order.
+        limit (int): The maximum number of entities requested for the page.
+        next_token (Optional[str]): The opaque continuation token to pass as `after`
+            to fetch the next page, or None if this is the last page.
+    """
+
+    items: List[T]
+    limit: int
+    next_token: Optional[str] = None
+
+    @property
+    def has_more(self) -> bool:
+        """
+        :return: (bool) Whether another page follows this one.
+        """
+        return self.next_token is not None
+
+
+# ---------------------------------------------------------
+@dataclass
+class ReadManyResult(Generic[T]):
+    """
+    The outcome of a batched primary key fetch.
+
+    Attributes:
+        items (List[T]): The entities found, in the order their keys were requested.
+        missing (List[Any]): The requested keys that matched no row, in request order.
+        by_key (Dict[Any, T]): The entities found, keyed by primary key.
+    """
+
+    items: List[T] = field(default_factory=list)
+    missing: List[Any] = field(default_factory=list)
+    by_key: Dict[Any, T] = field(default_factory=dict, repr=False)
+
+    def get(self, key: Any) -> Optional[T]:
+        """
+        :param key: (Any) A requested primary key.
+        :return: (T | None) The entity with that key, or None if it was missing.
+        """
+        return self.by_key.get(key)
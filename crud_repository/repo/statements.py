@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the statement cache used by the Core read paths and the queries of
+Repository.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable
+
+from sqlalchemy import Executable
+from sqlalchemy.engine import CursorResult, interfaces
+
+
+# ---------------------------------------------------------
+@dataclass
+class StatementStats:
+    """
+    A point-in-time copy of the counters of a StatementCache.
+
+    Attributes:
+        statements (int): The statements built and kept by the cache.
+        executions (int): The executions of cached statements.
+        compiled_hits (int): Executions that reused SQL compiled by the engine.
+        compiled_misses (int): Executions that compiled their statement first.
+        uncached (int): Executions whose statement could not be cached by the engine.
+    """
+
+    statements: int = 0
+    executions: int = 0
+    compiled_hits: int = 0
+    compiled_misses: int = 0
+    uncached: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        :return: (float) The share of executions that reused compiled SQL, 0.0 if none ran.
+        """
+        return self.compiled_hits / self.executions if self.executions else 0.0
+
+
+# ---------------------------------------------------------
+class StatementCache:
+    """
+    A thread-safe store of prebuilt statements, keyed by the shape of the query.
+
+    A statement is built once, with bind parameters for its values, and reused for
+    every execution. Its cache key is then generated once and memoized on the
+    statement, and the engine's compiled cache returns the same SQL string each time,
+    so an execution costs no Python-side statement building or compilation.
+
+    Executions are recorded with the compiled cache outcome reported by the engine.
+    """
+
+    def __init__(self):
+        """
+        Initialize the StatementCache.
+        """
+        self._statements: Dict[Hashable, Executable] = {}
+        self._lock = threading.Lock()
+        self._stats = StatementStats()
+
+    def get(self, key: Hashable, build: Callable[[], Executable]) -> Executable:
+        """
+        Get the statement for a query shape, building it on first use.
+        :param key: (Hashable) The shape of the query, e.g. ("read_row",).
+        :param build: (Callable) Builds the statement, with bind parameters for its values.
+        :return: (Executable) The cached statement.
+        """
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = build()
+            with self._lock:
+                statement = self._statements.setdefault(key, statement)
+                self._stats.statements = len(self._statements)
+        return statement
+
+    def record(self, result: Any) -> None:
+        """
+        Count an execution of a cached statement by its compiled cache outcome.
+        :param result: (Result) The result of the execution; ORM results are read
+            through the cursor result they wrap.
+        """
+        if not isinstance(result, CursorResult):
+            result = getattr(result, "raw", None)
+        context = result.context if isinstance(result, CursorResult) else None
+        outcome = getattr(context, "cache_hit", None)
+        with self._lock:
+            self._stats.executions += 1
+            if outcome is interfaces.CacheStats.CACHE_HIT:
+                self._stats.compiled_hits += 1
+            elif outcome is interfaces.CacheStats.CACHE_MISS:
+                self._stats.compiled_misses += 1
+            else:
+                self._stats.uncached += 1
+
+    def stats(self) -> StatementStats:
+        """
+        :return: (StatementStats) A copy of the current counters.
+        """
+        with self._lock:
+            return StatementStats(**vars(self._stats))
+
+    def clear(self) -> None:
+        """
+        Drop every cached statement and reset the counters.
+        """
+        with self._lock:
+            self._statements.clear()
+            self._stats = StatementStats()
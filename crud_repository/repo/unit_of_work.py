@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides the UnitOfWork context manager, which lets several repositories
+share one session and commit their changes in a single transaction.
+"""
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, SessionTransaction
+
+from crud_repository.db.idatabase import IDatabase
+from crud_repository.my_logger.logger import CustomLogger
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+
+# The units of work entered in the current thread or task, innermost last.
+_active_units: ContextVar[Tuple["UnitOfWork", ...]] = ContextVar(
+    "crud_repository_active_units", default=()
+)
+
+
+# ---------------------------------------------------------
+class UnitOfWork:
+    """
+    A transaction boundary shared by every repository of a database.
+
+    While a unit of work is active, any Repository bound to the same database uses
+    its session: writes are flushed instead of committed, and everything is committed
+    together when the block exits without an error, or rolled back otherwise.
+    Nested units of work on the same database run inside a savepoint.
+
+    Example:
+        with UnitOfWork(database):
+            user = user_repo.create(User(username="alice", password="secret"))
+            email_repo.create(Email(email="alice@example.com", user_id=user.id))
+
+    Attributes:
+        database (IDatabase): The database the unit of work is bound to.
+        session (Session): The session shared by the repositories, set on enter.
+    """
+
+    def __init__(self, database: IDatabase):
+        """
+        Initialize the UnitOfWork.
+        :param database: (IDatabase) The database to open the session on.
+        """
+        self.database = database
+        self.session: Optional[Session] = None
+        self._savepoint: Optional[SessionTransaction] = None
+        self._root: "UnitOfWork" = self
+        self._on_commit: List[Callable[[], None]] = []
+
+    @staticmethod
+    def current(database: IDatabase) -> Optional["UnitOfWork"]:
+        """
+        Get the innermost active unit of work for a database.
+        :param database: (IDatabase) The database to look up.
+        :return: (UnitOfWork | None) The active unit of work, or None outside of one.
+        """
+        for unit in reversed(_active_units.get()):
+            if unit.database is database:
+                return unit
+        return None
+
+    def __enter__(self) -> "UnitOfWork":
+        outer = UnitOfWork.current(self.database)
+        if outer is not None:
+            self.session = outer.session
+            self._savepoint = self.session.begin_nested()
+            self._root = outer._root
+        else:
+            self.session = self.database.get_session(expire_on_commit=False)
+        _active_units.set(_active_units.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        _active_units.set(tuple(u for u in _active_units.get() if u is not self))
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            if self._savepoint is None:
+                self.session.close()
+        return False
+
+    def flush(self) -> None:
+        """
+        Flush the pending changes of the shared session to the database.
+        """
+        self.session.flush()
+
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback to run once the outermost unit of work has committed,
+        e.g. to invalidate cached rows written inside it.
+        :param callback: (Callable) The function to call without arguments.
+        """
+        self._root._on_commit.append(callback)
+
+    def commit(self) -> None:
+        """
+        Commit the unit of work. A nested unit of work releases its savepoint instead.
+        """
+        try:
+            if self._savepoint is not None:
+                self._savepoint.commit()
+            else:
+                self.session.commit()
+        except SQLAlchemyError as e:
+            self.rollback()
+            log.error(f"Error committing unit of work: {e}")
+            raise e
+        if self._savepoint is None:
+            self.database.mark_write()
+            callbacks, self._on_commit = self._on_commit, []
+            for callback in callbacks:
+                callback()
+
+    def rollback(self) -> None:
+        """
+        Roll back the unit of work. A nested unit of work rolls back to its savepoint.
+        """
+        if self._savepoint is not None:
+            if self._savepoint.is_active:
+                self._savepoint.rollback()
+        else:
+            self.session.rollback()
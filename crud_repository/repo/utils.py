@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+This module provides helper functions shared by the repository implementations.
+"""
+import operator
+import sqlite3
+from collections import namedtuple
+from functools import lru_cache
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+import sqlalchemy
+from sqlalchemy import Column, ColumnElement
+from sqlalchemy.orm import MANYTOMANY, ONETOMANY
+
+from crud_repository.model.base import Base
+
+# The maximum number of bound parameters per statement, by dialect name.
+MAX_BIND_PARAMETERS = {
+    "postgresql": 32767,
+    "mysql": 65535,
+    "mariadb": 65535,
+    "sqlite": 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999,
+}
+DEFAULT_MAX_BIND_PARAMETERS = 999
+# The dialects with a native upsert, see upsert_statement.
+UPSERT_DIALECTS = ("postgresql", "sqlite", "mysql", "mariadb")
+# How the rows related to deleted rows are handled, see cascade_statements.
+CASCADES = ("database", "orm")
+
+
+# ---------------------------------------------------------
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split an iterable into lists of at most `size` items without materializing it.
+
+    :param items: (Iterable) The items to split.
+    :param size: (int) The maximum number of items per chunk.
+    :return: (Iterator[List]) The chunks, in input order.
+    """
+    if size < 1:
+        raise ValueError("Chunk size must be a positive integer: %s" % size)
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---------------------------------------------------------
+class ModelSnapshot:
+    """
+    The column layout of a mapped model, inspected once and shared by every repository
+    of the model; get it with `model_snapshot(model)`.
+
+    Besides the column and primary key names it precompiles an accessor reading all the
+    column values of an instance at once, and a DTO type: a namedtuple with one field per
+    column attribute, which holds a row without ORM instrumentation.
+
+    Attributes:
+        model (Type[Base]): The mapped model class.
+        column_keys (Tuple[str, ...]): The column attribute names, in mapper order.
+        columns (Tuple[InstrumentedAttribute, ...]): The column attributes, to select rows.
+        core_columns (Tuple[ColumnElement, ...]): The table columns, keyed by attribute name.
+        table (Table): The table of the model.
+        column_by_key (Dict[str, Column]): The table column of each column attribute.
+        relationship_keys (Tuple[str, ...]): The relationship attribute names.
+        primary_key_keys (Tuple[str, ...]): The primary key attribute names.
+        primary_key_columns (Tuple[Column, ...]): The primary key columns.
+        dto (Type[tuple]): The namedtuple type of the model's DTOs.
+    """
+
+    def __init__(self, model: Type[Base]):
+        """
+        Initialize the ModelSnapshot.
+        :param model: (Type[Base]) The mapped model class.
+        """
+        mapper = sqlalchemy.inspect(model)
+        self.model = model
+        self.column_keys = tuple(attr.key for attr in mapper.column_attrs)
+        self.columns = tuple(getattr(model, key) for key in self.column_keys)
+        # The table columns labeled with their attribute names, for Core statements
+        self.core_columns = tuple(
+            (
+                prop.columns[0]
+                if prop.columns[0].key == prop.key
+                else prop.columns[0].label(prop.key)
+            )
+            for prop in mapper.column_attrs
+        )
+        self.primary_key_columns = tuple(mapper.primary_key)
+        self.table = mapper.local_table
+        self.column_by_key = {prop.key: prop.columns[0] for prop in mapper.column_attrs}
+        self.relationship_keys = tuple(prop.key for prop in mapper.relationships)
+        self.primary_key_keys = tuple(
+            mapper.get_property_by_column(column).key for column in mapper.primary_key
+        )
+        self.dto = namedtuple(f"{model.__name__}Row", self.column_keys, rename=True)
+        self._new_instance: Callable[[], Base] = mapper.class_manager.new_instance
+        getter = operator.attrgetter(*self.column_keys)
+        if len(self.column_keys) == 1:
+            self._get_values = lambda entity: (getter(entity),)
+        else:
+            self._get_values = getter
+
+    def values(self, entity: Base) -> Dict[str, Any]:
+        """
+        Read the column values of an instance; expired attributes are loaded.
+        :param entity: (Base) The model instance.
+        :return: (dict) The column values keyed by attribute name.
+        """
+        return dict(zip(self.column_keys, self._get_values(entity)))
+
+    def instance(self, values: Mapping[str, Any]) -> Base:
+        """
+        Build a transient instance from column values, without running the model's
+        constructor or recording attribute history, as the ORM does for loaded rows.
+        :param values: (Mapping) The column values keyed by attribute name.
+        :return: (Base) The new instance.
+        """
+        entity = self._new_instance()
+        entity.__dict__.update(values)
+        return entity
+
+    def to_dto(self, source: Union[Base, Mapping[str, Any], Iterable[Any]]) -> Any:
+        """
+        Build a DTO from an instance, a mapping of column values or a row of values
+        in column order.
+        :param source: (Base | Mapping | Iterable) The values.
+        :return: (tuple) The DTO.
+        """
+        if isinstance(source, self.model):
+            return self.dto._make(self._get_values(source))
+        if isinstance(source, Mapping):
+            return self.dto._make(source[key] for key in self.column_keys)
+        return self.dto._make(source)
+
+
+# ---------------------------------------------------------
+@lru_cache(maxsize=None)
+def model_snapshot(model: Type[Base]) -> ModelSnapshot:
+    """
+    Get the ModelSnapshot of a mapped model, built on first use and cached.
+
+    :param model: (Type[Base]) The mapped model class.
+    :return: (ModelSnapshot) The snapshot.
+    """
+    return ModelSnapshot(model)
+
+
+# ---------------------------------------------------------
+def primary_key_columns(model: Type[Base]) -> Tuple[Column, ...]:
+    """
+    Get the primary key columns of a mapped model.
+
+    :param model: (Type[Base]) The mapped model class.
+    :return: (Tuple[Column, ...]) The primary key columns, in mapper order.
+    """
+    return model_snapshot(model).primary_key_columns
+
+
+# ---------------------------------------------------------
+def primary_key_attributes(model: Type[Base]) -> List[Any]:
+    """
+    Get the ORM attributes mapped to the primary key columns of a model.
+
+    :param model: (Type[Base]) The mapped model class.
+    :return: (List[InstrumentedAttribute]) The primary key attributes, in mapper order.
+    """
+    return [getattr(model, key) for key in model_snapshot(model).primary_key_keys]
+
+
+# ---------------------------------------------------------
+def assign_primary_keys(model: Type[Base], items: List[Any], keys: List[Any]) -> None:
+    """
+    Copy generated primary keys back onto the model instances of a chunk.
+    Dicts in the chunk are left untouched.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param items: (List) The model instances or dicts that were inserted.
+    :param keys: (List) The generated primary keys, in the same order as `items`.
+    """
+    if len(keys) != len(items):
+        return
+    names = model_snapshot(model).primary_key_keys
+    for item, key in zip(items, keys):
+        if isinstance(item, model):
+            values = key if len(names) > 1 else (key,)
+            for name, value in zip(names, values):
+                setattr(item, name, value)
+
+
+# ---------------------------------------------------------
+def to_params(model: Type[Base], item: Any) -> Dict[str, Any]:
+    """
+    Convert a model instance or a dict into a dict of column attribute values.
+
+    Only attributes that were set on the instance are included, so that column
+    defaults still apply to the ones that were left out.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param item: (Base | dict) The model instance or dict of values.
+    :return: (dict) The column values keyed by attribute name.
+    """
+    if isinstance(item, dict):
+        return dict(item)
+    if not isinstance(item, model):
+        raise TypeError(
+            "Expected a %s instance or a dict, got %s"
+            % (model.__name__, type(item).__name__)
+        )
+    state_dict = item.__dict__
+    return {
+        key: state_dict[key]
+        for key in model_snapshot(model).column_keys
+        if key in state_dict
+    }
+
+
+# ---------------------------------------------------------
+def to_column_params(model: Type[Base], values: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Re-key a dict of column attribute values by the keys of the table columns, for
+    Core statements on the model's table.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param values: (Mapping) The column values keyed by attribute name.
+    :return: (dict) The column values keyed by column key.
+    """
+    columns = model_snapshot(model).column_by_key
+    return {columns[key].key: value for key, value in values.items()}
+
+
+# ---------------------------------------------------------
+def primary_key_of(model: Type[Base], item: Any) -> Any:
+    """
+    Get the primary key of a model instance, a dict of values or a raw key.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param item: (Base | dict | Any) The model instance, dict of values or the key itself.
+    :return: (Any) The primary key; a tuple for composite keys.
+    """
+    keys = model_snapshot(model).primary_key_keys
+    if isinstance(item, (model, dict)):
+        params = to_params(model, item)
+        missing = [key for key in keys if params.get(key) is None]
+        if missing:
+            raise ValueError(
+                "Missing primary key value(s) %s for %s" % (missing, model.__name__)
+            )
+        values = tuple(params[key] for key in keys)
+        return values[0] if len(values) == 1 else values
+    if len(keys) > 1 and (not isinstance(item, tuple) or len(item) != len(keys)):
+        raise ValueError(
+            "Expected a %d-tuple primary key for %s, got %r"
+            % (len(keys), model.__name__, item)
+        )
+    return item
+
+
+# ---------------------------------------------------------
+Filters = Union[Mapping[str, Any], Iterable[ColumnElement]]
+
+
+def where_clauses(model: Type[Base], filters: Optional[Filters]) -> List[ColumnElement]:
+    """
+    Build WHERE clauses from a mapping of attribute names to values, or pass through
+    a sequence of SQLAlchemy expressions unchanged.
+
+    In a mapping, a list, tuple or set value becomes an IN, None becomes IS NULL and
+    any other value an equality test.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param filters: (Mapping | Iterable[ColumnElement] | None) The filters to apply.
+    :return: (List[ColumnElement]) The clauses, to be combined with AND.
+    """
+    if not filters:
+        return []
+    if not isinstance(filters, Mapping):
+        return list(filters)
+    clauses = []
+    for name, value in filters.items():
+        attr = getattr(model, name, None)
+        if attr is None:
+            raise ValueError("%s has no attribute %r" % (model.__name__, name))
+        if isinstance(value, (list, tuple, set, frozenset)):
+            clauses.append(attr.in_(list(value)))
+        elif value is None:
+            clauses.append(attr.is_(None))
+        else:
+            clauses.append(attr == value)
+    return clauses
+
+
+# ---------------------------------------------------------
+def upsert_statement(
+    model: Type[Base],
+    dialect_name: str,
+    conflict_keys: Iterable[str],
+    update_keys: Iterable[str],
+) -> Any:
+    """
+    Build an INSERT that updates the existing row on a key conflict: INSERT ... ON
+    CONFLICT DO UPDATE on PostgreSQL and SQLite, INSERT ... ON DUPLICATE KEY UPDATE on
+    MySQL and MariaDB. Without update columns a conflicting row is left as it is.
+
+    Column `onupdate` defaults are not applied by these statements on their own, so
+    those of the columns not being updated explicitly are added to the update. SQL
+    expressions, e.g. func.now(), are inlined; Python callables become bind parameters,
+    whose values must be given with every execution, see onupdate_params.
+
+    MySQL and MariaDB resolve the conflict on any unique key and ignore `conflict_keys`.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param dialect_name: (str) The SQLAlchemy dialect name, e.g. "postgresql".
+    :param conflict_keys: (Iterable[str]) The attribute names of the conflict target,
+        the columns of a primary key or unique constraint.
+    :param update_keys: (Iterable[str]) The attribute names of the columns to update.
+    :return: (Insert) The dialect-specific Core INSERT into the model's table, to
+        execute with dicts of values keyed by column key, see to_column_params.
+    """
+    snapshot = model_snapshot(model)
+    conflict = [snapshot.column_by_key[key] for key in conflict_keys]
+    update_set: Dict[Any, Any] = {}
+    if dialect_name in ("postgresql", "sqlite"):
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(snapshot.table)
+        proposed = stmt.excluded
+    elif dialect_name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+
+        stmt = dialect_insert(snapshot.table)
+        proposed = stmt.inserted
+    else:
+        raise ValueError("Upsert is not supported by dialect: %s" % dialect_name)
+    for key in update_keys:
+        column = snapshot.column_by_key[key]
+        update_set[column] = proposed[column.key]
+    if update_set:
+        for column in snapshot.column_by_key.values():
+            onupdate = column.onupdate
+            if onupdate is None or column in update_set:
+                continue
+            if onupdate.is_callable:
+                update_set[column] = sqlalchemy.bindparam(
+                    _onupdate_param(column), type_=column.type
+                )
+            else:
+                update_set[column] = onupdate.arg
+    if dialect_name in ("mysql", "mariadb"):
+        if not update_set:
+            # A no-op assignment turns the duplicate key error into "row unchanged"
+            column = conflict[0] if conflict else snapshot.primary_key_columns[0]
+            update_set[column] = column
+        return stmt.on_duplicate_key_update(
+            {column.key: value for column, value in update_set.items()}
+        )
+    if not update_set:
+        return stmt.on_conflict_do_nothing(index_elements=conflict)
+    return stmt.on_conflict_do_update(index_elements=conflict, set_=update_set)
+
+
+def onupdate_params(model: Type[Base], update_keys: Iterable[str]) -> Dict[str, Any]:
+    """
+    Evaluate the Python callable `onupdate` defaults bound by an upsert_statement.
+
+    :param model: (Type[Base]) The mapped model class.
+    :param update_keys: (Iterable[str]) The attribute names of the columns to update.
+    :return: (dict) The values to add to the parameters of every row of one execution,
+        by bind parameter name; empty if the statement binds none.
+    """
+    update_keys = set(update_keys)
+    if not update_keys:
+        return {}
+    return {
+        _onupdate_param(column): column.onupdate.arg(None)
+        for key, column in model_snapshot(model).column_by_key.items()
+        if column.onupdate is not None
+        and column.onupdate.is_callable
+        and key not in update_keys
+    }
+
+
+def _onupdate_param(column: Column) -> str:
+    return f"onupdate_{column.key}"
+
+
+# ---------------------------------------------------------
+def cascade_statements(model: Type[Base], clause: Any) -> List[Tuple[Any, Any]]:
+    """
+    Build the statements that emulate in bulk the ORM cascades of deleting the rows of
+    a model matching a clause, without loading any of them:
+
+    - rows of one-to-many relationships with a delete cascade are deleted, after their
+      own cascades;
+    - rows of other one-to-many relationships have their foreign key set to NULL;
+    - rows of many-to-many association tables are deleted.
+
+    Relationships with `passive_deletes` are left to the database, as the ORM does.
+
+    :param model: (Type[Base]) The mapped model class of the deleted rows.
+    :param clause: (ColumnElement) The WHERE clause selecting the deleted rows.
+    :return: (List[Tuple[Any, Executable]]) The model class, or association table,
+        touched by each statement and the statement, in execution order; all of them
+        must run before the rows themselves are deleted.
+    """
+    return _cascade_statements(model, clause, (model,))
+
+
+def _cascade_statements(
+    model: Type[Base], clause: Any, path: Tuple[Any, ...]
+) -> List[Tuple[Any, Any]]:
+    statements: List[Tuple[Any, Any]] = []
+    for relationship in sqlalchemy.inspect(model).relationships:
+        if relationship.passive_deletes:
+            continue
+        if relationship.direction is MANYTOMANY:
+            table = relationship.secondary
+            where = _in_parent_rows(relationship.synchronize_pairs, clause)
+            statements.append((table, sqlalchemy.delete(table).where(where)))
+        elif relationship.direction is ONETOMANY:
+            target = relationship.mapper.class_
+            table = relationship.mapper.local_table
+            pairs = relationship.local_remote_pairs
+            where = _in_parent_rows(pairs, clause)
+            if relationship.cascade.delete:
+                if target in path:
+                    raise ValueError(
+                        "Unsupported cascade cycle: %s"
+                        % " -> ".join(item.__name__ for item in path + (target,))
+                    )
+                statements.extend(_cascade_statements(target, where, path + (target,)))
+                statements.append((target, sqlalchemy.delete(table).where(where)))
+            else:
+                values = {remote: None for _, remote in pairs}
+                statements.append(
+                    (target, sqlalchemy.update(table).where(where).values(values))
+                )
+    return statements
+
+
+def _in_parent_rows(pairs: Any, clause: Any) -> ColumnElement:
+    # Match the rows referencing the parent rows selected by the clause
+    parents = [parent for parent, _ in pairs]
+    children = [child for _, child in pairs]
+    parent_rows = sqlalchemy.select(*parents).where(clause)
+    if len(parents) == 1:
+        return children[0].in_(parent_rows)
+    return sqlalchemy.tuple_(*children).in_(parent_rows)
+
+
+# ---------------------------------------------------------
+def max_in_list_size(dialect_name: str, columns: int = 1, requested: int = 0) -> int:
+    """
+    Get the largest number of keys that fit in one IN (...) list for a dialect.
+
+    :param dialect_name: (str) The SQLAlchemy dialect name, e.g. "postgresql".
+    :param columns: (int) The number of columns per key, for composite keys.
+    :param requested: (int) A caller-chosen upper bound; 0 or less for none.
+    :return: (int) The number of keys per chunk, at least 1.
+    """
+    limit = MAX_BIND_PARAMETERS.get(dialect_name, DEFAULT_MAX_BIND_PARAMETERS)
+    size = max(1, limit // max(1, columns))
+    return min(size, requested) if requested > 0 else size
@@ -12,7 +12,7 @@ setup(
     author_email="dalexander@hyfisolutions.com",
     description="The CRUDRepository is a Python project designed to provide a generic implementation of Create, Read, Update, and Delete (CRUD) operations for various databases.",
     packages=find_packages(
-        exclude=["tests", "*.tests", "*.tests.*", "tests.*", "dist", "build", "logs"]
+        exclude=["tests", "*.tests", "*.tests.*", "tests.*", "benchmarks", "benchmarks.*", "dist", "build", "logs"]
     ),
     long_description=Path("README.md").read_text(encoding="utf-8"),
     package_dir={
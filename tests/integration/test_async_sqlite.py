@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from crud_repository.db.factory import DatabaseFactory
+from crud_repository.my_logger.logger import CustomLogger
+from crud_repository.repo.async_repository import AsyncRepository
+from tests.models import User, Email
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+
+
+class TestAsyncSQLiteIntegration(unittest.IsolatedAsyncioTestCase):
+    db_path = os.path.join(tempfile.gettempdir(), "crud_repository_async_test.db")
+    db_config = {
+        "type": "sqlite",
+        "async": True,
+        "db_name": db_path,
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+
+    async def asyncSetUp(self):
+        log.debug(f"db_config: {self.db_config}")
+        self.db = DatabaseFactory.create(self.db_config)
+        self.user_repo = AsyncRepository(self.db, User)
+        self.email_repo = AsyncRepository(self.db, Email)
+
+    async def asyncTearDown(self):
+        # Connections are bound to the event loop of each test
+        await self.db.dispose()
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.exists(cls.db_path):
+            os.remove(cls.db_path)
+
+    async def test_connect(self):
+        async with self.db.connect() as connection:
+            self.assertIsNotNone(connection)
+
+    async def test_create_and_read_user(self):
+        new_user = User(username="async_user", password="async_password")
+        created_user = await self.user_repo.create(new_user)
+        self.assertIsNotNone(created_user.id)
+        self.assertIsNotNone(created_user.last_updated)
+        read_user = await self.user_repo.read(created_user.id)
+        self.assertEqual(read_user.username, "async_user")
+
+    async def test_update_user(self):
+        created_user = await self.user_repo.create(
+            User(username="async_user_update", password="async_password")
+        )
+        created_user.password = "updated_password"
+        await self.user_repo.update(created_user)
+        updated_user = await self.user_repo.read(created_user.id)
+        self.assertEqual(updated_user.password, "updated_password")
+
+    async def test_delete_user(self):
+        created_user = await self.user_repo.create(
+            User(username="async_user_delete", password="async_password")
+        )
+        await self.user_repo.delete(await self.user_repo.read(created_user.id))
+        self.assertIsNone(await self.user_repo.read(created_user.id))
+
+    async def test_bulk_operations(self):
+        result = await self.email_repo.create_many(
+            [{"email": f"async_{i}@example.com"} for i in range(5)], chunk_size=2
+        )
+        self.assertEqual(len(result.primary_keys), 5)
+        self.assertEqual(len(result.chunks), 3)
+        await self.email_repo.update_many(
+            [{"id": id, "email": "async_updated@example.com"} for id in result.primary_keys]
+        )
+        updated = [
+            email
+            async for email in self.email_repo.iter_all(
+                batch_size=2, filters={"email": "async_updated@example.com"}
+            )
+        ]
+        self.assertEqual(len(updated), 5)
+        deleted = await self.email_repo.delete_many(result.primary_keys)
+        self.assertEqual(deleted.rowcount, 5)
+
+    async def test_page_users(self):
+        await self.user_repo.create_many(
+            [{"username": "async_page_user", "password": f"p{i}"} for i in range(5)]
+        )
+        filters = {"username": "async_page_user"}
+        page = await self.user_repo.page(limit=3, filters=filters)
+        self.assertEqual(len(page.items), 3)
+        self.assertTrue(page.has_more)
+        page = await self.user_repo.page(after=page.next_token, limit=3, filters=filters)
+        self.assertEqual(len(page.items), 2)
+        self.assertFalse(page.has_more)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The time importing the package may add on top of importing SQLAlchemy itself, in seconds.
+IMPORT_BUDGET = 0.25
+# Modules that must only be imported once a database of the matching type is created.
+LAZY_MODULES = (
+    "sqlalchemy_utils",
+    "psycopg2",
+    "pymysql",
+    "aiosqlite",
+    "asyncpg",
+    "aiomysql",
+)
+
+_PROBE = """
+import json, logging, sys, time
+import sqlalchemy.orm
+start = time.perf_counter()
+%s
+seconds = time.perf_counter() - start
+config = sys.modules.get("crud_repository.__config__")
+print(json.dumps({
+    "package": seconds,
+    "modules": sorted(sys.modules),
+    "settings": getattr(config, "_settings", None) is not None,
+    "file_handlers": [
+        type(handler).__name__
+        for handler in logging.getLogger().handlers
+        if isinstance(handler, logging.FileHandler)
+    ],
+}))
+"""
+
+
+def _probe(imports: str) -> dict:
+    """Import modules in a fresh interpreter and report the time taken and the modules loaded."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE % imports],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=env,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestImportTime(unittest.TestCase):
+    def test_package_import_stays_within_budget(self):
+        # Take the best of a few runs to keep a busy machine from failing the test
+        runs = [
+            _probe("import crud_repository.db.factory, crud_repository.repo.repository")
+            for _ in range(3)
+        ]
+        # Assert that no driver or backend is imported before it is used
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, runs[0]["modules"])
+        self.assertNotIn("crud_repository.db.postgres.db", runs[0]["modules"])
+        # Assert that the package adds little to the import time of SQLAlchemy
+        self.assertLess(min(run["package"] for run in runs), IMPORT_BUDGET)
+
+    def test_config_is_resolved_on_first_access(self):
+        run = _probe("import crud_repository.__config__")
+        # Assert that importing the configuration neither loads nor searches for .env
+        self.assertNotIn("dotenv", run["modules"])
+
+        run = _probe(
+            "import crud_repository.db.factory, crud_repository.repo.repository"
+        )
+        # Assert that the module-level loggers of the package resolve no settings and
+        # open no log file until they log
+        self.assertFalse(run["settings"])
+        self.assertNotIn("dotenv", run["modules"])
+        self.assertEqual(run["file_handlers"], [])
+
+        run = _probe(
+            "import crud_repository.repo.repository as repository\n"
+            "repository.log.debug('first record')"
+        )
+        self.assertTrue(run["settings"])
+        self.assertEqual(run["file_handlers"], ["CustomTimedRotatingFileHandler"])
+
+        run = _probe("import crud_repository.__config__ as config; config.log_config")
+        self.assertIn("dotenv", run["modules"])
+
+    def test_backend_is_imported_when_first_created(self):
+        run = _probe(
+            "from crud_repository.db.factory import DatabaseFactory\n"
+            "DatabaseFactory.create({'type': 'sqlite', 'db_name': ':memory:', "
+            "'provisioning': 'none'})"
+        )
+        self.assertIn("crud_repository.db.sqlite.db", run["modules"])
+        self.assertNotIn("crud_repository.db.mysql.db", run["modules"])
+        self.assertNotIn("crud_repository.db.sqlite.async_db", run["modules"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import gzip
+import io
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from crud_repository.my_logger import logger as logger_module
+from crud_repository.my_logger.handlers import CustomTimedRotatingFileHandler
+from crud_repository.my_logger.logger import (
+    CustomLogger,
+    configure_logging,
+    disable_queue_logging,
+    enable_queue_logging,
+    queue_logging_stats,
+)
+
+
+class _BlockingHandler(logging.Handler):
+    """A handler that holds the listener thread until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.gate.wait(5)
+        self.records.append(record.getMessage())
+
+
+class TestQueueLogging(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.Logger("crud_repository_queue_test", logging.DEBUG)
+        self.stream = io.StringIO()
+        handler = logging.StreamHandler(self.stream)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+
+    def tearDown(self):
+        disable_queue_logging()
+
+    def test_records_are_written_in_order_by_the_listener(self):
+        enable_queue_logging(self.logger, max_size=1000, batch_size=16)
+        for i in range(100):
+            self.logger.info("record %s", i)
+        stats = queue_logging_stats()
+        disable_queue_logging()
+        # Assert that every record was written, in order, once the queue was drained
+        self.assertEqual(
+            self.stream.getvalue().splitlines(), [f"record {i}" for i in range(100)]
+        )
+        self.assertEqual(stats["enqueued"], 100)
+        self.assertEqual(stats["dropped"], 0)
+        # Assert that the handlers were given back to the logger
+        self.assertIsInstance(self.logger.handlers[0], logging.StreamHandler)
+
+    def test_full_queue_drops_and_counts_records(self):
+        blocking = _BlockingHandler()
+        self.logger.handlers = [blocking]
+        enable_queue_logging(self.logger, max_size=2, policy="drop")
+        for i in range(10):
+            self.logger.info("record %s", i)
+        stats = queue_logging_stats()
+        blocking.gate.set()
+        disable_queue_logging()
+        # Assert that the logging calls did not block and the overflow was counted
+        self.assertGreater(stats["dropped"], 0)
+        self.assertEqual(stats["enqueued"] + stats["dropped"], 10)
+        self.assertEqual(len(blocking.records), stats["enqueued"])
+
+    def test_invalid_queue_policy(self):
+        with self.assertRaises(ValueError):
+            enable_queue_logging(self.logger, policy="bogus")
+
+
+class TestLoggingConfiguration(unittest.TestCase):
+    def test_configuration_is_applied_once(self):
+        configure_logging()
+        handlers = list(logging.getLogger().handlers)
+        with mock.patch("logging.config.dictConfig") as dict_config:
+            loggers = [
+                CustomLogger(f"{__name__}.{i}").get_logger("DEBUG") for i in range(5)
+            ]
+            applied = configure_logging()
+        # Assert that later loggers reuse the configuration and its handlers
+        dict_config.assert_not_called()
+        self.assertFalse(applied)
+        self.assertEqual(logging.getLogger().handlers, handlers)
+        self.assertTrue(all(not logger.disabled for logger in loggers))
+
+    def test_first_record_configures_and_reaches_every_handler(self):
+        logger = CustomLogger(f"{__name__}.first_record").get_logger("DEBUG")
+        streams = [io.StringIO(), io.StringIO()]
+        for stream in streams:
+            logger.addHandler(logging.StreamHandler(stream))
+        self.addCleanup(setattr, logger, "handlers", [])
+        with mock.patch.object(
+            logger_module, "_applied_config", None
+        ), mock.patch.object(logger_module, "configure_logging") as configure:
+            logger.debug("first record")
+        # Assert that the configuration was applied before the record was dispatched,
+        # and that no handler of the logger missed it
+        configure.assert_called_once_with(None)
+        self.assertEqual(
+            [stream.getvalue() for stream in streams], ["first record\n"] * 2
+        )
+
+
+class TestRotatingFileHandler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.logger = logging.Logger("crud_repository_rotation_test", logging.DEBUG)
+
+    def _handler(self, name, **kwargs):
+        handler = CustomTimedRotatingFileHandler(
+            filename=os.path.join(self.directory.name, name),
+            when="midnight",
+            level=logging.DEBUG,
+            formatter=logging.Formatter("%(message)s"),
+            **kwargs,
+        )
+        self.logger.addHandler(handler)
+        return handler
+
+    def test_size_rollover_compresses_and_prunes_rotated_files(self):
+        handler = self._handler("app.log", max_bytes=100, compress=True, backup_count=2)
+        rollover_at = handler.rolloverAt
+        for i in range(40):
+            self.logger.info("record %03d", i)
+        handler.close()
+        names = sorted(os.listdir(self.directory.name))
+        rotated = [name for name in names if name != "app.log"]
+        # Assert that only the newest backups were kept, all of them compressed
+        self.assertIn("app.log", names)
+        self.assertEqual(len(rotated), 2)
+        self.assertTrue(all(name.endswith(".gz") for name in rotated))
+        with gzip.open(os.path.join(self.directory.name, rotated[-1]), "rt") as file:
+            self.assertTrue(file.read().startswith("record"))
+        # Assert that the size rollovers left the next time rollover in place
+        self.assertEqual(handler.rolloverAt, rollover_at)
+
+    def test_startup_prunes_old_files_by_name_pattern(self):
+        for name in ("crud_1.log", "crud_2.log", "crud_10.log", "other.txt"):
+            with open(os.path.join(self.directory.name, name), "w") as file:
+                file.write("old\n")
+        handler = self._handler(
+            "crud_20.log", backup_count=2, prune_pattern="crud_*.log*"
+        )
+        handler.close()
+        # Assert that the oldest matching file was deleted, in natural name order,
+        # and that files outside the pattern were left alone
+        self.assertEqual(
+            sorted(os.listdir(self.directory.name)),
+            ["crud_10.log", "crud_2.log", "crud_20.log", "other.txt"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
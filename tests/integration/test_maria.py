@@ -5,9 +5,11 @@ import unittest
 from sqlalchemy import create_engine, text
 
 from crud_repository.repo.repository import Repository
+from crud_repository.repo.unit_of_work import UnitOfWork
 from crud_repository.db.factory import DatabaseFactory
 from crud_repository.model.base import Base
 from tests.models import User, Email
+from tests.repository import UserRepository
 from crud_repository.my_logger.logger import CustomLogger
 
 log = CustomLogger(__name__).get_logger("DEBUG")
@@ -137,6 +139,136 @@ class TestMariaDBIntegration(unittest.TestCase):
         self.assertIsNone(deleted_user)
         log.debug(f"Deleted User: {deleted_user}")
 
+    def test_create_many_users(self):
+        users = [User(username=f"bulk_user_{i}", password="bulk_password") for i in range(5)]
+        result = self.user_repo.create_many(users, chunk_size=2)
+        # Assert that every row was inserted and the generated keys were returned
+        self.assertEqual(len(result.primary_keys), 5)
+        self.assertEqual(len(result.chunks), 3)
+        self.assertEqual([user.id for user in users], result.primary_keys)
+        self.assertEqual(self.user_repo.read(result.primary_keys[0]).username, "bulk_user_0")
+
+    def test_update_and_delete_many_users(self):
+        result = self.user_repo.create_many(
+            [{"username": f"bulk_user_{i}", "password": "bulk_password"} for i in range(3)]
+        )
+        ids = result.primary_keys
+        self.user_repo.update_many([{"id": id, "password": "bulk_updated"} for id in ids])
+        self.assertEqual(self.user_repo.read(ids[1]).password, "bulk_updated")
+        deleted = self.user_repo.delete_many(ids)
+        self.assertEqual(deleted.rowcount, 3)
+        self.assertIsNone(self.user_repo.read(ids[0]))
+
+    def test_unit_of_work_commits_together(self):
+        with UnitOfWork(self.db):
+            new_user = self.user_repo.create(User(username="uow_user", password="uow_password"))
+            self.email_repo.create(Email(email="uow@example.com", user_id=new_user.id))
+        # Assert that both rows were committed by the unit of work
+        self.assertEqual(self.user_repo.read(new_user.id).username, "uow_user")
+
+    def test_unit_of_work_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with UnitOfWork(self.db):
+                new_user = self.user_repo.create(User(username="uow_user", password="uow_password"))
+                raise RuntimeError("abort unit of work")
+        # Assert that nothing was committed
+        self.assertIsNone(self.user_repo.read(new_user.id))
+
+    def test_iter_all_users(self):
+        self.user_repo.create_many(
+            [{"username": "stream_user", "password": f"stream_{i}"} for i in range(5)]
+        )
+        # Stream the rows in batches smaller than the result set
+        streamed = list(self.user_repo.iter_all(batch_size=2, filters={"username": "stream_user"}))
+        self.assertGreaterEqual(len(streamed), 5)
+        self.assertTrue(all(user.username == "stream_user" for user in streamed))
+
+    def test_page_users(self):
+        self.user_repo.create_many(
+            [{"username": f"page_user_{i % 2}", "password": "page_password"} for i in range(5)]
+        )
+        filters = {"password": "page_password"}
+        # Walk every page using the continuation token
+        seen, token = [], None
+        while True:
+            page = self.user_repo.page(after=token, limit=2, order_by="username", filters=filters)
+            self.assertLessEqual(len(page.items), 2)
+            seen.extend((user.username, user.id) for user in page.items)
+            token = page.next_token
+            if not page.has_more:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen, sorted(seen))
+
+    def test_read_many_users(self):
+        ids = self.user_repo.create_many(
+            [{"username": f"many_user_{i}", "password": "many_password"} for i in range(5)]
+        ).primary_keys
+        missing_id = max(ids) + 1000
+        requested = [ids[3], missing_id, ids[0], ids[3]]
+        result = self.user_repo.read_many(requested, chunk_size=2)
+        # Assert that results come back in request order with the missing key reported
+        self.assertEqual([user.id for user in result.items], [ids[3], ids[0]])
+        self.assertEqual(result.missing, [missing_id])
+        self.assertEqual(result.get(ids[0]).username, "many_user_0")
+
+    def test_upsert_users(self):
+        created = self.user_repo.upsert(User(username="upsert_user", password="pw"), returning=True)
+        self.assertIsNotNone(created.id)
+        updated = self.user_repo.upsert(
+            {"id": created.id, "username": "upsert_renamed", "password": "pw"}, returning=True
+        )
+        # Assert that the conflicting row was updated in place
+        self.assertEqual(updated.id, created.id)
+        self.assertEqual(self.user_repo.read(created.id).username, "upsert_renamed")
+        result = self.user_repo.upsert_many(
+            [{"id": created.id, "username": "upsert_last", "password": "pw"}], returning=True
+        )
+        self.assertEqual(result.primary_keys, [created.id])
+        self.assertEqual(result.items[0].username, "upsert_last")
+
+    def test_update_fields_users(self):
+        created = self.user_repo.create(User(username="fields_user", password="pw"))
+        result = self.user_repo.update_fields(created.id, name="fields_name")
+        # Assert that one row was updated without loading it first
+        self.assertEqual(result.rowcount, 1)
+        self.assertEqual(result.primary_keys, [created.id])
+        self.assertEqual(self.user_repo.read(created.id).name, "fields_name")
+        result = self.user_repo.update_where({"username": "fields_user"}, password="changed")
+        self.assertGreaterEqual(result.rowcount, 1)
+        self.assertEqual(self.user_repo.read(created.id).password, "changed")
+
+    def test_delete_where_users(self):
+        keys = self.user_repo.create_many(
+            [{"username": "purge_user", "password": "purge_pw"} for _ in range(3)]
+        ).primary_keys
+        result = self.user_repo.delete_where({"password": "purge_pw"}, chunk_size=2, cascade="orm")
+        # Assert that the matching rows were deleted in chunks, without being loaded
+        self.assertEqual(result.rowcount, 3)
+        self.assertEqual(len(result.chunks), 2)
+        self.assertEqual(self.user_repo.read_many(keys).missing, keys)
+        self.assertEqual(self.user_repo.delete_by_id(keys[0]), 0)
+
+    def test_read_many_users_with_profile(self):
+        user = User(username="profile_user", password="pw")
+        user.emails = [Email(email="profile_a@example.com"), Email(email="profile_b@example.com")]
+        created = self.user_repo.create(user)
+        users = UserRepository(self.db).read_many([created.id], profile="with_relations").items
+        # Assert that the relationships were loaded before the session was closed
+        self.assertEqual(len(users[0].emails), 2)
+        self.assertEqual(users[0].roles, [])
+
+    def test_find_by_and_aggregates_users(self):
+        keys = self.user_repo.create_many(
+            [{"username": f"find_{i}", "password": "find_pw"} for i in range(3)]
+        ).primary_keys
+        found = self.user_repo.find_by(password="find_pw", id__in=keys, order_by="-id", limit=2)
+        # Assert that the query and the aggregates ran in the database
+        self.assertEqual([user.id for user in found], [keys[2], keys[1]])
+        self.assertEqual(self.user_repo.count(id__in=keys), 3)
+        self.assertTrue(self.user_repo.exists(id=keys[0], username__startswith="find_"))
+        self.assertEqual(self.user_repo.aggregate(["max__id"], id__in=keys), {"max__id": keys[2]})
+
 
 if __name__ == "__main__":
     unittest.main()
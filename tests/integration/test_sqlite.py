@@ -0,0 +1,776 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+import datetime
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Integer,
+    String,
+    Table,
+    create_engine,
+    event,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.exc import InvalidRequestError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import DeclarativeBase, Session, relationship, subqueryload
+
+from crud_repository.db.factory import DatabaseFactory
+from crud_repository.db.sqlite.db import SQLiteDatabase
+from crud_repository.model.base import Base
+from crud_repository.my_logger.handlers import SlowQueryHandler
+from crud_repository.my_logger.logger import CustomLogger
+from crud_repository.repo.cache import ReadCache
+from crud_repository.repo.repository import Repository
+from crud_repository.repo.unit_of_work import UnitOfWork
+from crud_repository.repo.utils import cascade_statements, onupdate_params, upsert_statement
+from tests.models import User, Email
+from tests.repository import UserRepository
+
+log = CustomLogger(__name__).get_logger("DEBUG")
+
+
+class TestSQLiteDBIntegration(unittest.TestCase):
+    db_config = {
+        "type": "sqlite",
+        "db_name": "crud_repository_test",
+        "memory": True,
+    }
+
+    def setUp(self):
+        log.debug(f"db_config: {self.db_config}")
+        # Create a new database session for each test
+        self.db = DatabaseFactory.create(self.db_config)
+        # Create a repository for the User model
+        self.user_repo = Repository(self.db, User)
+        self.email_repo = Repository(self.db, Email)
+        self.session = self.db.get_scoped_session()
+
+    def tearDown(self):
+        self.session.close()
+
+    def test_connect(self):
+        # Test the connect method
+        connection = self.db.connect()
+        self.assertIsNotNone(connection)
+        log.debug(f"Connection: {connection.__dict__}")
+
+    def test_get_session(self):
+        # Test the get_scoped_session method
+        session = self.db.get_scoped_session()
+        self.assertIsNotNone(session)
+        log.debug(f"Session: {session}")
+
+    def test_create_user_with_emails(self):
+        with Session(self.db.engine) as session:
+            email1 = Email(email="test1@example.com")
+            email2 = Email(email="test2@example.com")
+            new_user = User(
+                username="test_user", password="test_password",
+                emails=[email1, email2],
+                name="Test User"
+
+            )
+            session.add_all([email1, email2, new_user])
+            log.debug(f"New User: {new_user.__dict__}")
+            session.commit()
+
+            # Eager Loading Options:
+            # created_user = session.query(User) \
+            #     .options(joinedload(User.emails)) \
+            #     .filter(User.id == new_user.id) \
+            #     .one()
+            # log.debug(f"Joined Query New User: {new_user.__dict__}")
+
+            # OR (in some cases subqueryload might be better)
+            created_user = session.query(User)\
+                .options(subqueryload(User.emails))\
+                .filter(User.id == new_user.id)\
+                .one()
+            log.debug(f"SubQuery New User: {created_user.__dict__}")
+
+            # Assert the user and associated emails were created
+            self.assertIsNotNone(created_user)
+            self.assertEqual(created_user.username, "test_user")
+            self.assertEqual(len(created_user.emails), 2)  # Check 2 emails
+            self.assertEqual(created_user.emails[0].email, "test1@example.com")
+            self.assertEqual(created_user.emails[1].email, "test2@example.com")
+
+    def test_read_user(self):
+        # Create a user
+        new_user = User(username="test_user_read", password="test_password_read")
+        self.user_repo.create(new_user)
+        log.debug(f"New User: {new_user.__dict__}")
+        # Read the user by ID
+        read_user = self.user_repo.read(new_user.id)
+
+        # Assert that the read user matches the created user
+        self.assertIsNotNone(read_user)
+        self.assertEqual(read_user.username, "test_user_read")
+        self.assertEqual(read_user.password, "test_password_read")
+        log.debug(f"""
+        Read User: {read_user.__dict__}
+        """)
+
+    def test_update_user(self):
+        # Create a user
+        new_user = User(username="test_user_update", password="test_password_update")
+        self.user_repo.create(new_user)
+        log.debug(f"New User: {new_user.__dict__}")
+        # Update the user's password
+        updated_password = "updated_password"
+        new_user.password = updated_password
+        self.user_repo.update(new_user)
+
+        # Read the updated user from the database
+        updated_user = self.user_repo.read(new_user.id)
+
+        # Assert that the password was updated successfully
+        self.assertIsNotNone(updated_user)
+        self.assertEqual(updated_user.password, updated_password)
+        log.debug(f"Updated User: {updated_user.__dict__}")
+
+    def test_delete_user(self):
+        # Create a user
+        new_user = User(username="test_user_delete", password="test_password_delete")
+        self.user_repo.create(new_user)
+        log.debug(f"New User: {new_user.__dict__}")
+        # Delete the user
+        self.user_repo.delete(new_user)
+
+        # Assert that the user no longer exists in the database
+        deleted_user = self.user_repo.read(new_user.id)
+        self.assertIsNone(deleted_user)
+        log.debug(f"Deleted User: {deleted_user}")
+
+    def test_create_many_users(self):
+        users = [User(username=f"bulk_user_{i}", password="bulk_password") for i in range(5)]
+        result = self.user_repo.create_many(users, chunk_size=2)
+        # Assert that every row was inserted and the generated keys were returned
+        self.assertEqual(len(result.primary_keys), 5)
+        self.assertEqual(len(result.chunks), 3)
+        self.assertEqual([user.id for user in users], result.primary_keys)
+        self.assertEqual(self.user_repo.read(result.primary_keys[0]).username, "bulk_user_0")
+
+    def test_update_and_delete_many_users(self):
+        result = self.user_repo.create_many(
+            [{"username": f"bulk_user_{i}", "password": "bulk_password"} for i in range(3)]
+        )
+        ids = result.primary_keys
+        self.user_repo.update_many([{"id": id, "password": "bulk_updated"} for id in ids])
+        self.assertEqual(self.user_repo.read(ids[1]).password, "bulk_updated")
+        deleted = self.user_repo.delete_many(ids)
+        self.assertEqual(deleted.rowcount, 3)
+        self.assertIsNone(self.user_repo.read(ids[0]))
+
+    def test_unit_of_work_commits_together(self):
+        with UnitOfWork(self.db):
+            new_user = self.user_repo.create(User(username="uow_user", password="uow_password"))
+            self.email_repo.create(Email(email="uow@example.com", user_id=new_user.id))
+        # Assert that both rows were committed by the unit of work
+        self.assertEqual(self.user_repo.read(new_user.id).username, "uow_user")
+
+    def test_unit_of_work_rolls_back_on_error(self):
+        with self.assertRaises(RuntimeError):
+            with UnitOfWork(self.db):
+                new_user = self.user_repo.create(User(username="uow_user", password="uow_password"))
+                raise RuntimeError("abort unit of work")
+        # Assert that nothing was committed
+        self.assertIsNone(self.user_repo.read(new_user.id))
+
+    def test_iter_all_users(self):
+        self.user_repo.create_many(
+            [{"username": "stream_user", "password": f"stream_{i}"} for i in range(5)]
+        )
+        # Stream the rows in batches smaller than the result set
+        streamed = list(self.user_repo.iter_all(batch_size=2, filters={"username": "stream_user"}))
+        self.assertGreaterEqual(len(streamed), 5)
+        self.assertTrue(all(user.username == "stream_user" for user in streamed))
+
+    def test_page_users(self):
+        self.user_repo.create_many(
+            [{"username": f"page_user_{i % 2}", "password": "page_password"} for i in range(5)]
+        )
+        filters = {"password": "page_password"}
+        # Walk every page using the continuation token
+        seen, token = [], None
+        while True:
+            page = self.user_repo.page(after=token, limit=2, order_by="username", filters=filters)
+            self.assertLessEqual(len(page.items), 2)
+            seen.extend((user.username, user.id) for user in page.items)
+            token = page.next_token
+            if not page.has_more:
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen, sorted(seen))
+
+    def test_file_database_pragmas(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = SQLiteDatabase(db_name=os.path.join(directory, "pragmas.db"))
+            with db.connect() as connection:
+                journal_mode = connection.execute(text("PRAGMA journal_mode")).scalar()
+                synchronous = connection.execute(text("PRAGMA synchronous")).scalar()
+                busy_timeout = connection.execute(text("PRAGMA busy_timeout")).scalar()
+            db.engine.dispose()
+        # Assert that the throughput pragmas were applied on connect
+        self.assertEqual(journal_mode.lower(), "wal")
+        self.assertEqual(synchronous, 1)  # NORMAL
+        self.assertEqual(busy_timeout, 5000)
+
+    def test_memory_database_is_shared(self):
+        new_user = self.user_repo.create(User(username="shared_user", password="shared_password"))
+        # A connection outside the engine sees the row through the shared cache
+        connection = sqlite3.connect("file:crud_repository_test?mode=memory&cache=shared", uri=True)
+        try:
+            count = connection.execute(
+                "SELECT COUNT(*) FROM user WHERE id = ?", (new_user.id,)
+            ).fetchone()[0]
+        finally:
+            connection.close()
+        self.assertEqual(count, 1)
+
+    def test_read_cache_hits_and_invalidation(self):
+        cache = ReadCache(max_size=10, ttl=60)
+        user_repo = UserRepository(self.db, cache=cache)
+        new_user = user_repo.create(User(username="cached_user", password="cached_password"))
+        first = user_repo.read(new_user.id)
+        second = user_repo.read(new_user.id)
+        # Assert that the second read was served from the cache as a separate copy
+        self.assertIsNot(first, second)
+        self.assertEqual(cache.stats().hits, 1)
+        self.assertEqual(cache.stats().misses, 1)
+        # Assert that an update drops the cached row
+        second.password = "updated_password"
+        user_repo.update(second)
+        self.assertEqual(user_repo.read(new_user.id).password, "updated_password")
+        self.assertEqual(cache.stats().invalidations, 1)
+        # Assert that a cached snapshot can be deleted like a loaded entity
+        user_repo.delete(user_repo.read(new_user.id))
+        self.assertIsNone(user_repo.read(new_user.id))
+
+    def test_read_cache_lru_and_ttl_eviction(self):
+        now = [0.0]
+        cache = ReadCache(max_size=2, ttl=10, clock=lambda: now[0])
+        cache.put((User, 1), {"id": 1})
+        cache.put((User, 2), {"id": 2})
+        cache.get((User, 1))
+        cache.put((User, 3), {"id": 3})
+        # Assert that the least recently used entry was evicted
+        self.assertIsNone(cache.get((User, 2)))
+        self.assertEqual(cache.stats().evictions, 1)
+        now[0] = 11.0
+        self.assertIsNone(cache.get((User, 1)))
+        self.assertEqual(cache.stats().expirations, 1)
+
+    def test_read_many_users(self):
+        ids = self.user_repo.create_many(
+            [{"username": f"many_user_{i}", "password": "many_password"} for i in range(5)]
+        ).primary_keys
+        missing_id = max(ids) + 1000
+        requested = [ids[3], missing_id, ids[0], ids[3]]
+        result = self.user_repo.read_many(requested, chunk_size=2)
+        # Assert that results come back in request order with the missing key reported
+        self.assertEqual([user.id for user in result.items], [ids[3], ids[0]])
+        self.assertEqual(result.missing, [missing_id])
+        self.assertEqual(result.get(ids[0]).username, "many_user_0")
+
+    def test_pool_configuration_and_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = SQLiteDatabase(
+                db_name=os.path.join(directory, "pool.db"),
+                pool_class="queue",
+                pool_size=2,
+                max_overflow=1,
+                pool_timeout=1,
+                pool_pre_ping=True,
+                pool_use_lifo=True,
+            )
+            connections = [db.connect() for _ in range(3)]
+            status = db.get_pool_status()
+            for connection in connections:
+                connection.close()
+            idle_status = db.get_pool_status()
+            db.engine.dispose()
+        # Assert that the pool options were applied and the counts reported
+        self.assertEqual(status["pool_class"], "QueuePool")
+        self.assertEqual(status["size"], 2)
+        self.assertEqual(status["checked_out"], 3)
+        self.assertEqual(status["overflow"], 1)
+        self.assertEqual(status["max_overflow"], 1)
+        self.assertEqual(idle_status["checked_out"], 0)
+        self.assertEqual(idle_status["idle"], 2)
+
+    def test_invalid_pool_class(self):
+        with self.assertRaises(ValueError):
+            SQLiteDatabase(db_name=":memory:", pool_class="bogus")
+
+    def test_engine_metrics(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = SQLiteDatabase(
+                db_name=os.path.join(directory, "metrics.db"),
+                pool_class="queue",
+                pool_size=1,
+                max_overflow=0,
+                pool_timeout=0.1,
+            )
+            db.metrics.reset()
+            with db.connect() as connection:
+                connection.exec_driver_sql("SELECT 1")
+                with self.assertRaises(OperationalError):
+                    connection.exec_driver_sql("SELECT * FROM missing_table")
+                # The only pooled connection is checked out, so this one times out
+                with self.assertRaises(PoolTimeoutError):
+                    db.connect()
+            metrics = db.get_metrics()
+            db.engine.dispose()
+        # Assert that statement latency, pool wait time and churn were recorded
+        self.assertGreaterEqual(metrics["statements"], 2)
+        self.assertEqual(metrics["errors"], 1)
+        self.assertEqual(metrics["statement_ms"]["count"], metrics["statements"])
+        self.assertEqual(metrics["pool_wait_ms"]["count"], 2)
+        self.assertEqual(metrics["pool_timeouts"], 1)
+        self.assertEqual(metrics["connections"]["checkouts"], 1)
+        self.assertEqual(metrics["connections"]["checkins"], 1)
+        self.assertIsNotNone(metrics["statement_ms"]["p99"])
+
+    def test_pool_wait_is_timed_across_dispose(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = SQLiteDatabase(db_name=os.path.join(directory, "dispose.db"))
+            pool_class = type(db.engine.pool)
+            db.metrics.reset()
+            db.connect().close()
+            db.engine.dispose()
+            db.engine.dispose()
+            db.connect().close()
+            metrics = db.get_metrics()
+            disposed_pool = db.engine.pool
+            db.engine.dispose()
+        # Assert that the default pool is timed, and each checkout is observed once
+        # by the pools that dispose() creates
+        self.assertEqual(pool_class.__name__, "QueuePool")
+        self.assertIsInstance(disposed_pool, pool_class)
+        self.assertEqual(metrics["pool_wait_ms"]["count"], 2)
+        self.assertEqual(metrics["connections"]["checkouts"], 2)
+
+    def test_slow_query_detector(self):
+        stream = io.StringIO()
+        db = SQLiteDatabase(
+            db_name="slow_query_test",
+            memory=True,
+            slow_query_ms=0,
+            slow_query_explain=True,
+            slow_query_log=SlowQueryHandler(stream=stream),
+        )
+        repo = UserRepository(db)
+        user = repo.create(User(username="slow_user", password="pw", name="Slow"))
+        repo.read(user.id)
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        selects = [r for r in records if r["sql"].startswith("SELECT")]
+        # Assert that the record names the repository method and carries the plan
+        self.assertFalse(db.engine.echo)
+        self.assertEqual(db.get_metrics()["slow_statements"], len(records))
+        self.assertEqual(selects[-1]["caller"], "UserRepository.read")
+        self.assertEqual(selects[-1]["parameters"], ["int"])
+        self.assertIn("USING INTEGER PRIMARY KEY", selects[-1]["explain"][0])
+        self.assertNotIn("slow_user", stream.getvalue())
+        # Assert that nothing is recorded under the threshold
+        db.metrics.slow_queries.threshold_ms = 60000
+        repo.read(user.id)
+        self.assertEqual(len(stream.getvalue().splitlines()), len(records))
+
+    def test_lazy_and_cached_provisioning(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db_name = os.path.join(directory, "provisioning.db")
+            lazy_db = SQLiteDatabase(db_name=db_name, provisioning="lazy")
+            startup_tables = inspect(lazy_db.engine).get_table_names()
+            Repository(lazy_db, Email)
+            lazy_tables = set(inspect(lazy_db.engine).get_table_names())
+            lazy_db.engine.dispose()
+            cached_db = SQLiteDatabase(db_name=db_name, provisioning="cached")
+            cached_tables = set(inspect(cached_db.engine).get_table_names())
+            cached_db.engine.dispose()
+            warm_db = SQLiteDatabase(db_name=db_name, provisioning="cached")
+            warm_metrics = warm_db.get_metrics()
+            warm_db.engine.dispose()
+        # Assert that lazy mode only created the tables the repository needs
+        self.assertEqual(startup_tables, [])
+        self.assertEqual(lazy_tables, {"crud_repository_schema", "email", "user"})
+        self.assertTrue({"address", "role"} <= cached_tables)
+        # Assert that an unchanged schema is confirmed by one SELECT after BEGIN
+        self.assertEqual(warm_metrics["statements"], 2)
+
+    def test_invalid_provisioning_mode(self):
+        with self.assertRaises(ValueError):
+            SQLiteDatabase(db_name=":memory:", provisioning="bogus")
+
+    def test_named_data_source_with_read_replica(self):
+        with tempfile.TemporaryDirectory() as directory:
+            db = DatabaseFactory.create(
+                {
+                    "type": "sqlite",
+                    "name": "replica_routing_test",
+                    "db_name": os.path.join(directory, "primary.db"),
+                    "replicas": [{"db_name": os.path.join(directory, "replica.db")}],
+                    "read_your_writes": 60,
+                }
+            )
+            replica = db.get_replicas()[0]
+            # Stand in for replication with a diverging copy of the row
+            Base.metadata.create_all(replica.engine)
+            Repository(replica, User).create(
+                User(username="on_replica", password="pw", name="Replica")
+            )
+            repo = Repository(db, User)
+            user = repo.create(User(username="on_primary", password="pw", name="Primary"))
+            # Assert that reads stay on the primary within the read-your-writes window
+            self.assertEqual(repo.read(user.id).username, "on_primary")
+            db.router.read_your_writes = 0
+            self.assertEqual(repo.read(user.id).username, "on_replica")
+            with UnitOfWork(db):
+                self.assertEqual(repo.read(user.id).username, "on_primary")
+            self.assertIs(DatabaseFactory.get("replica_routing_test"), db)
+            self.assertIsNot(DatabaseFactory.create(self.db_config), db)
+            db.engine.dispose()
+            replica.engine.dispose()
+
+    def test_dto_result_mode(self):
+        dto_repo = Repository(self.db, User, result_mode="dto")
+        created = dto_repo.create(User(username="dto_user", password="dto_password"))
+        # Assert that results are the model's namedtuple DTOs, not ORM instances
+        self.assertIsInstance(created, dto_repo.snapshot.dto)
+        self.assertIsNotNone(created.id)
+        self.assertEqual(dto_repo.read(created.id), created)
+        self.assertIsNone(dto_repo.read(-1))
+        result = dto_repo.read_many([created.id, -1])
+        self.assertEqual(result.items, [created])
+        self.assertEqual(result.missing, [-1])
+        page = dto_repo.page(filters={"username": "dto_user"})
+        self.assertEqual(page.items, [created])
+        self.assertEqual(list(dto_repo.iter_all(filters={"id": created.id})), [created])
+        # Assert that the orm mode returns detached copies built from the same snapshot
+        copy = self.user_repo.read(created.id)
+        self.assertEqual(dto_repo.snapshot.to_dto(copy), created)
+        with self.assertRaises(ValueError):
+            Repository(self.db, User, result_mode="bogus")
+
+    def test_core_read_path(self):
+        created = self.user_repo.create(User(username="core_user", password="core_password"))
+        row = self.user_repo.read_row(created.id)
+        # Assert that rows come back as mappings keyed by attribute name
+        self.assertEqual(row["username"], "core_user")
+        self.assertIsNone(self.user_repo.read_row(-1))
+        rows = self.user_repo.read_rows([created.id, -1, created.id])
+        self.assertEqual([r["id"] for r in rows], [created.id])
+        # Assert that repeated reads reuse the cached statement and its compiled SQL
+        self.user_repo.read_row(created.id)
+        stats = self.user_repo.statement_stats()
+        self.assertEqual(stats.statements, 2)
+        self.assertEqual(stats.executions, 4)
+        self.assertGreaterEqual(stats.compiled_hits, 2)
+        # Assert that a read inside a unit of work sees its flushed writes
+        with UnitOfWork(self.db):
+            pending = self.user_repo.create(User(username="core_pending", password="pw"))
+            self.assertEqual(self.user_repo.read_row(pending.id)["username"], "core_pending")
+
+    def test_upsert_and_upsert_many(self):
+        created = self.user_repo.upsert(User(username="upsert_user", password="pw"))
+        # Assert that a row without a conflict is inserted and returned with its key
+        self.assertIsNotNone(created.id)
+        updated = self.user_repo.upsert(
+            {"id": created.id, "username": "upsert_renamed", "password": "ignored"},
+            update_columns=["username"],
+        )
+        # Assert that a conflicting row is updated in place, only on the chosen columns
+        self.assertEqual(updated.id, created.id)
+        self.assertEqual(updated.username, "upsert_renamed")
+        self.assertEqual(updated.password, "pw")
+        self.assertIsNone(
+            self.user_repo.upsert({"id": created.id, "username": "x", "password": "y"}, update_columns=[])
+        )
+        self.assertEqual(self.user_repo.read(created.id).username, "upsert_renamed")
+        result = self.user_repo.upsert_many(
+            [
+                {"id": created.id, "username": "first", "password": "pw"},
+                {"id": created.id, "username": "last", "password": "pw"},
+                {"username": "upsert_new", "password": "pw"},
+            ],
+            returning=True,
+        )
+        # Assert that the last of duplicate keys wins and new rows get their keys
+        self.assertEqual(len(result.items), 2)
+        self.assertEqual(result.primary_keys[0], created.id)
+        self.assertEqual(self.user_repo.read(created.id).username, "last")
+        self.assertEqual(self.user_repo.read(result.primary_keys[1]).username, "upsert_new")
+
+    def test_update_uses_a_single_update(self):
+        created = self.user_repo.create(User(username="update_user", password="pw", name="old"))
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.db.engine, "before_cursor_execute", count)
+        try:
+            # An entity holding only some of its columns, as in a partial update
+            updated = self.user_repo.update(User(id=created.id, name="new"))
+        finally:
+            event.remove(self.db.engine, "before_cursor_execute", count)
+        # Assert that the update took one UPDATE instead of a SELECT and an UPDATE,
+        # and that the columns the entity did not hold were left as they were
+        statements = [statement for statement in statements if statement != "BEGIN"]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("UPDATE"))
+        self.assertEqual(updated.name, "new")
+        read_user = self.user_repo.read(created.id)
+        self.assertEqual((read_user.username, read_user.name), ("update_user", "new"))
+        # Assert that an entity without a row is still inserted through merge
+        inserted = self.user_repo.update(User(id=created.id + 1000, username="merged", password="pw"))
+        self.assertEqual(self.user_repo.read(inserted.id).username, "merged")
+        # Assert that a read-modify-update leaves last_updated out of the UPDATE, so that
+        # its onupdate default refreshes it
+        self.user_repo.update_fields(created.id, last_updated=datetime.datetime(2000, 1, 1))
+        loaded = self.user_repo.read(created.id)
+        loaded.name = "newer"
+        updated = self.user_repo.update(loaded)
+        read_user = self.user_repo.read(created.id)
+        self.assertEqual(read_user.name, "newer")
+        self.assertGreater(read_user.last_updated, datetime.datetime(2000, 1, 1))
+        # Assert that the returned entity holds the values stored, from RETURNING
+        self.assertEqual(updated.last_updated, read_user.last_updated)
+
+    def test_update_fields_and_update_where(self):
+        cache = ReadCache(max_size=10, ttl=60)
+        user_repo = UserRepository(self.db, cache=cache)
+        first = user_repo.create(User(username="fields_user", password="fields_pw"))
+        second = user_repo.create(User(username="fields_other", password="fields_pw"))
+        user_repo.update_fields(first.id, last_updated=datetime.datetime(2000, 1, 1))
+        user_repo.read(first.id)
+        result = user_repo.update_fields(first.id, username=User.username + "_renamed")
+        # Assert that the row was updated in place, with its new values returned,
+        # its onupdate column refreshed and its cached copy dropped
+        self.assertEqual(result.rowcount, 1)
+        self.assertEqual(result.primary_keys, [first.id])
+        self.assertEqual(result.items[0].username, "fields_user_renamed")
+        self.assertGreater(result.items[0].last_updated, datetime.datetime(2000, 1, 1))
+        self.assertEqual(user_repo.read(first.id).username, "fields_user_renamed")
+        self.assertEqual(user_repo.update_fields(-1, name="nobody").rowcount, 0)
+        user_repo.read(second.id)
+        result = user_repo.update_where({"password": "fields_pw"}, password="changed")
+        # Assert that every matching row was updated by one statement
+        self.assertEqual(result.rowcount, 2)
+        self.assertEqual(sorted(result.primary_keys), sorted([first.id, second.id]))
+        self.assertEqual(user_repo.read(second.id).password, "changed")
+        with self.assertRaises(ValueError):
+            user_repo.update_fields(first.id)
+        with self.assertRaises(ValueError):
+            user_repo.update_fields(first.id, emails=[])
+        with self.assertRaises(ValueError):
+            user_repo.update_where({}, password="changed")
+
+    def test_update_where_within_unit_of_work(self):
+        created = self.user_repo.create(User(username="uow_fields", password="pw"))
+        with UnitOfWork(self.db):
+            loaded = self.user_repo.read(created.id)
+            self.user_repo.update_where({"username": "uow_fields"}, name="in_uow")
+            # Assert that objects in the unit of work see the new values
+            self.assertEqual(loaded.name, "in_uow")
+        self.assertEqual(self.user_repo.read(created.id).name, "in_uow")
+
+    def test_delete_by_id_and_delete_where(self):
+        created = self.user_repo.create(User(username="delete_by_id", password="pw"))
+        # Assert that the row is deleted by key without being loaded first
+        self.assertEqual(self.user_repo.delete_by_id(created.id), 1)
+        self.assertIsNone(self.user_repo.read(created.id))
+        self.assertEqual(self.user_repo.delete_by_id(created.id), 0)
+        keys = self.user_repo.create_many(
+            [{"username": "purge_user", "password": "purge_pw"} for _ in range(5)]
+        ).primary_keys
+        result = self.user_repo.delete_where({"password": "purge_pw"}, chunk_size=2)
+        # Assert that the matching rows were deleted two at a time
+        self.assertEqual(result.rowcount, 5)
+        self.assertEqual([chunk.rowcount for chunk in result.chunks], [2, 2, 1])
+        self.assertEqual(sorted(result.primary_keys), sorted(keys))
+        self.assertEqual(self.user_repo.read_many(keys).missing, keys)
+        with self.assertRaises(ValueError):
+            self.user_repo.delete_where({})
+        with self.assertRaises(ValueError):
+            self.user_repo.delete_by_id(keys[0], cascade="bogus")
+
+    def test_delete_many_by_id_with_orm_cascade(self):
+        user = self.user_repo.create(User(username="cascade_user", password="pw"))
+        email = self.email_repo.create(Email(email="cascade@example.com", user_id=user.id))
+        result = self.user_repo.delete_many_by_id([user.id], cascade="orm")
+        # Assert that, as with session.delete, the email was kept and detached from the user
+        self.assertEqual(result.rowcount, 1)
+        self.assertIsNone(self.user_repo.read(user.id))
+        self.assertIsNone(self.email_repo.read(email.id).user_id)
+
+    def test_cascade_statements_emulate_relationship_cascades(self):
+        class CascadeBase(DeclarativeBase):
+            pass
+
+        parent_tag = Table(
+            "parent_tag",
+            CascadeBase.metadata,
+            Column("parent_id", ForeignKey("parent.id")),
+            Column("tag_id", ForeignKey("tag.id")),
+        )
+
+        class Parent(CascadeBase):
+            __tablename__ = "parent"
+            id = Column(Integer, primary_key=True)
+            children = relationship("Child", cascade="all, delete-orphan")
+            tags = relationship("Tag", secondary=parent_tag)
+
+        class Child(CascadeBase):
+            __tablename__ = "child"
+            id = Column(Integer, primary_key=True)
+            parent_id = Column(ForeignKey("parent.id"))
+            toys = relationship("Toy")
+
+        class Toy(CascadeBase):
+            __tablename__ = "toy"
+            id = Column(Integer, primary_key=True)
+            child_id = Column(ForeignKey("child.id"), nullable=True)
+
+        class Tag(CascadeBase):
+            __tablename__ = "tag"
+            id = Column(Integer, primary_key=True)
+
+        engine = create_engine("sqlite://")
+        CascadeBase.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(Parent.__table__.insert(), [{"id": 1}, {"id": 2}])
+            connection.execute(Child.__table__.insert(), [{"id": 1, "parent_id": 1}])
+            connection.execute(Toy.__table__.insert(), [{"id": 1, "child_id": 1}])
+            connection.execute(Tag.__table__.insert(), [{"id": 1}])
+            connection.execute(parent_tag.insert(), [{"parent_id": 1, "tag_id": 1}])
+            statements = cascade_statements(Parent, Parent.id.in_([1]))
+            for _, statement in statements:
+                connection.execute(statement)
+            connection.execute(Parent.__table__.delete().where(Parent.id == 1))
+            # Assert that the children went with the parent, their toys were kept
+            # without a child, and the association rows were removed
+            self.assertEqual([target for target, _ in statements], [Toy, Child, parent_tag])
+            self.assertEqual(connection.execute(select(Child.id)).all(), [])
+            self.assertEqual(connection.execute(select(Toy.child_id)).all(), [(None,)])
+            self.assertEqual(connection.execute(select(parent_tag.c.parent_id)).all(), [])
+        engine.dispose()
+
+    def test_loading_profiles(self):
+        user_repo = UserRepository(self.db, cache=ReadCache(max_size=10, ttl=60))
+        keys = []
+        for i in range(3):
+            user = User(username=f"profile_user_{i}", password="pw")
+            user.emails = [Email(email=f"profile_{i}_{j}@example.com") for j in range(2)]
+            keys.append(user_repo.create(user).id)
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement != "BEGIN":
+                statements.append(statement)
+
+        event.listen(self.db.engine, "before_cursor_execute", count)
+        try:
+            users = user_repo.read_many(keys, profile="with_relations").items
+            # Assert that the relationships were loaded in bulk, one query each
+            self.assertEqual(len(statements), 4)
+            self.assertEqual([len(user.emails) for user in users], [2, 2, 2])
+            self.assertEqual(users[0].to_dict()["address_id"], [])
+            del statements[:]
+            user = user_repo.read(keys[0], profile="with_emails")
+            self.assertEqual(len(user.emails), 2)
+            self.assertEqual(len(statements), 1)
+            # Assert that a page of users with joined emails is counted in users
+            page = user_repo.page(limit=2, filters={"password": "pw"}, profile="with_emails")
+            self.assertEqual(len(page.items), 2)
+            streamed = list(user_repo.iter_all(filters=[User.id.in_(keys)], profile="with_relations"))
+            self.assertEqual(sum(len(user.emails) for user in streamed), 6)
+        finally:
+            event.remove(self.db.engine, "before_cursor_execute", count)
+        summary = user_repo.read(keys[0], profile="summary")
+        # Assert that the column-only profile neither loads nor lazy-loads the rest
+        self.assertEqual(summary.username, "profile_user_0")
+        self.assertNotIn("password", summary.__dict__)
+        with self.assertRaises(InvalidRequestError):
+            summary.emails
+        # Assert that reads with a profile bypassed the read cache
+        self.assertEqual(user_repo.cache.stats().hits + user_repo.cache.stats().misses, 0)
+        with self.assertRaises(ValueError):
+            user_repo.read(keys[0], profile="bogus")
+
+    def test_find_by_count_exists_and_aggregate(self):
+        keys = self.user_repo.create_many(
+            [{"username": f"find_{i}", "password": "find_pw", "name": f"n{i}"} for i in range(5)]
+        ).primary_keys
+        found = self.user_repo.find_by(password="find_pw", id__gte=keys[1], order_by="-id", limit=3)
+        # Assert that the criteria, ordering and limit were applied in the database
+        self.assertEqual([user.id for user in found], [keys[4], keys[3], keys[2]])
+        rows = self.user_repo.find_by(
+            columns=["id", "username"], username__in=["find_0", "find_4"], order_by="id"
+        )
+        self.assertEqual([dict(row) for row in rows], [
+            {"id": keys[0], "username": "find_0"}, {"id": keys[4], "username": "find_4"}
+        ])
+        self.assertEqual(len(self.user_repo.find_by(password="find_pw", name__isnull=False)), 5)
+        self.assertEqual(self.user_repo.find_by(password="find_pw", name=None), [])
+        # Assert that count, exists and aggregates were computed by the database
+        self.assertEqual(self.user_repo.count(password="find_pw", username__startswith="find_"), 5)
+        self.assertTrue(self.user_repo.exists(password="find_pw", id=keys[2]))
+        self.assertFalse(self.user_repo.exists(password="find_pw", id__lt=keys[0]))
+        self.assertEqual(
+            self.user_repo.aggregate(["count__id", "min__id", "max__name"], password="find_pw"),
+            {"count__id": 5, "min__id": keys[0], "max__name": "n4"},
+        )
+        with self.assertRaises(ValueError):
+            self.user_repo.find_by(password__bogus="x")
+        with self.assertRaises(ValueError):
+            self.user_repo.aggregate(["median__id"])
+
+    def test_find_by_reuses_statements_by_query_shape(self):
+        user_repo = UserRepository(self.db)
+        for i in range(3):
+            user_repo.find_by(username=f"shape_{i}", id__in=[i, i + 1], limit=i + 1)
+            user_repo.count(username=f"shape_{i}")
+        stats = user_repo.statement_stats()
+        # Assert that one statement per shape was built and its compiled SQL reused
+        self.assertEqual(stats.statements, 2)
+        self.assertEqual(stats.executions, 6)
+        self.assertGreaterEqual(stats.compiled_hits, 4)
+        user_repo.find_by(username="shape", profile="with_relations")
+        self.assertEqual(user_repo.statement_stats().statements, 3)
+
+    def test_upsert_statement_evaluates_callable_onupdate_per_execution(self):
+        class OnUpdateBase(DeclarativeBase):
+            pass
+
+        versions = iter(range(1, 100))
+
+        class Counter(OnUpdateBase):
+            __tablename__ = "counter"
+            id = Column(Integer, primary_key=True)
+            name = Column(String(50))
+            version = Column(Integer, onupdate=lambda: next(versions))
+
+        engine = create_engine("sqlite://")
+        OnUpdateBase.metadata.create_all(engine)
+        stmt = upsert_statement(Counter, "sqlite", ["id"], ["name"])
+        with engine.begin() as connection:
+            for name in ("a", "b", "c"):
+                params = dict({"id": 1, "name": name}, **onupdate_params(Counter, ["name"]))
+                connection.execute(stmt, params)
+            # Assert that the reused statement took a new onupdate value each time
+            self.assertEqual(connection.execute(select(Counter.name, Counter.version)).all(), [("c", 3)])
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
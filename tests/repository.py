@@ -1,11 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from typing import Optional
+
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
+
 from crud_repository.db.idatabase import IDatabase
+from crud_repository.repo.cache import ReadCache
 from tests.models import User
 from crud_repository.repo.repository import Repository
 
 
 # ---------------------------------------------------------
 class UserRepository(Repository[User]):
-    def __init__(self, database: IDatabase):
-        super().__init__(database, User)
+    loading_profiles = {
+        # One extra query per relationship for the whole result, not per user
+        "with_relations": (
+            selectinload(User.emails),
+            selectinload(User.addresses),
+            selectinload(User.roles),
+        ),
+        # The emails in the same query; for single reads and pages, not for iter_all
+        "with_emails": (joinedload(User.emails), raiseload("*")),
+        # Only the listed columns, and no relationship loading at all
+        "summary": (load_only(User.id, User.username, User.name), raiseload("*")),
+    }
+
+    def __init__(self, database: IDatabase, cache: Optional[ReadCache] = None):
+        super().__init__(database, User, cache)